@@ -10,254 +10,3214 @@
 """
 The `data_processing` module provides functions for processing data.
 """
+import bz2
+import concurrent.futures
+import functools
+import gzip
+import hashlib
+import io
+import json
+import lzma
+import os
+import re
+import shutil
 import sys
+import tempfile
+import warnings
 
+import natsort
 import numpy as np
 import pandas as pd
+from scipy import fft, signal, special
 
 sys.path.append("../")
 import MD_plotting_toolkit.plotting_utils as plotting_utils  # noqa: E402
 import MD_plotting_toolkit.utils as utils  # noqa: E402
 
+BLOCK_SIZE = 1 << 24  # number of bytes parsed at a time when reading text files
+CACHE_DIR = os.environ.get(
+    "MD_PLOTTING_TOOLKIT_CACHE",
+    os.path.join(os.path.expanduser("~"), ".cache", "MD_plotting_toolkit"),
+)
+CACHE_SIZE_CAP = 1 << 31  # the maximum total size (in bytes) of the cached data
+CHUNK_SIZE = 1 << 22  # number of data points processed at a time for memory-mapped data
+INDEX_BLOCK_SIZE = 1 << 20  # number of bytes per block indexed by build_time_index
+ACF_MAX_LAG = 1 << 20  # default maximum lag of the autocorrelation functions of long time series
 
-def read_2d_data(f_input, col_idx=1):
+
+def _open_input(f_input):
+    """
+    This function opens the input file for reading in binary mode. Files compressed by
+    gzip, bzip2 or xz are detected from their magic bytes (or their extensions) and are
+    decompressed on the fly while being read, so they never need to be decompressed to
+    the disk.
+
+    Parameters
+    ----------
+    f_input : str
+        The filename of the input file.
+
+    Returns
+    -------
+    f : file object
+        The file object that yields the (decompressed) content of the file.
+    """
+    with open(f_input, "rb") as f:
+        magic = f.read(6)
+
+    if magic[:2] == b"\x1f\x8b" or (magic == b"" and f_input.endswith(".gz")):
+        return gzip.open(f_input, "rb")
+    elif magic[:3] == b"BZh" or (magic == b"" and f_input.endswith(".bz2")):
+        return bz2.open(f_input, "rb")
+    elif magic == b"\xfd7zXZ\x00" or (magic == b"" and f_input.endswith(".xz")):
+        return lzma.open(f_input, "rb")
+
+    return open(f_input, "rb")
+
+
+def _iter_blocks(f, block_size=BLOCK_SIZE):
+    """
+    This function reads a binary file object in blocks of roughly :code:`block_size`
+    bytes. Each block ends at a line boundary so that no line is split across
+    two blocks. A final line without a trailing newline is yielded as its own block.
+
+    Parameters
+    ----------
+    f : file object
+        The file object opened in binary mode.
+    block_size : int
+        The number of bytes to read at a time.
+
+    Yields
+    ------
+    block : bytes
+        A block of complete lines.
+    """
+    remainder = b""
+    while True:
+        chunk = f.read(block_size)
+        if not chunk:
+            if remainder:
+                yield remainder
+            return
+        chunk = remainder + chunk
+        idx = chunk.rfind(b"\n")
+        if idx == -1:  # no complete line yet
+            remainder = chunk
+            continue
+        remainder = chunk[idx + 1 :]  # noqa: E203
+        yield chunk[: idx + 1]
+
+
+def _parse_block(block, usecols=None):
+    """
+    This function parses a block of text lines into a 2D array. Lines starting with
+    :code:`#` (comments in GROMACS xvg files and PLUMED outputs) or :code:`@` (xmgrace
+    directives in GROMACS xvg files) and blank lines are skipped. Blocks of well-formed
+    lines are converted by :code:`np.fromstring` in one call. Blocks that do not pass
+    the consistency check (e.g. blank lines, trailing comments or malformed lines) are
+    handed over to :code:`np.loadtxt`, which also provides informative error messages.
+    If only some of the columns are selected, the block is converted by :code:`np.loadtxt`
+    directly, which skips the conversion of the other columns.
+
+    Parameters
+    ----------
+    block : bytes
+        A block of complete lines.
+    usecols : tuple
+        The indices of the columns to be returned. All columns are returned if None.
+
+    Returns
+    -------
+    data : numpy.ndarray
+        The parsed data with shape (n_rows, n_cols).
+    """
+    if b"#" in block or b"@" in block:
+        lines = [line for line in block.splitlines() if line.lstrip()[:1] not in (b"#", b"@")]
+    else:
+        lines = None
+
+    text = block if lines is None else b"\n".join(lines)
+    first = text.lstrip().split(b"\n", 1)[0]
+    n_cols = len(first.split())
+    if n_cols == 0:  # only headers or blank lines
+        return np.empty((0, 0 if usecols is None else len(usecols)))
+    if usecols is not None and (max(usecols) >= n_cols or min(usecols) < -n_cols):
+        raise utils.ParameterError(
+            f"The column indices {tuple(usecols)} are out of range for data with {n_cols} columns."
+        )
+
+    if usecols is not None and len(set(c % n_cols for c in usecols)) < n_cols:
+        # Only the selected columns are converted. The header lines are already dropped, and
+        # a single comment character keeps np.loadtxt from preprocessing each line in Python.
+        return np.loadtxt(io.BytesIO(text), comments="#", usecols=usecols, ndmin=2)
+
+    n_rows = len(lines) if lines is not None else text.count(b"\n") + (not text.endswith(b"\n"))
+    with warnings.catch_warnings():
+        warnings.simplefilter("error", DeprecationWarning)  # raised on unparsable text
+        try:
+            values = np.fromstring(text, sep=" ")
+        except DeprecationWarning:
+            values = None
+
+    if values is not None and values.size == n_rows * n_cols:
+        data = values.reshape(n_rows, n_cols)
+        return data if usecols is None else data[:, usecols]
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", UserWarning)  # blocks that only contain headers
+        data = np.loadtxt(
+            io.BytesIO(block), comments=("#", "@"), usecols=usecols, ndmin=2
+        )
+
+    return data
+
+
+def _stride_block(block, stride, n_seen=0):
+    """
+    This function keeps every :code:`stride`-th data line of a block of text lines before
+    any conversion to floats, so that the skipped lines are never parsed. Header lines
+    (see :code:`_parse_block`) and blank lines are dropped and not counted.
+
+    Parameters
+    ----------
+    block : bytes
+        A block of complete lines.
+    stride : int
+        The stride between the data lines to be kept.
+    n_seen : int
+        The number of data lines in the preceding blocks, which determines the first
+        data line of the block to be kept.
+
+    Returns
+    -------
+    block : bytes
+        The block of the data lines to be kept.
+    n_lines : int
+        The number of data lines in the input block.
+    """
+    if b"#" in block or b"@" in block:
+        lines = [line for line in block.splitlines() if line.lstrip()[:1] not in (b"#", b"@", b"")]
+    else:
+        lines = block.split(b"\n")
+        if lines[-1] == b"":  # the end of the last line
+            lines.pop()
+        if b"" in lines:  # blank lines, which are not counted as in the headers
+            lines = [line for line in lines if line.strip() != b""]
+
+    return b"\n".join(lines[(-n_seen) % stride :: stride]) + b"\n", len(lines)  # noqa: E203
+
+
+def _parse_file(f_input, usecols=None, block_size=BLOCK_SIZE, stride=1, max_points=None):
+    """
+    This function parses the whole input file in a single pass. The file is read in
+    blocks, each of which is converted in bulk (see :code:`_parse_block`) and copied
+    into a preallocated column-major buffer. The size of the buffer is estimated from
+    the file size and the number of bytes per line of the first block and is only
+    enlarged if the estimate turns out to be too small (which is expected for compressed
+    files, which are decompressed on the fly by :code:`_open_input`). The number of
+    lines of the file used for :code:`max_points` is estimated in the same way.
+
+    Parameters
+    ----------
+    f_input : str
+        The filename of the input file.
+    usecols : tuple
+        The indices of the columns to be read. All columns are read if None.
+    block_size : int
+        The number of bytes to parse at a time.
+    stride : int
+        Only every :code:`stride`-th data line is parsed (see :code:`_stride_block`).
+    max_points : int
+        The maximum number of frames to be read (see :code:`_max_points_stride`). The
+        lines are parsed with a lower bound of the stride estimated from the first block
+        (half of the number of lines estimated from the file size, which is even lower for
+        compressed files), and the parsed frames are decimated to the exact stride, which
+        is a multiple of the lower bound. Only if the estimate was too high, the file is
+        parsed again with the exact stride.
+
+    Returns
+    -------
+    data : numpy.ndarray
+        The parsed data with shape (n_cols, n_rows). Each column is contiguous in memory.
+    """
+    file_size = os.path.getsize(f_input)
+    stride_0, data, n, n_seen = stride, None, 0, 0
+    with _open_input(f_input) as f:
+        for block in _iter_blocks(f, block_size):
+            if max_points is not None and data is None and n_seen == 0:  # estimated from the first block
+                n_est = int(file_size / len(block) * block.count(b"\n")) // 2
+                stride = _max_points_stride(n_est, stride_0, max_points)
+            if stride > 1:
+                strided, n_lines = _stride_block(block, stride, n_seen)
+                n_seen += n_lines
+                values = _parse_block(strided, usecols)
+            else:
+                values = _parse_block(block, usecols)
+            n_rows = values.shape[0]
+            if n_rows == 0:
+                continue
+            if data is None:
+                n_est = int(file_size / len(block) * n_rows * 1.05) + 1
+                data = np.empty((values.shape[1], max(n_est, n_rows)))
+            elif values.shape[1] != data.shape[0]:
+                raise utils.InputFileError(
+                    f"Inconsistent number of columns in {f_input}: "
+                    f"expected {data.shape[0]}, got {values.shape[1]}."
+                )
+            if n + n_rows > data.shape[1]:  # the estimate was too small
+                n_new = max(int(1.5 * data.shape[1]), n + n_rows)
+                new_data = np.empty((data.shape[0], n_new))
+                new_data[:, :n] = data[:, :n]
+                data = new_data
+            data[:, n : n + n_rows] = values.T  # noqa: E203
+            n += n_rows
+
+    if data is None:
+        raise utils.InputFileError(f"No data could be read from {f_input}.")
+    data = data[:, :n]
+
+    if max_points is not None:
+        exact = _max_points_stride(n_seen if stride > 1 else n, stride_0, max_points)
+        if exact % stride != 0:  # the estimate was too high
+            return _parse_file(f_input, usecols, block_size, exact)
+        data = data[:, :: exact // stride]
+
+    return np.ascontiguousarray(data)
+
+
+def _max_points_stride(n, stride=1, max_points=None):
+    """
+    Returns the stride for reading at most :code:`max_points` of :code:`n` frames, which
+    is :code:`stride` times the smallest power of two that is large enough. A power of two
+    allows the frames parsed with a lower bound of the stride to be decimated to exactly
+    the same frames as those read with the exact stride.
+    """
+    if max_points is None:
+        return stride
+    factor = 1
+    while -(-n // (stride * factor)) > max_points:
+        factor *= 2
+
+    return stride * factor
+
+
+def _read_header(f_input):
+    """
+    This function reads the header of the input file to figure out the names of the
+    columns. For GROMACS xvg files, the name of the first column is taken from the
+    label of the x-axis and the names of the other columns are taken from the legends
+    (e.g. :code:`@ s0 legend "Potential"`). For PLUMED outputs, the names are taken from
+    the line starting with :code:`#! FIELDS`.
+
+    Parameters
+    ----------
+    f_input : str
+        The filename of the input file.
+
+    Returns
+    -------
+    names : dict
+        The names of the columns, with the column indices as the keys.
+    n_cols : int
+        The number of columns in the first line of data. 0 if there is no data.
+    """
+    with _open_input(f_input) as f:
+        return _parse_header(f)
+
+
+def _parse_header(lines):
+    """
+    Returns the names of the columns and the number of columns in the first line of data
+    parsed from the lines (as bytes) of an input file. See :code:`_read_header`.
+    """
+    names, n_cols = {}, 0
+    for line in lines:
+        line = line.decode(errors="replace").strip()
+        if line == "":
+            continue
+        if line[0] not in "#@":  # the first line of data
+            n_cols = len(line.split())
+            break
+        if line.startswith("#! FIELDS"):
+            names = {i: name for i, name in enumerate(line.split()[2:])}
+        elif re.match(r"@\s+xaxis\s+label", line):
+            names[0] = line.split('"')[1]
+        elif re.match(r"@\s+s\d+\s+legend", line):
+            names[int(line.split()[1][1:]) + 1] = line.split('"')[1]
+
+    return names, n_cols
+
+
+def _resolve_column(key, names, n_cols):
+    """
+    This function converts the index or the name of a column to a non-negative index.
+    Names are matched exactly first and then case-insensitively.
+
+    Parameters
+    ----------
+    key : int or str
+        The index or the name of the column.
+    names : dict
+        The names of the columns, with the column indices as the keys.
+    n_cols : int
+        The number of columns in the input file.
+
+    Returns
+    -------
+    idx : int
+        The index of the column.
+    """
+    if isinstance(key, str):
+        for idx, name in names.items():
+            if name == key:
+                return idx
+        for idx, name in names.items():
+            if name.lower() == key.lower():
+                return idx
+        raise utils.ParameterError(
+            f'No column is named "{key}". Available names: {list(names.values())}.'
+        )
+
+    if not -n_cols <= key < n_cols:
+        raise utils.ParameterError(
+            f"The column index {key} is out of range for data with {n_cols} columns."
+        )
+
+    return key % n_cols
+
+
+class DataTable:
+    """
+    A table of the columns read from an input file in one pass, with each column
+    accessible by its index in the input file or by its name.
+
+    Parameters
+    ----------
+    data : numpy.ndarray
+        The data with shape (n_cols, n_rows). Each column is contiguous in memory.
+    columns : list
+        The indices of the columns of :code:`data` in the input file.
+    names : dict
+        The names of the columns in the input file, with the column indices as the keys.
+    n_cols : int
+        The number of columns in the input file.
+    """
+
+    def __init__(self, data, columns=None, names=None, n_cols=None):
+        self.data = data
+        self.columns = list(range(data.shape[0])) if columns is None else list(columns)
+        self.names = {} if names is None else names
+        self.n_cols = data.shape[0] if n_cols is None else n_cols
+
+    def __len__(self):
+        return self.data.shape[1]
+
+    def __getitem__(self, key):
+        return self.data[self.index(key)]
+
+    def index(self, key):
+        """
+        Returns the row of :code:`data` that stores the given column.
+
+        Parameters
+        ----------
+        key : int or str
+            The index of the column in the input file or the name of the column.
+
+        Returns
+        -------
+        idx : int
+            The row of :code:`data` that stores the column.
+        """
+        col = _resolve_column(key, self.names, self.n_cols)
+        if col not in self.columns:
+            raise utils.ParameterError(f"The column {key} was not read from the input file.")
+
+        return self.columns.index(col)
+
+    def name(self, key):
+        """
+        Returns the name of the given column, or :code:`"Column <index>"` if the
+        input file does not name it.
+
+        Parameters
+        ----------
+        key : int or str
+            The index of the column in the input file or the name of the column.
+
+        Returns
+        -------
+        name : str
+            The name of the column.
+        """
+        col = _resolve_column(key, self.names, self.n_cols)
+
+        return self.names.get(col, f"Column {col}")
+
+
+def column_key(key):
+    """
+    This function converts a column specified from the command line to a column index
+    if possible. It is meant to be used as the :code:`type` of an argparse argument.
+
+    Parameters
+    ----------
+    key : str
+        The index or the name of the column.
+
+    Returns
+    -------
+    key : int or str
+        The index of the column if :code:`key` is an integer, otherwise the name of the column.
+    """
+    try:
+        return int(key)
+    except ValueError:
+        return key
+
+
+def _fingerprint(f_input):
+    """
+    This function computes a fingerprint of the input file from its size, its
+    modification time and a hash of its first and last megabyte, which is used to
+    decide whether the cached data of the file is still valid.
+
+    Parameters
+    ----------
+    f_input : str
+        The filename of the input file.
+
+    Returns
+    -------
+    fingerprint : dict
+        The size, the modification time (in ns) and the content hash of the file.
+    """
+    stat = os.stat(f_input)
+    sha = hashlib.sha1()
+    with open(f_input, "rb") as f:
+        sha.update(f.read(1 << 20))
+        if stat.st_size > 1 << 20:
+            f.seek(max(stat.st_size - (1 << 20), 1 << 20))
+            sha.update(f.read())
+
+    return {"size": stat.st_size, "mtime": stat.st_mtime_ns, "hash": sha.hexdigest()}
+
+
+def _cache_paths(f_input, cache_dir=None):
+    """
+    Returns the paths of the cached data (:code:`.npy`) and its metadata (:code:`.json`)
+    for the given input file.
+    """
+    cache_dir = CACHE_DIR if cache_dir is None else cache_dir
+    key = hashlib.sha1(os.path.abspath(f_input).encode()).hexdigest()
+
+    return os.path.join(cache_dir, f"{key}.npy"), os.path.join(cache_dir, f"{key}.json")
+
+
+def _load_cache(f_input, cache_dir=None):
+    """
+    This function loads the cached data of the input file as a read-only memory map
+    if the cache exists and the file has not changed since the cache was written.
+
+    Parameters
+    ----------
+    f_input : str
+        The filename of the input file.
+    cache_dir : str
+        The cache directory. :code:`CACHE_DIR` is used if None.
+
+    Returns
+    -------
+    data : numpy.memmap
+        The cached data with shape (n_cols, n_rows). None if there is no valid cache.
+    meta : dict
+        The metadata of the cache. None if there is no valid cache.
+    """
+    f_data, f_meta = _cache_paths(f_input, cache_dir)
+    try:
+        with open(f_meta) as f:
+            meta = json.load(f)
+        if meta["fingerprint"] != _fingerprint(f_input):
+            return None, None
+        data = np.load(f_data, mmap_mode="r")
+        os.utime(f_data)  # mark as recently used for the LRU eviction
+    except (OSError, ValueError, KeyError):
+        return None, None
+
+    meta["names"] = {int(i): name for i, name in meta["names"].items()}
+
+    return data, meta
+
+
+def _save_cache(f_input, data, names, n_cols, fingerprint, cache_dir=None):
+    """
+    This function writes the parsed data of the input file to the cache directory and
+    evicts the least recently used entries if the total size exceeds :code:`CACHE_SIZE_CAP`.
+    Failures (e.g. a read-only file system) only result in a warning.
+
+    Parameters
+    ----------
+    f_input : str
+        The filename of the input file.
+    data : numpy.ndarray
+        The parsed data with shape (n_cols, n_rows).
+    names : dict
+        The names of the columns, with the column indices as the keys.
+    n_cols : int
+        The number of columns in the input file.
+    fingerprint : dict
+        The fingerprint of the input file before it was parsed.
+    cache_dir : str
+        The cache directory. :code:`CACHE_DIR` is used if None.
+    """
+    cache_dir = CACHE_DIR if cache_dir is None else cache_dir
+    f_data, f_meta = _cache_paths(f_input, cache_dir)
+    meta = {
+        "input": os.path.abspath(f_input),
+        "fingerprint": fingerprint,
+        "names": names,
+        "n_cols": n_cols,
+    }
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        with open(f_data + ".tmp", "wb") as f:
+            np.save(f, data)
+        os.replace(f_data + ".tmp", f_data)
+        with open(f_meta, "w") as f:
+            json.dump(meta, f)
+        _evict_cache(cache_dir)
+    except OSError as err:
+        warnings.warn(f"The parsed data of {f_input} could not be cached: {err}")
+
+
+def _evict_cache(cache_dir, size_cap=None):
+    """
+    This function removes the least recently used entries in the cache directory until
+    the total size of the cached data is below the size cap.
+    """
+    size_cap = CACHE_SIZE_CAP if size_cap is None else size_cap
+    entries = []
+    for f in os.listdir(cache_dir):
+        if f.endswith(".npy"):
+            stat = os.stat(os.path.join(cache_dir, f))
+            entries.append((stat.st_mtime, stat.st_size, f[:-4]))
+
+    total = sum(entry[1] for entry in entries)
+    for _, size, key in sorted(entries):
+        if total <= size_cap:
+            break
+        for ext in [".npy", ".json"]:
+            if os.path.exists(os.path.join(cache_dir, key + ext)):
+                os.remove(os.path.join(cache_dir, key + ext))
+        total -= size
+
+
+def clear_cache(cache_dir=None):
+    """
+    This function removes all the cached data written by :code:`read_table`.
+
+    Parameters
+    ----------
+    cache_dir : str
+        The cache directory. :code:`CACHE_DIR` is used if None.
+    """
+    cache_dir = CACHE_DIR if cache_dir is None else cache_dir
+    if os.path.isdir(cache_dir):
+        for f in os.listdir(cache_dir):
+            if f.endswith((".npy", ".json", ".tmp")):
+                os.remove(os.path.join(cache_dir, f))
+
+
+def _index_path(f_input):
+    """
+    Returns the default path of the time index of the input file, which is next to the
+    input file if its directory is writable and in :code:`CACHE_DIR` otherwise.
+    """
+    if os.access(os.path.dirname(os.path.abspath(f_input)), os.W_OK):
+        return f_input + ".tidx.npz"
+
+    return _cache_paths(f_input)[0][:-4] + ".tidx.npz"
+
+
+def _hash_range(f, start, stop):
+    """
+    Returns the SHA1 hash of the bytes between :code:`start` and :code:`stop` of a file object.
+    """
+    f.seek(start)
+
+    return hashlib.sha1(f.read(stop - start)).hexdigest()
+
+
+def build_time_index(f_input, f_index=None, block_size=INDEX_BLOCK_SIZE):
+    """
+    This function builds (or updates) the time index of the input file, which records the
+    byte offset, the length and the minimum/maximum time (the first column) of each block
+    of about :code:`block_size` bytes of the file. With the index, the data within a time
+    window can be read by seeking directly to the blocks that overlap with the window,
+    which works even if the time goes backwards due to restarts. If the file has only
+    grown since the index was built, only the appended complete lines are indexed. If
+    the indexed part of the file has changed, the index is rebuilt from scratch.
+
+    Parameters
+    ----------
+    f_input : str
+        The filename of the input file, which must not be compressed.
+    f_index : str
+        The filename of the index. The default is the filename of the input with
+        :code:`.tidx.npz` appended.
+    block_size : int
+        The number of bytes per indexed block.
+
+    Returns
+    -------
+    index : dict
+        The offsets, the lengths, the minimum times and the maximum times of the blocks,
+        and the number of bytes of the file covered by the index ("end").
+    """
+    f_index = _index_path(f_input) if f_index is None else f_index
+    keys = ["offset", "length", "t_min", "t_max"]
+    index = {key: np.empty(0, dtype=int if key in keys[:2] else float) for key in keys}
+    index["end"] = 0
+    with open(f_input, "rb") as f:
+        try:
+            with np.load(f_index) as saved:
+                end = int(saved["end"])
+                valid = os.path.getsize(f_input) >= end
+                valid = valid and str(saved["head"]) == _hash_range(f, 0, min(end, 1 << 20))
+                valid = valid and str(saved["tail"]) == _hash_range(f, max(end - 4096, 0), end)
+                if valid:
+                    index = {key: saved[key] for key in keys}
+                    index["end"] = end
+        except (OSError, ValueError, KeyError):
+            pass
+
+        new = {key: [] for key in keys}
+        offset = index["end"]
+        f.seek(offset)
+        for block in _iter_blocks(f, block_size):
+            if not block.endswith(b"\n"):  # a partially written line
+                break
+            times = _parse_block(block, usecols=(0,))[:, 0]
+            if len(times) > 0:
+                new["offset"].append(offset)
+                new["length"].append(len(block))
+                new["t_min"].append(np.min(times))
+                new["t_max"].append(np.max(times))
+            offset += len(block)
+
+        if offset == index["end"]:
+            return index
+
+        for key in keys:
+            index[key] = np.concatenate([index[key], new[key]])
+        index["end"] = offset
+        head = _hash_range(f, 0, min(offset, 1 << 20))
+        tail = _hash_range(f, max(offset - 4096, 0), offset)
+
+    try:
+        with open(f_index, "wb") as f:
+            np.savez(f, head=head, tail=tail, **index)
+    except OSError as err:
+        warnings.warn(f"The time index of {f_input} could not be saved: {err}")
+
+    return index
+
+
+def _time_mask(t, tmin=None, tmax=None):
+    """
+    Returns the boolean mask of the time frames within :code:`[tmin, tmax]`.
+    """
+    mask = np.ones(len(t), dtype=bool)
+    if tmin is not None:
+        mask &= t >= tmin
+    if tmax is not None:
+        mask &= t <= tmax
+
+    return mask
+
+
+def _read_time_window(f_input, usecols, tmin=None, tmax=None):
+    """
+    This function reads the data within a time window (with the time being the first
+    column) by only parsing the blocks of the file that overlap with the window according
+    to the time index (see :code:`build_time_index`), plus the rest of the file after the
+    indexed part (including a final line without a trailing newline, as read by
+    :code:`_parse_file`). Compressed files cannot be seeked efficiently, so they are
+    parsed in full and then masked.
+
+    Parameters
+    ----------
+    f_input : str
+        The filename of the input file.
+    usecols : list
+        The indices of the columns to be read.
+    tmin : float
+        The lower bound of the time window. No lower bound if None.
+    tmax : float
+        The upper bound of the time window. No upper bound if None.
+
+    Returns
+    -------
+    data : numpy.ndarray
+        The data within the time window with shape (len(usecols), n_rows).
+    """
+    cols = list(usecols) + [0]  # the time is appended as the last column
+    with _open_input(f_input) as f:
+        compressed = not isinstance(f, io.BufferedReader)
+    if compressed is True:
+        data = _parse_file(f_input, usecols=cols)
+        return np.ascontiguousarray(data[:-1, _time_mask(data[-1], tmin, tmax)])
+
+    index = build_time_index(f_input)
+    selected = _time_mask(index["t_max"], tmin=tmin) & _time_mask(index["t_min"], tmax=tmax)
+    parts = []
+    with open(f_input, "rb") as f:
+        for offset, length in zip(index["offset"][selected], index["length"][selected]):
+            f.seek(int(offset))
+            parts.append(_parse_block(f.read(int(length)), cols))
+        f.seek(index["end"])
+        parts.append(_parse_block(f.read(), cols))  # not indexed yet
+
+    values = np.concatenate([part for part in parts if part.shape[0] > 0] or [np.empty((0, len(cols)))])
+    values = values[_time_mask(values[:, -1], tmin, tmax)]
+
+    return np.ascontiguousarray(values[:, :-1].T)
+
+
+def read_table(f_input, columns=None, cache=False, tmin=None, tmax=None, stride=1, max_points=None):
+    """
+    This function reads all the columns (or the selected ones) of the input file in a
+    single pass and returns them as a :code:`DataTable`, which allows access of each
+    column by its index or by its name taken from the :code:`@ s0 legend` lines of
+    GROMACS xvg files or the :code:`#! FIELDS` line of PLUMED outputs.
+
+    Parameters
+    ----------
+    f_input : str
+        The filename of the input file.
+    columns : list
+        The indices or names of the columns to be read. All columns are read if None.
+    cache : bool
+        Whether to use the on-disk cache in :code:`CACHE_DIR`. If True, all the columns
+        of the file are parsed and saved as a binary :code:`.npy` file on the first call,
+        which is then loaded by later calls as long as the size, the modification time
+        and the content hash of the input file remain the same.
+    tmin : float
+        Only the data with the first column (usually time) not smaller than :code:`tmin`
+        are read. If :code:`tmin` or :code:`tmax` is specified and the data is not cached,
+        only the part of the file within the time window is parsed using the time index
+        of the file (see :code:`build_time_index`).
+    tmax : float
+        Only the data with the first column (usually time) not larger than :code:`tmax`
+        are read.
+    stride : int
+        Only every :code:`stride`-th frame is read. If the data is not cached, the skipped
+        lines of the file are never converted to floats.
+    max_points : int
+        The maximum number of frames to be read. If the file has more frames, the stride
+        is multiplied by the smallest power of two that gives at most :code:`max_points`
+        frames. The same frames are read whether the data are cached or not.
+
+    Returns
+    -------
+    table : DataTable
+        The table of the data read from the input file.
+    """
+    if stride < 1 or (max_points is not None and max_points < 1):
+        raise utils.ParameterError("The stride and the maximum number of points must be positive.")
+
+    window = tmin is not None or tmax is not None
+    decimate = stride > 1 or max_points is not None
+    data, meta = _load_cache(f_input) if cache is True else (None, None)
+    if meta is not None:
+        names, n_cols = meta["names"], meta["n_cols"]
+    else:
+        fingerprint = _fingerprint(f_input) if cache is True else None
+        names, n_cols = _read_header(f_input)
+
+    if columns is not None:
+        columns = [_resolve_column(key, names, n_cols) for key in columns]
+
+    if data is None and cache is True and window is False and decimate is False:
+        data = _parse_file(f_input)
+        _save_cache(f_input, data, names, n_cols, fingerprint)
+
+    if data is None and window is True:
+        usecols = list(range(n_cols)) if columns is None else columns
+        data = _read_time_window(f_input, usecols, tmin, tmax)
+    elif data is None:
+        data = _parse_file(f_input, usecols=columns, stride=stride, max_points=max_points)
+        stride, max_points = 1, None  # already applied while parsing
+    elif window is True:  # only the selected columns and time frames are read from the cache
+        mask = _time_mask(data[0], tmin, tmax)
+        data = (data[columns] if columns is not None else data)[:, mask]
+    else:  # only the selected columns are read from the cache
+        data = data[columns] if columns is not None else np.array(data)
+
+    stride = _max_points_stride(data.shape[1], stride, max_points)
+    if stride > 1:
+        data = np.ascontiguousarray(data[:, ::stride])
+
+    return DataTable(data, columns, names, n_cols)
+
+
+def ingest(f_input, f_store=None, block_size=BLOCK_SIZE):
+    """
+    This function converts the input file into a columnar binary file (a :code:`.npy`
+    file with shape (n_cols, n_rows)) that can be memory-mapped, so that long time series
+    can be analyzed without holding them in memory. The input file is parsed block by
+    block and each column is streamed to a temporary file before the columns are
+    assembled, so the peak memory usage is independent of the size of the input file.
+    The conversion is skipped if the store is already up to date with the input file.
+
+    Parameters
+    ----------
+    f_input : str
+        The filename of the input file.
+    f_store : str
+        The filename of the column store. The default is the filename of the input
+        with :code:`.npy` appended.
+    block_size : int
+        The number of bytes to parse at a time.
+
+    Returns
+    -------
+    table : DataTable
+        The table of the data, whose :code:`data` is a read-only :code:`numpy.memmap`.
+    """
+    if f_store is None:
+        f_store = f_input + ".npy"
+    fingerprint = _fingerprint(f_input)
+    try:
+        with open(f_store + ".json") as f:
+            if json.load(f)["fingerprint"] == fingerprint:
+                return load_store(f_store)
+    except (OSError, ValueError, KeyError):
+        pass
+
+    names, n_cols = _read_header(f_input)
+    n = 0
+    with tempfile.TemporaryDirectory(dir=os.path.dirname(os.path.abspath(f_store))) as tmpdir:
+        f_cols = [os.path.join(tmpdir, f"{i}.bin") for i in range(n_cols)]
+        files = [open(f_col, "wb") for f_col in f_cols]
+        try:
+            with _open_input(f_input) as f:
+                for block in _iter_blocks(f, block_size):
+                    values = _parse_block(block)
+                    if values.shape[0] == 0:
+                        continue
+                    if values.shape[1] != n_cols:
+                        raise utils.InputFileError(
+                            f"Inconsistent number of columns in {f_input}: "
+                            f"expected {n_cols}, got {values.shape[1]}."
+                        )
+                    for i in range(n_cols):
+                        values[:, i].tofile(files[i])
+                    n += values.shape[0]
+        finally:
+            for f in files:
+                f.close()
+
+        with open(f_store + ".tmp", "wb") as f:
+            header = {"descr": np.lib.format.dtype_to_descr(np.dtype(np.float64))}
+            header.update({"fortran_order": False, "shape": (n_cols, n)})
+            np.lib.format.write_array_header_1_0(f, header)
+            for f_col in f_cols:
+                with open(f_col, "rb") as f_in:
+                    shutil.copyfileobj(f_in, f)
+        os.replace(f_store + ".tmp", f_store)
+
+    with open(f_store + ".json", "w") as f:
+        json.dump({"input": os.path.abspath(f_input), "fingerprint": fingerprint, "names": names}, f)
+
+    return load_store(f_store)
+
+
+def load_store(f_store):
+    """
+    This function memory-maps a column store written by :code:`ingest`.
+
+    Parameters
+    ----------
+    f_store : str
+        The filename of the column store.
+
+    Returns
+    -------
+    table : DataTable
+        The table of the data, whose :code:`data` is a read-only :code:`numpy.memmap`.
+    """
+    data = np.load(f_store, mmap_mode="r")
+    try:
+        with open(f_store + ".json") as f:
+            names = {int(i): name for i, name in json.load(f)["names"].items()}
+    except (OSError, ValueError, KeyError):
+        names = {}
+
+    return DataTable(data, names=names)
+
+
+def _chunks(n, chunk_size=None):
+    """
+    Yields the slices that split :code:`n` data points into chunks of :code:`chunk_size`
+    (:code:`CHUNK_SIZE` if None).
+    """
+    chunk_size = CHUNK_SIZE if chunk_size is None else chunk_size
+    for start in range(0, n, chunk_size):
+        yield slice(start, min(start + chunk_size, n))
+
+
+def _map_chunks(func, n, jobs=1, chunk_size=None):
+    """
+    Applies :code:`func` to the slices of the chunks of :code:`n` data points (see
+    :code:`_chunks`), in :code:`jobs` threads if larger than 1. The results are returned
+    in the order of the chunks.
+    """
+    if jobs is None or jobs <= 1:
+        return [func(sl) for sl in _chunks(n, chunk_size)]
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=jobs) as executor:
+        return list(executor.map(func, _chunks(n, chunk_size)))
+
+
+def _empty_like(data, n=None):
+    """
+    This function allocates an uninitialized array for the output of a function applied
+    to :code:`data`. If :code:`data` is memory-mapped, the output is memory-mapped to an
+    anonymous temporary file as well, so that it does not need to fit in memory.
+
+    Parameters
+    ----------
+    data : numpy.ndarray
+        The input data.
+    n : int
+        The length of the output. The length of :code:`data` is used if None.
+
+    Returns
+    -------
+    out : numpy.ndarray or numpy.memmap
+        The uninitialized output array of type float64.
+    """
+    n = len(data) if n is None else n
+    if isinstance(data, np.memmap) and n > 0:
+        return np.memmap(tempfile.TemporaryFile(), dtype=np.float64, mode="w+", shape=(n,))
+
+    return np.empty(n)
+
+
+def _take(data, mask):
+    """
+    Returns the elements of :code:`data` selected by the boolean :code:`mask`,
+    processed chunk by chunk.
+    """
+    out = _empty_like(data, int(np.count_nonzero(mask)))
+    n = 0
+    for sl in _chunks(len(data)):
+        values = data[sl][mask[sl]]
+        out[n : n + len(values)] = values  # noqa: E203
+        n += len(values)
+
+    return out
+
+
+def read_2d_data(f_input, col_idx=1, cache=False, tmin=None, tmax=None, stride=1, max_points=None):
+    """
+    This function reads in any input file that is readable by np.loadtxt or the
+    ones that follow the GROMACS xvg format. It returns a 2 x n array, where
+    n is the number of data points of each variable. By default, the independent
+    variable and the dependent variable are the data of the first and second column.
+    The user can decide which column to read as the dependent variable. The file is
+    parsed in a single pass, where only the two columns of interest are kept.
+
+    Parameters
+    ----------
+    f_input : str
+        The filename of the input file.
+    col_idx : int or str
+        The index (starting from 0) or the name of the column to be read as the
+        dependent variable.
+    cache : bool
+        Whether to use the on-disk cache of the parsed data. See :code:`read_table`.
+    tmin : float
+        The lower bound of the time window to be read. See :code:`read_table`.
+    tmax : float
+        The upper bound of the time window to be read. See :code:`read_table`.
+    stride : int
+        Only every :code:`stride`-th frame is read. See :code:`read_table`.
+    max_points : int
+        The maximum number of frames to be read. See :code:`read_table`.
+
+    Returns
+    -------
+    x_data : numpy.ndarray
+        The data of independent variable read from the input file.
+    y_data : numpy.ndarray
+        The data of dependent variable read from the input file.
+    """
+    table = read_table(
+        f_input, [0, col_idx], cache=cache, tmin=tmin, tmax=tmax, stride=stride, max_points=max_points
+    )
+    x_data, y_data = table.data[0], table.data[1]
+
+    return x_data, y_data
+
+
+def _first_time(f_input):
+    """
+    Returns the first column of the first data line of the input file, i.e. the time at
+    which a segment of a simulation starts. None is returned if the file has no data.
+    """
+    with _open_input(f_input) as f:
+        for line in f:
+            if line.lstrip()[:1] not in (b"#", b"@", b""):
+                return float(line.split()[0])
+
+    return None
+
+
+def _read_segment(f_input, usecols=None, stride=1, cache=False):
+    """
+    Returns the data of the selected columns of a segment read by :code:`read_table`.
+    """
+    return read_table(f_input, usecols, cache=cache, stride=stride).data
+
+
+def stream_segments(f_inputs, columns=None, jobs=1, atol=0.0, rtol=0.0, stride=1, cache=False):
+    """
+    This function reads the output files of the segments of a simulation run in parts
+    (e.g. :code:`ener.part0001.xvg`, :code:`ener.part0002.xvg`, ... from GROMACS with
+    :code:`-noappend`) in order and yields the data of each segment, trimmed so that the
+    segments form one continuous time series. Each segment only keeps the frames earlier
+    than the start time of all the following segments, which is the last occurrence of
+    each time frame as in :code:`deduplicate_data`. The start times are read from the
+    first data line of each file beforehand, so the concatenation of all the segments is
+    never built. The segments are parsed in parallel if :code:`jobs` is larger than 1.
+
+    Parameters
+    ----------
+    f_inputs : list
+        The filenames of the segments, which are sorted naturally (e.g. part2 before part10).
+    columns : list
+        The indices of the columns to be read, where the first one must be 0 (the time).
+        All columns are read if None.
+    jobs : int
+        The number of processes used to parse the segments.
+    atol : float
+        The absolute tolerance for two time frames to be considered the same.
+    rtol : float
+        The relative tolerance for two time frames to be considered the same.
+    stride : int
+        Only every :code:`stride`-th frame of each segment is read.
+    cache : bool
+        Whether to use the on-disk cache for each segment. See :code:`read_table`.
+
+    Yields
+    ------
+    f_input : str
+        The filename of the segment.
+    data : numpy.ndarray
+        The trimmed data of the segment with shape (n_columns, n_rows).
+    """
+    if columns is not None and columns[0] != 0:
+        raise utils.ParameterError("The first column to be read from the segments must be the time.")
+
+    f_inputs = natsort.natsorted(f_inputs)
+    starts = np.array([_first_time(f) for f in f_inputs], dtype=float)  # NaN for empty files
+    starts[np.isnan(starts)] = np.inf
+    cutoffs = np.append(np.minimum.accumulate(starts[::-1])[::-1][1:], np.inf)
+
+    parse = functools.partial(_read_segment, usecols=columns, stride=stride, cache=cache)
+    for f_input, cutoff, data in zip(f_inputs, cutoffs, utils.parallel_imap(parse, f_inputs, jobs)):
+        keep = data[0] < _cutoff(cutoff, atol, rtol)
+        yield f_input, (data if np.all(keep) else data[:, keep])
+
+
+def read_segments(
+    f_inputs, columns=None, jobs=1, atol=0.0, rtol=0.0, stride=1, tmin=None, tmax=None, cache=False, max_points=None
+):
+    """
+    This function reads the output files of the segments of a simulation run in parts
+    into one continuous time series. See :code:`stream_segments` for details.
+
+    Parameters
+    ----------
+    f_inputs : list
+        The filenames of the segments.
+    columns : list
+        The indices or names of the columns to be read. All columns are read if None.
+    jobs : int
+        The number of processes used to parse the segments.
+    atol : float
+        The absolute tolerance for two time frames to be considered the same.
+    rtol : float
+        The relative tolerance for two time frames to be considered the same.
+    stride : int
+        Only every :code:`stride`-th frame of each segment is read.
+    tmin : float
+        The lower bound of the time window to be read. No lower bound if None.
+    tmax : float
+        The upper bound of the time window to be read. No upper bound if None.
+    cache : bool
+        Whether to use the on-disk cache for each segment. See :code:`read_table`.
+    max_points : int
+        The maximum number of frames of the joined time series. If it has more frames,
+        it is further decimated by the smallest power of two that gives at most
+        :code:`max_points` frames (see :code:`read_table`).
+
+    Returns
+    -------
+    table : DataTable
+        The table of the data (including the time), with the names of the columns taken
+        from the first segment.
+    """
+    if stride < 1 or (max_points is not None and max_points < 1):
+        raise utils.ParameterError("The stride and the maximum number of points must be positive.")
+
+    names, n_cols = _read_header(natsort.natsorted(f_inputs)[0])
+    if columns is not None:
+        columns = [_resolve_column(key, names, n_cols) for key in columns]
+    usecols = list(range(n_cols)) if columns is None else [0] + columns  # the time is needed
+
+    parts = []
+    for f_input, data in stream_segments(f_inputs, usecols, jobs, atol, rtol, stride, cache):
+        parts.append(data[:, _time_mask(data[0], tmin, tmax)])
+    data = np.concatenate(parts, axis=1)
+    stride = _max_points_stride(data.shape[1], 1, max_points)
+    if stride > 1:
+        data = np.ascontiguousarray(data[:, ::stride])
+
+    return DataTable(data, None if columns is None else usecols, names, n_cols)
+
+
+def _has_nan(data):
+    """
+    Returns whether there is any N/A in :code:`data`, checked chunk by chunk.
+    """
+    return any(np.isnan(np.sum(data[sl])) for sl in _chunks(len(data)))
+
+
+def _tolerance(x, atol=0.0, rtol=0.0):
+    """
+    Returns the tolerance for two time frames to be considered the same at time :code:`x`.
+    """
+    return atol + rtol * np.abs(x) if rtol != 0 else atol
+
+
+def _cutoff(t, atol=0.0, rtol=0.0):
+    """
+    Returns the time below which a frame is earlier (by more than the tolerance) than a
+    later segment starting at :code:`t`. An infinite :code:`t` (i.e. no later segment)
+    is returned as is, since the relative tolerance of infinity is not a number.
+    """
+    return t - _tolerance(t, atol, rtol) if np.isfinite(t) else t
+
+
+def _restart_points(x, atol=0.0, rtol=0.0):
+    """
+    Returns the indices where the time series :code:`x` does not increase (by more than
+    the tolerance), i.e. the starts of all the increasing segments but the first one.
+    """
+    points = []
+    for sl in _chunks(len(x) - 1):
+        x_sl = x[sl.start : sl.stop + 1]  # noqa: E203
+        points.append(sl.start + 1 + np.flatnonzero(np.diff(x_sl) <= _tolerance(x_sl[1:], atol, rtol)))
+
+    return np.concatenate(points) if points else np.empty(0, dtype=int)
+
+
+def _keep_last_ranges(x, atol=0.0, rtol=0.0):
+    """
+    This function finds the frames kept by deduplicating a time series concatenated from
+    restarted simulations, which consists of increasing segments. A frame is kept if its
+    time is earlier (by more than the tolerance) than the start of all the later segments,
+    so the frames kept in each segment form a prefix of the segment, found by a binary
+    search. Only the restart points are visited after a single pass of :code:`np.diff`.
+
+    Parameters
+    ----------
+    x : numpy.ndarray
+        The time series without N/A.
+    atol : float
+        The absolute tolerance for two time frames to be considered the same.
+    rtol : float
+        The relative tolerance for two time frames to be considered the same.
+
+    Returns
+    -------
+    ranges : list
+        The (start, stop) pairs of the ranges of the kept frames, or None if there are
+        too many segments for this method to pay off.
+    dropped : list
+        The (start, stop) pairs of the ranges of the dropped frames, each of which ends
+        at a restart point.
+    """
+    if len(x) == 0:
+        return [], []
+    starts = np.append(0, _restart_points(x, atol, rtol))
+    if len(starts) > 1 + len(x) // 100:  # not a few restarts
+        return None, None
+    ends = np.append(starts[1:], len(x))
+    cutoffs = np.append(np.minimum.accumulate(np.asarray(x[starts])[::-1])[::-1][1:], np.inf)
+    ranges, dropped = [], []
+    for start, end, cutoff in zip(starts, ends, cutoffs):
+        stop = start + int(np.searchsorted(x[start:end], _cutoff(cutoff, atol, rtol)))
+        if stop > start:
+            ranges.append((start, stop))
+        if end > stop:
+            dropped.append((stop, end))
+
+    return ranges, dropped
+
+
+def _keep_last_mask(x, atol=0.0, rtol=0.0):
+    """
+    Returns the boolean mask of the frames kept by deduplicating :code:`x` by keeping
+    the last occurrence of each time frame (up to the tolerance), where the frames with
+    N/A in :code:`x` are dropped. Unlike :code:`_keep_last_ranges`, this works for any
+    data but requires sorting.
+    """
+    valid = np.ones(len(x), dtype=bool)
+    for sl in _chunks(len(x)):
+        valid[sl] = ~np.isnan(x[sl])
+    valid = np.flatnonzero(valid)
+    keep = np.zeros(len(x), dtype=bool)
+    if len(valid) == 0:
+        return keep
+
+    x_valid = np.asarray(x)[valid]
+    order = np.argsort(x_valid, kind="stable")
+    x_sorted = x_valid[order]
+    groups = np.flatnonzero(np.append(True, np.diff(x_sorted) > _tolerance(x_sorted[1:], atol, rtol)))
+    keep[valid[np.maximum.reduceat(order, groups)]] = True
+
+    return keep
+
+
+def _nan_mask(arrays):
+    """
+    Returns the boolean mask of the frames where any of the :code:`arrays` is N/A,
+    computed chunk by chunk, or None if there is no N/A at all.
+    """
+    arrays = [a for a in arrays if _has_nan(a)]
+    if len(arrays) == 0:
+        return None
+
+    mask = np.zeros(len(arrays[0]), dtype=bool)
+    for sl in _chunks(len(mask)):
+        for a in arrays:
+            mask[sl] |= np.isnan(a[sl])
+
+    return mask
+
+
+def _dedup_selection(x, nan=None, atol=0.0, rtol=0.0, L=None):
+    """
+    Returns the frames kept by deduplicating the time series :code:`x` (see
+    :code:`deduplicate_data`). The duplicates are found on the whole :code:`x` first,
+    and then the frames marked by the boolean mask :code:`nan` are dropped, so that a
+    frame with N/A never brings back an earlier duplicate of it.
+
+    Returns
+    -------
+    selection : list or numpy.ndarray
+        The (start, stop) pairs of the ranges of the kept frames, or the boolean mask of
+        the kept frames. None if all the frames are kept.
+    """
+    ranges = None
+    if not _has_nan(x):
+        ranges, dropped = _keep_last_ranges(x, atol, rtol)
+    if ranges is not None and len(dropped) > 0:
+        x_out = _take_ranges(x, ranges)
+        values = np.concatenate([x[start:stop] for start, stop in dropped])
+        idx = np.searchsorted(x_out, values)
+        diff = np.minimum(
+            np.abs(x_out[np.minimum(idx, len(x_out) - 1)] - values),
+            np.abs(x_out[np.maximum(idx - 1, 0)] - values),
+        ) if len(x_out) > 0 else np.inf
+        if not np.all(diff <= _tolerance(values, atol, rtol)):
+            ranges = None  # not a time series from restarted simulations
+
+    if ranges is not None:
+        if L is not None:
+            for start, stop in dropped:
+                _log_restart(x, start, stop, stop, L)
+        if nan is None:
+            return ranges if len(dropped) > 0 else None
+        keep = np.zeros(len(x), dtype=bool)
+        for start, stop in ranges:
+            keep[start:stop] = True
+    else:  # the general case: the last occurrences of the unique values
+        keep = _keep_last_mask(x, atol, rtol)
+        if L is not None:
+            # The runs of dropped frames are split at the restart points as in the fast path,
+            # and each part is attributed to the first restart point after it
+            dropped = np.flatnonzero(np.diff(np.concatenate([[0], ~keep & ~np.isnan(x), [0]]).astype(np.int8)))
+            restarts = _restart_points(x, atol, rtol)
+            for start, stop in dropped.reshape(-1, 2):
+                i, j = np.searchsorted(restarts, [start, stop], side="right")
+                bounds = np.concatenate([[start], restarts[i:j], [stop]])
+                for a, b in zip(bounds[:-1], bounds[1:]):
+                    if a == b:
+                        continue
+                    k = np.searchsorted(restarts, b)
+                    _log_restart(x, a, b, restarts[k] if k < len(restarts) else min(b, len(x) - 1), L)
+
+    if nan is not None:
+        keep &= ~nan
+
+    return None if np.all(keep) else keep
+
+
+def _log_restart(x, start, stop, restart, L):
+    """
+    Reports the frames from :code:`start` to :code:`stop` (exclusive) of the time series
+    :code:`x` dropped at the restart at :code:`x[restart]`.
+    """
+    L.logger(
+        f"{stop - start} frames ({x[start]:.3f} to {x[stop - 1]:.3f}) were dropped "
+        f"at the restart at {x[restart]:.3f}."
+    )
+
+
+def _select(data, selection):
+    """
+    Returns the frames of :code:`data` given by a selection from :code:`_dedup_selection`.
+    """
+    if selection is None:
+        return data
+    if isinstance(selection, list):
+        return _take_ranges(data, selection)
+
+    return _take(data, selection)
+
+
+def _take_ranges(data, ranges):
+    """
+    Returns the concatenation of the ranges of :code:`data` given as (start, stop) pairs.
+    A slice (i.e. a view) of :code:`data` is returned if there is only one range.
+    """
+    if len(ranges) == 1:
+        return data[ranges[0][0] : ranges[0][1]]  # noqa: E203
+    if not isinstance(data, np.memmap):
+        return np.concatenate([data[start:stop] for start, stop in ranges])
+
+    out = _empty_like(data, sum(stop - start for start, stop in ranges))
+    n = 0
+    for start, stop in ranges:
+        for sl in _chunks(stop - start):
+            out[n + sl.start : n + sl.stop] = data[start + sl.start : start + sl.stop]  # noqa: E203
+        n += stop - start
+
+    return out
+
+
+def deduplicate_data(x, y, atol=0.0, rtol=0.0, outfile=None):
+    """
+    This function deduplicate the input data, typically a time series. The overlapped
+    time frames are discarded by keeping the last occurance of the duplicates.
+
+    Parameters
+    ----------
+    x : array-like
+        The data of independent variable (usually time) where the overlapped data happened.
+    y : array-like
+        The data of dependent variable.
+    atol : float
+        The absolute tolerance for two time frames to be considered the same, e.g.
+        1566.0000001 ps and 1566.0 ps after a restart from a checkpoint.
+    rtol : float
+        The relative tolerance for two time frames to be considered the same.
+    outfile : str or utils.Logging
+        The file name of the output, or the logger used to report the number of the frames
+        dropped at each restart. Nothing is reported if None.
+
+    Returns
+    -------
+    x : numpy.ndarray
+        The dedupliated data of indpendent variable.
+    y : numpy.ndarray
+        The deduplicated data of dependent variable.
+
+    Notes
+    -----
+    This function could be useful to analyze xvg files or PLUMED output obtained
+    from a long simulations extended for several times. Whenever we extend a simulation
+    previously terminated due to timeout or any other issues, the simulation does not
+    starts exactly from where it ends previously but the last checkpoint, which should be
+    generated within several to 15 minutes before the simulation stopped. For example,
+    the simulation could stop at 1582 ps and the last checkopint was at 1566 ps. If we
+    extend the simulation, the data between 1562 to 1582 ps will be overlapped and should
+    be discarded. The function `data_deduplicate` is meant for dealing with this situation.
+    For a relevant example, please refer to Example 5 in the tutorial of the command `plot_xy`.
+
+    Such a time series consists of increasing segments joined at the restart points, so
+    the kept frames are found in linear time without hashing or sorting (see
+    :code:`_keep_last_ranges`), and slices of the input (i.e. views) are returned if only
+    the frames at the end are dropped. The result is verified by checking that each
+    dropped frame has a later duplicate (up to the tolerance). If not (e.g. the data is
+    not a time series), the last occurrences are found by sorting instead. The frames
+    with N/A are dropped only after the duplicates are found.
+
+    For memory-mapped input (see :code:`ingest`), the deduplicated data are written chunk
+    by chunk to memory-mapped temporary files.
+    """
+    L = outfile if isinstance(outfile, utils.Logging) or outfile is None else utils.Logging(outfile)
+    if not isinstance(x, np.memmap) and not isinstance(y, np.memmap):
+        x_in, y_in = np.asarray(x), np.asarray(y)
+    else:
+        x_in, y_in = x, y
+
+    selection = _dedup_selection(x_in, _nan_mask([y_in]), atol, rtol, L)
+    if selection is None:
+        return x, y  # do nothing
+
+    return _select(x_in, selection), _select(y_in, selection)
+
+
+def _conversion_factor(conversion=None, factor=None, T=298.15):
+    """
+    Returns the product of the factor of the unit conversion and the scaling factor.
+    See :code:`scale_data` for the parameters.
+    """
+    c1 = 1.38064852 * 6.022 * T / 1000  # multiply to convert from kT to kJ/mol
+    c2 = np.pi / 180  # multiply to convert from degree to radian
+    c3 = 0.239005736  # multiply to convert from J to cal (or kJ/mol to kcal/mol)
+
+    conversion_dict = {
+        "ns to ps": 1000,
+        "ps to ns": 1 / 1000,
+        "kT to kJ/mol": c1,
+        "kJ/mol to kT": 1 / c1,
+        "kT to kcal/mol": c1 * c3,
+        "kcal/mol to kT": 1 / (c1 * c3),
+        "kJ/mol to kcal/mol": c3,
+        "kcal/mol to kJ/mol": 1 / c3,
+        "degree to radian": c2,
+        "radian to degree": 1 / c2,
+    }
+
+    if conversion is not None and conversion not in conversion_dict:
+        raise utils.ParameterError(
+            "The specified conversion is not available. \
+                             Try using the scaling factor. "
+        )
+
+    total = 1
+    if conversion is not None:
+        total *= conversion_dict[conversion]
+    if factor is not None:
+        total *= factor
+
+    return total
+
+
+def _multiply(data, factor):
+    """
+    Returns :code:`data` multiplied by :code:`factor` out of place in a single pass,
+    chunk by chunk into a memory-mapped temporary file if :code:`data` is memory-mapped.
+    :code:`data` itself is returned if the factor is 1.
+    """
+    if factor == 1:
+        return data
+    if not isinstance(data, np.memmap):
+        return np.multiply(data, factor)
+
+    out = _empty_like(data)
+    for sl in _chunks(len(data)):
+        np.multiply(data[sl], factor, out=out[sl])
+
+    return out
+
+
+def scale_data(data, conversion=None, factor=None, T=298.15):
+    """
+    This function scales the input data according to the desired unit conversion
+    or scaling factor specified by the user.
+
+    Parameters
+    ----------
+    data : numpy.ndarray
+        The input data to be scaled.
+    conversion : str
+        The string describing what units the conversion should be carried out between.
+        Available conversions include "ps to ns", "kT to kJ/mol", "kT to kcal/mol",
+        "kJ/mol to kcal/mol", "degree to radian", and their respective conversion in
+        the opposite direction. Note that the list of available conversions does not
+        mean to be comprehensive since the user could just specify the scaling factor.
+    factor : float
+        The scaling factor for data scaling.
+    T : float
+        The temperature to be considered to convert energy units to kT or vice versa.
+
+    Returns
+    -------
+    data : numpy.ndarray
+        The processed data. The input data is scaled in place unless it is memory-mapped,
+        in which case a new memory-mapped array is returned. The conversion and the
+        scaling factor are folded into a single multiplication, which is skipped if
+        their product is 1.
+    """
+    total = _conversion_factor(conversion, factor, T)
+    if isinstance(data, np.memmap):  # scaled chunk by chunk out of place
+        return _multiply(data, total)
+
+    if total != 1:
+        data *= total
+
+    return data
+
+
+def _truncation_slice(n, truncate=None, truncate_b=None):
+    """
+    Returns the slice of :code:`n` data points retained by :code:`slice_data`.
+    """
+    if truncate is not None and truncate_b is None:
+        return slice(int(0.01 * float(truncate) * n), None)
+
+    if truncate_b is not None and truncate is None:
+        return slice(None, int(0.01 * float(truncate_b) * n))
+
+    if truncate is not None and truncate_b is not None:
+        return slice(int(0.01 * float(truncate) * n), n - int(0.01 * float(truncate_b) * n))
+
+    return slice(None)
+
+
+def _time_slice(x, begin=None, end=None):
+    """
+    Returns the slice of the sorted array :code:`x` within :code:`[begin, end]`, found
+    by binary search.
+    """
+    start = None if begin is None else int(np.searchsorted(x, begin, side="left"))
+    stop = None if end is None else int(np.searchsorted(x, end, side="right"))
+
+    return slice(start, stop)
+
+
+def slice_data(data, truncate=None, truncate_b=None):
+    """
+    This function slices the data given the truncation fraction or the fraction of data
+    to be retained. The values should be with 0 to 100 (units: percent).
+
+    Parameters
+    ----------
+    data : array-like
+        The input data to be sliced.
+    truncate : float or str
+        The percentage of data to be truncated from the beginning. 20 means 20%. If "auto",
+        the data before the equilibration time detected by :code:`detect_equilibration`
+        are truncated.
+    truncate_b : float
+        The percentage of data to be truncated from the end. 20 means 20%.
+
+    Returns
+    -------
+    data : array-like
+        The processed data.
+    """
+    if truncate == "auto":
+        data = data[_truncation_slice(len(data), 0, truncate_b)]
+        return data[detect_equilibration(data)[0] :]  # noqa: E203
+
+    sl = _truncation_slice(len(data), truncate, truncate_b)
+    if sl == slice(None):
+        return data
+
+    return data[sl]
+
+
+def slice_time(x, y, begin=None, end=None):
+    """
+    This function slices the data given the time range (or the range of any other
+    independent variable) to be retained. The bounds are found by binary search, so the
+    data of independent variable must be sorted, e.g. deduplicated by :code:`deduplicate_data`.
+
+    Parameters
+    ----------
+    x : numpy.ndarray
+        The sorted data of independent variable (usually time).
+    y : numpy.ndarray
+        The data of dependent variable.
+    begin : float
+        The lower bound (inclusive) of the data of independent variable to be retained.
+        No lower bound if None.
+    end : float
+        The upper bound (inclusive) of the data of independent variable to be retained.
+        No upper bound if None.
+
+    Returns
+    -------
+    x : numpy.ndarray
+        The sliced data of independent variable, which is a view of the input.
+    y : numpy.ndarray
+        The sliced data of dependent variable, which is a view of the input.
+    """
+    sl = _time_slice(x, begin, end)
+
+    return x[sl], y[sl]
+
+
+class Pipeline:
+    """
+    A lazy pipeline of the preprocessing steps of the data of an independent variable
+    (usually time) and one or more dependent variables: deduplication, unit conversion,
+    scaling, slicing (by percentage or by time) and striding. The steps are only recorded until :code:`run` is called,
+    which selects the data first (so the data truncated by slicing or skipped by striding
+    are never touched by any arithmetic) and then multiplies each variable by the product
+    of all its conversions and scaling factors in a single vectorized pass. The input data
+    are never modified.
+
+    Parameters
+    ----------
+    x : numpy.ndarray
+        The data of the independent variable.
+    ys : list
+        The data of the dependent variables.
+
+    Examples
+    --------
+    >>> x, ys = Pipeline(x, [y]).deduplicate().scale("x", "ps to ns").slice(20).run()
+    """
+
+    def __init__(self, x, ys):
+        self.x = x
+        self.ys = list(ys)
+        self.steps = []
+        self.factors = {"x": 1, "y": 1}
+
+    def deduplicate(self, atol=0.0, rtol=0.0, outfile=None):
+        """
+        Records the deduplication of the data. See :code:`deduplicate_data`.
+        """
+        self.steps.append(("deduplicate", (atol, rtol, outfile)))
+        return self
+
+    def scale(self, target, conversion=None, factor=None, T=298.15):
+        """
+        Records the unit conversion and the scaling of the variable :code:`target` ("x"
+        or "y", i.e. all the dependent variables). See :code:`scale_data`.
+        """
+        if target not in self.factors:
+            raise utils.ParameterError(f'The target of scaling must be "x" or "y", not "{target}".')
+        self.factors[target] *= _conversion_factor(conversion, factor, T)
+        return self
+
+    def slice(self, truncate=None, truncate_b=None, outfile=None):
+        """
+        Records the slicing of the data. See :code:`slice_data`. If :code:`truncate` is
+        "auto", the data are truncated at the latest of the equilibration times of the
+        dependent variables, which is reported to :code:`outfile`.
+        """
+        self.steps.append(("slice", (truncate, truncate_b, outfile)))
+        return self
+
+    def slice_time(self, begin=None, end=None):
+        """
+        Records the slicing of the data by the range of the independent variable, in the
+        units after all the conversions and scaling of "x". See :code:`slice_time`.
+        """
+        self.steps.append(("time", (begin, end)))
+        return self
+
+    def stride(self, stride):
+        """
+        Records the selection of every :code:`stride`-th data point.
+        """
+        self.steps.append(("stride", stride))
+        return self
+
+    def run(self):
+        """
+        Runs the recorded steps.
+
+        Returns
+        -------
+        x : numpy.ndarray
+            The processed data of the independent variable.
+        ys : list
+            The processed data of the dependent variables.
+        """
+        x, ys = self.x, list(self.ys)
+        for name, args in self.steps:
+            if name == "deduplicate":  # the same frames are kept for all the variables
+                L = args[2] if isinstance(args[2], utils.Logging) or args[2] is None else utils.Logging(args[2])
+                selection = _dedup_selection(x, _nan_mask(ys), args[0], args[1], L)
+                x, ys = _select(x, selection), [_select(y, selection) for y in ys]
+            elif name == "slice" and args[0] == "auto":
+                sl = _truncation_slice(len(x), 0, args[1])
+                x, ys = x[sl], [y[sl] for y in ys]
+                t0, g, n_eff = max(detect_equilibration(y) for y in ys)
+                if args[2] is not None:
+                    L = args[2] if isinstance(args[2], utils.Logging) else utils.Logging(args[2])
+                    L.logger(
+                        f"{t0} data points before the equilibration at {x[t0] * self.factors['x']:.3f} were "
+                        f"truncated (statistical inefficiency: {g:.3f}, effective sample size: {n_eff:.1f})."
+                    )
+                x, ys = x[t0:], [y[t0:] for y in ys]
+            else:
+                if name == "slice":
+                    sl = _truncation_slice(len(x), *args[:2])
+                elif name == "time":  # the bounds in the units of the input data
+                    bounds = [None if b is None else b / self.factors["x"] for b in args]
+                    sl = _time_slice(x, *(bounds if self.factors["x"] > 0 else bounds[::-1]))
+                else:
+                    sl = slice(None, None, args)
+                x, ys = x[sl], [y[sl] for y in ys]
+
+        return _multiply(x, self.factors["x"]), [_multiply(y, self.factors["y"]) for y in ys]
+
+
+def autocorrelation(series, max_lag=None, jobs=1):
+    """
+    This function calculates the normalized autocorrelation function of a time series
+    with zero-padded FFTs in O(n log n). The time series is split into chunks, and the
+    lagged products of each chunk with the chunk extended by :code:`max_lag` data points
+    are summed by one FFT-based cross-correlation per chunk. This gives exactly the same
+    result as a single FFT of the whole time series, while the memory usage is bounded by
+    the chunk size, so memory-mapped time series of 10^8 data points can be analyzed.
+
+    Parameters
+    ----------
+    series : numpy.ndarray
+        The time series to be analyzed.
+    max_lag : int
+        The maximum lag (in data points) of the autocorrelation function. If None, the
+        autocorrelation function is computed up to the lag of :code:`len(series) - 1`,
+        or :code:`ACF_MAX_LAG` for long time series.
+    jobs : int
+        The number of threads used to process the chunks of the data.
+
+    Returns
+    -------
+    acf : numpy.ndarray
+        The normalized autocorrelation function, whose k-th element is the autocovariance
+        at the lag of k data points (averaged over the n - k pairs) divided by the variance.
+    """
+    n = len(series)
+    if n == 0:
+        raise utils.ParameterError("The autocorrelation function of an empty time series is undefined.")
+    max_lag = min(n - 1, ACF_MAX_LAG) if max_lag is None else min(n - 1, max_lag)
+    mean = sum(_map_chunks(lambda sl: np.sum(series[sl], dtype=float), n, jobs)) / n
+    products = sum(
+        _map_chunks(lambda sl: _lagged_products(series, sl, max_lag, mean), n, jobs, max(CHUNK_SIZE, max_lag))
+    )
+
+    return _normalize_acf(products / (n - np.arange(max_lag + 1)))
+
+
+def _lagged_products(series, sl, max_lag, mean):
+    """
+    Returns the sums of :code:`d[i] * d[i + k]` over i in the slice :code:`sl` (and
+    i + k < n), for k = 0 to :code:`max_lag`, where d is the deviation of :code:`series`
+    from :code:`mean`. The sums are computed by one zero-padded FFT-based cross-correlation
+    of the chunk with the chunk extended by :code:`max_lag` data points.
+    """
+    b = np.asarray(series[sl.start : sl.stop + max_lag], dtype=float) - mean  # noqa: E203
+    a = b[: sl.stop - sl.start]
+    m = fft.next_fast_len(len(a) + max_lag, real=True)  # no circular wrap-around up to max_lag
+    products = fft.irfft(np.conj(fft.rfft(a, m)) * fft.rfft(b, m), m)[: max_lag + 1]
+
+    return np.pad(products, (0, max_lag + 1 - len(products)))
+
+
+def _normalize_acf(acov):
+    """
+    Returns the autocorrelation function from the autocovariance function :code:`acov`.
+    For a constant time series, the autocorrelation function is 1 at the lag of 0 and 0
+    otherwise.
+    """
+    if acov[0] <= 0:
+        acf = np.zeros(len(acov))
+        acf[0] = 1.0
+        return acf
+
+    return acov / acov[0]
+
+
+def autocorrelation_time(acf, n):
+    """
+    This function calculates the integrated autocorrelation time, statistical inefficiency
+    and effective sample size of a time series from its autocorrelation function. The
+    autocorrelation function is integrated up to its first zero crossing, as in pymbar.
+
+    Parameters
+    ----------
+    acf : numpy.ndarray
+        The normalized autocorrelation function (see :code:`autocorrelation`).
+    n : int
+        The number of data points of the time series.
+
+    Returns
+    -------
+    tau : float
+        The integrated autocorrelation time in data points, i.e. (g - 1) / 2.
+    g : float
+        The statistical inefficiency, which is at least 1.
+    n_eff : float
+        The effective sample size, i.e. the number of uncorrelated samples n / g.
+    """
+    crossing = np.flatnonzero(acf[1:] <= 0)
+    if len(crossing) == 0:
+        if len(acf) < n:
+            warnings.warn(
+                f"The autocorrelation function does not decay to zero within {len(acf) - 1} lags, so the "
+                "statistical inefficiency may be underestimated."
+            )
+        stop = len(acf)
+    else:
+        stop = crossing[0] + 1
+    t = np.arange(1, stop)
+    g = max(1 + 2 * np.sum((1 - t / n) * acf[1:stop]), 1.0)
+
+    return (g - 1) / 2, g, n / g
+
+
+def detect_equilibration(series, n_origins=100, max_lag=None):
+    """
+    This function detects the equilibration time of a time series by the method of
+    Chodera (J. Chem. Theory Comput. 2016, 12, 1799), i.e. the origin t0 that maximizes
+    the effective sample size of :code:`series[t0:]`. Instead of computing the statistical
+    inefficiency for every possible origin in O(n^2), the origins are chosen from a
+    geometric grid, which is dense at the beginning where the equilibration usually ends.
+    The lagged products of the suffixes are accumulated block by block from the end of the
+    time series (see :code:`autocorrelation`), and the autocovariance of each suffix is
+    corrected for the average of the suffix with prefix sums, so each block is only
+    transformed once.
+
+    Parameters
+    ----------
+    series : numpy.ndarray
+        The time series to be analyzed.
+    n_origins : int
+        The number of candidate origins.
+    max_lag : int
+        The maximum lag of the autocorrelation functions. If None, 10 times the first zero
+        crossing of the autocorrelation function of the second half of the time series
+        (plus 100) is used. The second half is usually equilibrated, while the drift of an
+        unequilibrated part would delay the zero crossing by orders of magnitude.
+
+    Returns
+    -------
+    t0 : int
+        The index of the first data point of the equilibrated part of the time series.
+    g : float
+        The statistical inefficiency of the equilibrated part.
+    n_eff : float
+        The effective sample size of the equilibrated part.
+    """
+    n = len(series)
+    if n < 3:
+        return 0, 1.0, float(n)
+    if max_lag is None:
+        crossing = np.flatnonzero(autocorrelation(series[n // 2 :]) <= 0)  # noqa: E203
+        max_lag = n - 1 if len(crossing) == 0 else 10 * int(crossing[0]) + 100
+    max_lag = min(n - 1, max_lag)
+
+    mean = sum(np.sum(series[sl], dtype=float) for sl in _chunks(n)) / n
+    prefix = _prefix_sum(series, mean)  # prefix sums of the deviations from the average
+    origins = np.unique(np.geomspace(1, n - 1, n_origins).astype(int) - 1)  # at least 2 data points retained
+    bounds = np.append(origins, n)
+    products = np.zeros(max_lag + 1)
+    best = None
+    with warnings.catch_warnings():  # from the suffixes whose ACFs do not decay within max_lag
+        warnings.simplefilter("ignore")
+        for j in range(len(origins) - 1, -1, -1):
+            t0 = int(origins[j])
+            for sl in _chunks(bounds[j + 1] - t0, max(CHUNK_SIZE, max_lag)):
+                products += _lagged_products(series, slice(t0 + sl.start, t0 + sl.stop), max_lag, mean)
+
+            # The autocovariance about the average of the suffix
+            m = n - t0
+            k = np.arange(min(max_lag, m - 1) + 1)
+            delta = (prefix[n] - prefix[t0]) / m
+            a = prefix[n - k] - prefix[t0]  # sums of d[i] for i in [t0, n - k)
+            b = prefix[n] - prefix[t0 + k]  # sums of d[i] for i in [t0 + k, n)
+            acov = (products[: len(k)] - delta * (a + b) + (m - k) * delta**2) / (m - k)
+            _, g, n_eff = autocorrelation_time(_normalize_acf(acov), m)
+            if best is None or n_eff >= best[2]:  # the earliest origin in case of ties
+                best = (t0, g, n_eff)
+
+    return best
+
+
+def _pairwise_levels(a, level, s1, s2, counts):
+    """
+    Accumulates the sums, sums of squares and counts of the block averages in :code:`a`
+    at :code:`level` and at all the higher levels obtained by repeatedly averaging
+    consecutive pairs of blocks (dropping the last block if the number of blocks is odd).
+    """
+    while len(a) > 0 and level < len(counts):
+        s1[level] += np.sum(a)
+        s2[level] += np.sum(a * a)
+        counts[level] += len(a)
+        m = len(a) // 2 * 2
+        a = 0.5 * (a[:m:2] + a[1:m:2])
+        level += 1
+
+
+def block_average(series):
+    """
+    This function estimates the standard error of the average of a time series by block
+    averaging (Flyvbjerg and Petersen, J. Chem. Phys. 1989, 91, 461). The block averages
+    of all the block sizes (powers of 2) are obtained by repeatedly averaging consecutive
+    pairs of blocks, which takes O(n) operations in total. The time series is processed
+    chunk by chunk, and the averages of the chunks are reduced further for the block
+    sizes larger than a chunk, so memory-mapped time series are never fully loaded.
+
+    Parameters
+    ----------
+    series : numpy.ndarray
+        The time series to be analyzed.
+
+    Returns
+    -------
+    block_sizes : numpy.ndarray
+        The block sizes (in data points) with at least 2 blocks.
+    errors : numpy.ndarray
+        The estimated standard errors of the average at each block size. The estimates
+        increase with the block size until the blocks are uncorrelated, where the errors
+        reach a plateau.
+    uncertainties : numpy.ndarray
+        The uncertainties of the estimated errors.
+    """
+    n = len(series)
+    if n < 2:
+        raise utils.ParameterError("Block averaging requires at least 2 data points.")
+    n_levels = int(np.log2(n))  # block sizes from 1 to 2^(n_levels - 1), i.e. at least 2 blocks
+    s1, s2, counts = np.zeros(n_levels), np.zeros(n_levels), np.zeros(n_levels, dtype=int)
+    mean = sum(np.sum(series[sl], dtype=float) for sl in _chunks(n)) / n
+
+    chunk_level = int(np.log2(CHUNK_SIZE))  # chunks of a power of 2, so no blocks span two chunks
+    chunk_means = []
+    for sl in _chunks(n, 1 << chunk_level):
+        a = np.asarray(series[sl], dtype=float) - mean  # deviations preserve the precision of the sums
+        _pairwise_levels(a, 0, s1, s2, counts)
+        if sl.stop - sl.start == 1 << chunk_level:
+            chunk_means.append(np.mean(a))
+    a = np.array(chunk_means)
+    m = len(a) // 2 * 2
+    _pairwise_levels(0.5 * (a[:m:2] + a[1:m:2]), chunk_level + 1, s1, s2, counts)
+
+    var = np.maximum(s2 / counts - (s1 / counts) ** 2, 0)  # the variance of the block averages
+    errors = np.sqrt(var / (counts - 1))
+
+    return 2 ** np.arange(n_levels), errors, errors / np.sqrt(2 * (counts - 1))
+
+
+def block_plateau(errors, uncertainties):
+    """
+    This function finds the plateau of the standard errors estimated by block averaging,
+    i.e. the first block size beyond which the estimates do not increase by more than
+    their uncertainties.
+
+    Parameters
+    ----------
+    errors : numpy.ndarray
+        The estimated standard errors at increasing block sizes (see :code:`block_average`).
+    uncertainties : numpy.ndarray
+        The uncertainties of the estimated errors.
+
+    Returns
+    -------
+    index : int
+        The index of the block size where the plateau begins, or None if the estimates
+        keep increasing, i.e. the blocks are not long enough to be uncorrelated.
+    """
+    for i in range(len(errors) - 1):
+        if np.all(errors[i + 1 :] - errors[i] <= uncertainties[i + 1 :]):  # noqa: E203
+            return i
+
+    return None
+
+
+def _block_reduce(series, block_size, reduce):
+    """
+    Applies :code:`reduce` to the complete blocks of :code:`block_size` data points of
+    :code:`series`, chunk by chunk (a multiple of the block size), and stacks the results.
+    :code:`reduce` maps an array of data points and the offsets of the blocks within it
+    to the values of the blocks.
+    """
+    n_blocks = len(series) // block_size
+    if n_blocks == 0:
+        raise utils.ParameterError(f"The block size {block_size} is larger than the number of data points.")
+    chunk_size = max(CHUNK_SIZE // block_size, 1) * block_size
+    values = []
+    for sl in _chunks(n_blocks * block_size, chunk_size):
+        a = np.asarray(series[sl], dtype=float)
+        values.append(reduce(a, np.arange(0, len(a), block_size)))
+
+    return np.concatenate(values)
+
+
+def _resample_blocks(values, batches):
+    """
+    Returns the sums of the values of the blocks resampled with replacement, for the
+    batches of :code:`(seed, size)` resamples. The blocks drawn in each batch are counted by
+    one :code:`np.bincount`, and the sums are the products of the counts and the values, so
+    the resampled data are never materialized.
+    """
+    n_blocks = len(values)
+    results = []
+    for seed, size in batches:
+        rng = np.random.default_rng(seed)
+        indices = rng.integers(0, n_blocks, (size, n_blocks)) + n_blocks * np.arange(size)[:, None]
+        weights = np.bincount(indices.ravel(), minlength=size * n_blocks).reshape(size, n_blocks)
+        results.append(weights @ values)
+
+    return np.concatenate(results)
+
+
+def _resample_multinomial(counts, batches):
+    """
+    Returns the histograms of the data points resampled with replacement, for the batches
+    of :code:`(seed, size)` resamples. The counts of a resample follow a multinomial
+    distribution with the probabilities of the bins (the last bin being the data points
+    out of range), so they are drawn directly in O(n_bins) instead of O(n).
+    """
+    n = int(np.sum(counts))
+    results = []
+    for seed, size in batches:
+        rng = np.random.default_rng(seed)
+        results.append(rng.multinomial(n, counts / n, size)[:, :-1])
+
+    return np.concatenate(results)
+
+
+def _bootstrap(func, values, n_resamples, batch_size, seed, jobs):
+    """
+    Runs :code:`func(values, batches)` for the batches of :code:`n_resamples` resamples,
+    spread over :code:`jobs` processes. Each batch is seeded by a child of
+    :code:`np.random.SeedSequence(seed)`, so the results do not depend on :code:`jobs`.
+    """
+    sizes = [batch_size] * (n_resamples // batch_size)
+    if n_resamples % batch_size > 0:
+        sizes.append(n_resamples % batch_size)
+    batches = list(zip(np.random.SeedSequence(seed).spawn(len(sizes)), sizes))
+    jobs = 1 if jobs is None else max(min(jobs, len(batches)), 1)
+    groups = [[batches[i] for i in group] for group in np.array_split(np.arange(len(batches)), jobs)]
+
+    return np.concatenate(utils.parallel_map(functools.partial(func, values), groups, jobs))
+
+
+def bootstrap_mean(series, n_resamples=1000, block_size=1, seed=None, jobs=1):
+    """
+    This function calculates the averages of bootstrap resamples of a time series. With a
+    block size larger than 1, the time series is resampled by non-overlapping blocks
+    (block bootstrap), which preserves the correlation within the blocks. The block size
+    should then be much longer than the statistical inefficiency (see
+    :code:`autocorrelation_time`).
+
+    Parameters
+    ----------
+    series : numpy.ndarray
+        The time series to be resampled.
+    n_resamples : int
+        The number of resamples.
+    block_size : int
+        The number of data points in a block. The data points after the last complete
+        block are discarded.
+    seed : int
+        The seed of the random number generator. The results are reproducible given the
+        seed, regardless of the number of processes.
+    jobs : int
+        The number of processes drawing the resamples.
+
+    Returns
+    -------
+    samples : numpy.ndarray
+        The averages of the resamples.
+    """
+    sums = _block_reduce(series, block_size, np.add.reduceat)
+    batch_size = max(min(CHUNK_SIZE // len(sums), n_resamples), 1)
+    samples = _bootstrap(_resample_blocks, sums, n_resamples, batch_size, seed, jobs)
+
+    return samples / (len(sums) * block_size)
+
+
+def bootstrap_histogram(series, bins=10, hist_range=None, n_resamples=1000, block_size=1, seed=None, jobs=1):
+    """
+    This function calculates the histograms of bootstrap resamples of a time series. The
+    data points are binned only once: the histograms of the resamples follow a multinomial
+    distribution if the data points are resampled individually, or are the sums of the
+    histograms of the resampled blocks otherwise (see :code:`bootstrap_mean`).
+
+    Parameters
+    ----------
+    series : numpy.ndarray
+        The time series to be resampled.
+    bins : int
+        The number of bins.
+    hist_range : tuple
+        The lower and upper bounds of the bins. The minimum and maximum of the data are
+        used if None.
+    n_resamples : int
+        The number of resamples.
+    block_size : int
+        The number of data points in a block.
+    seed : int
+        The seed of the random number generator.
+    jobs : int
+        The number of processes drawing the resamples.
+
+    Returns
+    -------
+    samples : numpy.ndarray
+        The counts of the bins of each resample, with a shape of (n_resamples, bins).
+    bin_edges : numpy.ndarray
+        The edges of the bins.
+    """
+    if hist_range is None:
+        hist_range = (
+            min(np.min(series[sl]) for sl in _chunks(len(series))),
+            max(np.max(series[sl]) for sl in _chunks(len(series))),
+        )
+    bin_edges = np.histogram_bin_edges([], bins, hist_range)
+
+    def histograms(a, offsets):  # the histograms of the blocks, with the data points out of range last
+        idx = np.searchsorted(bin_edges, a, side="right") - 1
+        idx[a == bin_edges[-1]] = bins - 1  # the last bin is closed, as in np.histogram
+        idx[(idx < 0) | (idx >= bins)] = bins
+        block = np.arange(len(a)) // block_size
+        return np.bincount(block * (bins + 1) + idx, minlength=len(offsets) * (bins + 1)).reshape(-1, bins + 1)
+
+    values = _block_reduce(series, block_size, histograms)
+    if block_size == 1:
+        counts = np.sum(values, axis=0)
+        samples = _bootstrap(_resample_multinomial, counts, n_resamples, CHUNK_SIZE, seed, jobs)
+    else:
+        batch_size = max(min(CHUNK_SIZE // len(values), n_resamples), 1)
+        samples = _bootstrap(_resample_blocks, values[:, :-1], n_resamples, batch_size, seed, jobs)
+
+    return samples, bin_edges
+
+
+def confidence_interval(samples, level=0.95):
+    """
+    This function calculates the percentile confidence interval from bootstrap samples.
+    Since percentiles are preserved by monotonic functions, the confidence interval of a
+    derived quantity, e.g. the free energy -kT ln p of a bin, can be obtained from the
+    confidence interval of the probability p.
+
+    Parameters
+    ----------
+    samples : numpy.ndarray
+        The bootstrap samples, with the resamples along the first axis.
+    level : float
+        The confidence level.
+
+    Returns
+    -------
+    lower : float or numpy.ndarray
+        The lower bound(s) of the confidence interval.
+    upper : float or numpy.ndarray
+        The upper bound(s) of the confidence interval.
+    """
+    lower, upper = np.percentile(samples, [50 * (1 - level), 50 * (1 + level)], axis=0)
+
+    return lower, upper
+
+
+def flatness(counts):
+    """
+    This function calculates the flatness metrics of histograms, e.g. the histograms of
+    the states visited in Wang-Landau or expanded ensemble simulations.
+
+    Parameters
+    ----------
+    counts : numpy.ndarray
+        The counts of the bins, or a 2D array of the counts of multiple histograms (one
+        per row).
+
+    Returns
+    -------
+    metrics : dict
+        The flatness metrics of the histogram(s), including "N_ratio" (the ratio of the
+        maximum count to the minimum count, infinite if a bin is empty), "min_mean" (the
+        ratio of the minimum count to the average count) and "KL" (the Kullback-Leibler
+        divergence of the histogram from the uniform distribution). The metrics of a
+        perfectly flat histogram are 1, 1 and 0, respectively.
+    """
+    counts = np.asarray(counts, dtype=float)
+    total = np.sum(counts, axis=-1, keepdims=True)
+    p = counts / total
+    with np.errstate(divide="ignore", invalid="ignore"):
+        metrics = {
+            "N_ratio": np.max(counts, axis=-1) / np.min(counts, axis=-1),
+            "min_mean": np.min(counts, axis=-1) / np.mean(counts, axis=-1),
+            "KL": np.sum(special.xlogy(p, p * counts.shape[-1]), axis=-1),
+        }
+
+    return metrics
+
+
+def flatness_windows(series, windows, bins=10):
+    """
+    This function calculates the flatness metrics (see :code:`flatness`) of the histograms
+    of the data within multiple windows at once. The data are sorted once, so the sorted
+    data serve as a cumulative histogram of arbitrary resolution: the counts below each
+    bin edge of all the windows are found by one vectorized binary search, and the counts
+    of the bins are their differences. Each window costs O(bins log n) instead of a pass
+    over the data.
+
+    Parameters
+    ----------
+    series : numpy.ndarray
+        The data to be binned.
+    windows : array-like
+        The lower and upper bounds of the windows, with a shape of (n_windows, 2). The
+        histogram of each window has :code:`bins` bins of equal width spanning the window,
+        with the same bin edges (and the last bin being closed) as :code:`np.histogram`.
+    bins : int
+        The number of bins of each window.
+
+    Returns
+    -------
+    counts : numpy.ndarray
+        The counts of the bins of each window, with a shape of (n_windows, bins).
+    metrics : dict
+        The flatness metrics of each window (see :code:`flatness`).
+    """
+    windows = np.asarray(windows, dtype=float).reshape(-1, 2)
+    if np.any(windows[:, 1] <= windows[:, 0]):
+        raise utils.ParameterError("The upper bound of each window must be larger than its lower bound.")
+    cumulative = np.sort(np.asarray(series, dtype=float))
+    edges = np.linspace(windows[:, 0], windows[:, 1], bins + 1, axis=1)
+    below = np.searchsorted(cumulative, edges, side="left")
+    below[:, -1] = np.searchsorted(cumulative, windows[:, 1], side="right")  # the last bin is closed
+    counts = np.diff(below, axis=1)
+
+    return counts, flatness(counts)
+
+
+def analyze_data(x, y, x_label, y_label, outfile, jobs=1, blocking=False):
+    """
+    This function performs simple data analysis and prints out the results. The
+    statistics are computed in a single pass over the data (see :code:`RunningStatistics`),
+    plus another one to find the data point closest to the average of a time series. For
+    a time series, the uncertainty of the average is estimated from the integrated
+    autocorrelation time (see :code:`autocorrelation` and :code:`autocorrelation_time`),
+    and optionally by block averaging (see :code:`block_average`).
+
+    Parameters
+    ----------
+    x : numpy.ndarray
+        The data of variable x.
+    y : numpy.ndarray
+        The data of variable y.
+    x_label : str
+        The label of the x-axis.
+    y_label : str
+        The lable of the y-axis.
+    outfile : str or utils.Logging
+        The file name of the output, or the logger used to print and save the results.
+    jobs : int
+        The number of threads used to process the chunks of the data.
+    blocking : bool
+        Whether to estimate the standard error of the average of a time series by block
+        averaging.
+
+    Returns
+    -------
+    results : dict
+        The results of the analysis of a time series (None if the input data is not a time
+        series), including the normalized autocorrelation function ("acf") and, if
+        :code:`blocking` is True, the outputs of :code:`block_average` ("blocking"), which
+        are empty arrays if there are fewer than 2 data points.
+    """
+    L = outfile if isinstance(outfile, utils.Logging) else utils.Logging(outfile)
+    x, y = np.asarray(x), np.asarray(y)  # no copies are made for memory-mapped data
+    x_var, x_unit = plotting_utils.identify_var_units(x_label)
+    y_var, y_unit = plotting_utils.identify_var_units(y_label)
+    stats = RunningStatistics.from_data(x, y, jobs)
+
+    if x_unit == " ns" or x_unit == " ps":
+        L.logger(
+            f"The average of {y_var}: {stats.mean:.3f} (RMSF: {stats.rmsf:.3f}, "
+            f"max: {stats.max:.3f}, min: {stats.min:.3f})"
+        )
+        L.logger(f"The maximum of {y_var} occurs at {stats.x_max:.3f}{x_unit}.")
+        L.logger(f"The minimum of {y_var} occurs at {stats.x_min:.3f}{x_unit}.")
+
+        def closest(sl):  # the data point closest to the average in a chunk
+            diff = np.abs(y[sl] - stats.mean)
+            i = int(np.argmin(diff))
+            return diff[i], sl.start + i
+
+        i_avg = min(_map_chunks(closest, len(y), jobs))[1]
+        t_avg = x[i_avg]
+        L.logger(
+            f"The {y_var} ({y[i_avg]:.3f}{y_unit}) at {t_avg:.3f}{x_unit} is closet to the average."
+        )
+
+        acf = autocorrelation(y, jobs=jobs)
+        tau, g, n_eff = autocorrelation_time(acf, len(y))
+        dt = x[1] - x[0] if len(x) > 1 else 0
+        L.logger(
+            f"The integrated autocorrelation time of {y_var}: {tau * dt:.3f}{x_unit} (statistical inefficiency: "
+            f"{g:.3f}, effective sample size: {n_eff:.1f})"
+        )
+        L.logger(f"The uncertainty of the average of {y_var}: {np.sqrt(stats.var / n_eff):.3f}{y_unit}")
+        results = {"acf": acf}
+
+        if blocking is True and len(y) < 2:
+            results["blocking"] = (np.empty(0, dtype=int), np.empty(0), np.empty(0))
+            L.logger(f"The standard error of the average of {y_var} cannot be estimated by block averaging.")
+        elif blocking is True:
+            block_sizes, errors, uncertainties = results["blocking"] = block_average(y)
+            i = block_plateau(errors, uncertainties)
+            if i is None:
+                L.logger(
+                    f"The standard error of the average of {y_var} by block averaging did not reach a plateau "
+                    f"(the largest estimate: {np.max(errors):.3f}{y_unit})."
+                )
+            else:
+                L.logger(
+                    f"The standard error of the average of {y_var} by block averaging: {errors[i]:.3f}{y_unit} "
+                    f"(reaching a plateau at blocks of {block_sizes[i]} data points)"
+                )
+
+        return results
+    else:  # input data is not a time series
+        L.logger(
+            f"Maximum of {y_var}: {stats.max:.3f}{y_unit}, which occurs at {stats.x_max:.3f}{x_unit}."
+        )
+        L.logger(
+            f"Minimum of {y_var}: {stats.min:.3f}{y_unit}, which occurs at {stats.x_min:.3f}{x_unit}."
+        )
+
+
+def _prefix_sum(series, ref=0.0):
+    """
+    This function computes the prefix sums of the deviations of :code:`series` from
+    :code:`ref`, i.e. the i-th element is the sum of :code:`series[:i] - ref`. The
+    deviations are summed chunk by chunk by :code:`np.cumsum` and the sums of the chunks
+    are accumulated with Kahan's compensated summation. With :code:`ref` set to the average,
+    the prefix sums stay of the order of a random walk instead of growing linearly, so the
+    differences of the prefix sums do not suffer from the float drift of a naive cumulative
+    sum of 10^8 data points with a large offset.
+
+    Parameters
+    ----------
+    series : numpy.ndarray
+        The time series.
+    ref : float
+        The reference value subtracted from the data points.
+
+    Returns
+    -------
+    prefix : numpy.ndarray
+        The prefix sums, with :code:`len(series) + 1` elements. It is memory-mapped to a
+        temporary file if :code:`series` is memory-mapped.
+    """
+    prefix = _empty_like(series, len(series) + 1)
+    prefix[0] = 0.0
+    offset, compensation = 0.0, 0.0
+    for sl in _chunks(len(series)):
+        local = np.cumsum(series[sl] - ref)
+        prefix[sl.start + 1 : sl.stop + 1] = local + offset  # noqa: E203
+        total = local[-1] - compensation
+        new_offset = offset + total
+        compensation = (new_offset - offset) - total
+        offset = new_offset
+
+    return prefix
+
+
+def running_avgs(series, windows):
+    """
+    This function calculates the running averages of a given time series for several
+    window sizes from one shared prefix sum (see :code:`_prefix_sum`), which is computed
+    chunk by chunk so that memory-mapped time series are never fully loaded.
+
+    Parameters
+    ----------
+    series : numpy.ndarray
+        The time series to be analyzed.
+    windows : list
+        The numbers of data points in the windows.
+
+    Returns
+    -------
+    running_avgs : list
+        The running averages for each window size N, whose i-th element is the average of
+        :code:`series[i:i + N]`. See :code:`window_positions` for the corresponding positions.
+        They are memory-mapped to temporary files if :code:`series` is memory-mapped.
+    """
+    if any(N < 1 for N in windows):
+        raise utils.ParameterError(f"The window sizes {windows} must be positive.")
+
+    ref = np.mean(series) if len(series) > 0 else 0.0
+    prefix = _prefix_sum(series, ref)
+    running_avgs = []
+    for N in windows:
+        running_avg = _empty_like(series, max(len(series) - N + 1, 0))
+        for sl in _chunks(len(running_avg)):
+            running_avg[sl] = (prefix[sl.start + N : sl.stop + N] - prefix[sl]) / N + ref  # noqa: E203
+        running_avgs.append(running_avg)
+
+    return running_avgs
+
+
+def running_avg(series, N):
+    """
+    Calculate the running average of a given time series with a specified window size.
+    See :code:`running_avgs` for multiple window sizes.
+
+    Parameters
+    ----------
+    series : numpy.ndarray
+        The time series to be analyzed.
+    N : int
+        The number of data points in a window.
+
+    Returns
+    -------
+    running_avg : numpy.ndarray
+        The running average, whose i-th element is the average of :code:`series[i:i + N]`.
+        It is memory-mapped to a temporary file if :code:`series` is memory-mapped.
+    """
+    return running_avgs(series, [N])[0]
+
+
+def _rolling(series, N, kernel):
+    """
+    Applies a rolling-window kernel to :code:`series` chunk by chunk, with an overlap of
+    N - 1 data points between consecutive chunks, so memory-mapped time series are never
+    fully loaded. The kernel maps an array of m data points to the m - N + 1 values of
+    the windows within it.
+    """
+    if N < 1:
+        raise utils.ParameterError(f"The window size {N} must be positive.")
+
+    out = _empty_like(series, max(len(series) - N + 1, 0))
+    for sl in _chunks(len(out)):
+        out[sl] = kernel(np.asarray(series[sl.start : sl.stop + N - 1]))  # noqa: E203
+
+    return out
+
+
+def _rolling_std_kernel(a, N):
+    """
+    The rolling standard deviation from the prefix sums of the deviations from the
+    average and of their squares (see :code:`rolling_std`).
+    """
+    d = a - np.mean(a)
+    s1 = np.cumsum(np.insert(d, 0, 0))
+    s2 = np.cumsum(np.insert(d * d, 0, 0))
+    var = ((s2[N:] - s2[:-N]) - (s1[N:] - s1[:-N]) ** 2 / N) / N
+
+    return np.sqrt(np.maximum(var, 0))  # negative values only arise from rounding
+
+
+def _rolling_extreme_kernel(a, N, ufunc):
+    """
+    The rolling maximum (:code:`ufunc` = :code:`np.maximum`) or minimum (:code:`np.minimum`)
+    by the van Herk/Gil-Werman algorithm: the data are split into blocks of N data points,
+    and each window, which spans at most two blocks, is the extreme of the suffix extreme
+    of its first block and the prefix extreme of its last block.
+    """
+    m = len(a)
+    padded = np.full(-(-m // N) * N, -np.inf if ufunc is np.maximum else np.inf)
+    padded[:m] = a
+    blocks = padded.reshape(-1, N)
+    prefix = ufunc.accumulate(blocks, axis=1).ravel()
+    suffix = ufunc.accumulate(blocks[:, ::-1], axis=1)[:, ::-1].ravel()
+
+    return ufunc(suffix[: m - N + 1], prefix[N - 1 : m])  # noqa: E203
+
+
+def rolling_std(series, N):
+    """
+    This function calculates the rolling standard deviation of a time series in O(n)
+    from the prefix sums of the data points and of their squares. The deviations from
+    the average of each chunk are summed instead of the raw data points to preserve the
+    precision for data with a large offset.
+
+    Parameters
+    ----------
+    series : numpy.ndarray
+        The time series to be analyzed.
+    N : int
+        The number of data points in a window.
+
+    Returns
+    -------
+    rolling_std : numpy.ndarray
+        The rolling standard deviation, whose i-th element is the (population) standard
+        deviation of :code:`series[i:i + N]`.
+    """
+    return _rolling(series, N, lambda a: _rolling_std_kernel(a, N))
+
+
+def rolling_max(series, N):
+    """
+    This function calculates the rolling maximum of a time series in O(n), vectorized
+    by the van Herk/Gil-Werman algorithm (equivalent to a monotonic deque).
+
+    Parameters
+    ----------
+    series : numpy.ndarray
+        The time series to be analyzed.
+    N : int
+        The number of data points in a window.
+
+    Returns
+    -------
+    rolling_max : numpy.ndarray
+        The rolling maximum, whose i-th element is the maximum of :code:`series[i:i + N]`.
     """
-    This function reads in any input file that is readable by np.loadtxt or the
-    ones that follow the GROMACS xvg format. It returns a 2 x n array, where
-    n is the number of data points of each variable. By default, the independent
-    variable and the dependent variable are the data of the first and second column.
-    The user can decide which column to read as the dependent variable.
+    return _rolling(series, N, lambda a: _rolling_extreme_kernel(a, N, np.maximum))
+
+
+def rolling_min(series, N):
+    """
+    This function calculates the rolling minimum of a time series in O(n). See
+    :code:`rolling_max`.
 
     Parameters
     ----------
-    f_input : str
-        The filename of the input file.
-    col_idx : int
-        The index (starting from 0) of the column to be read as the dependent variable.
+    series : numpy.ndarray
+        The time series to be analyzed.
+    N : int
+        The number of data points in a window.
 
     Returns
     -------
-    x_data : numpy.ndarray
-        The data of independent variable read from the input file.
-    y_data : numpy.ndarray
-        The data of dependent variable read from the input file.
+    rolling_min : numpy.ndarray
+        The rolling minimum, whose i-th element is the minimum of :code:`series[i:i + N]`.
     """
-    try:
-        data = np.transpose(np.loadtxt(f_input))
-        x_data, y_data = data[0], data[col_idx]
-    except ValueError:
-        x_data, y_data = [], []
-        infile = open(f_input, "r")
-        lines = infile.readlines()
-        infile.close()
+    return _rolling(series, N, lambda a: _rolling_extreme_kernel(a, N, np.minimum))
 
-        for line in lines:
-            if "#" not in line and "@" not in line:
-                x_data.append(float(line.split()[0]))
-                y_data.append(float(line.split()[col_idx]))
 
-        x_data, y_data = np.array(x_data), np.array(y_data)
+def rolling_median(series, N):
+    """
+    This function calculates the rolling median of a time series in O(n log N) with the
+    compiled skip list of pandas, applied chunk by chunk.
 
-    return x_data, y_data
+    Parameters
+    ----------
+    series : numpy.ndarray
+        The time series to be analyzed.
+    N : int
+        The number of data points in a window.
+
+    Returns
+    -------
+    rolling_median : numpy.ndarray
+        The rolling median, whose i-th element is the median of :code:`series[i:i + N]`.
+    """
+    return _rolling(series, N, lambda a: pd.Series(a).rolling(N).median().to_numpy()[N - 1 :])  # noqa: E203
 
 
-def deduplicate_data(x, y):
+def ema(series, span):
     """
-    This function deduplicate the input data, typically a time series. The overlapped
-    time frames are discarded by keeping the last occurance of the duplicates.
+    This function calculates the exponential moving average of time series in O(n) as a
+    first-order recursive filter, with a smoothing factor of 2 / (span + 1). The average
+    starts from the first data point, as in :code:`pandas.Series.ewm(span, adjust=False)`.
 
     Parameters
     ----------
-    x : array-like
-        The data of independent variable (usually time) where the overlapped data happened.
-    y : array-like
-        The data of dependent variable.
+    series : numpy.ndarray
+        The time series to be smoothed, or a 2D array of time series (one per row).
+    span : int
+        The span of the exponential moving average, in data points.
 
     Returns
     -------
-    x : numpy.ndarray
-        The dedupliated data of indpendent variable.
-    y : numpy.ndarray
-        The deduplicated data of dependent variable.
+    smoothed : numpy.ndarray
+        The exponential moving average, which has the same shape as :code:`series`.
+    """
+    if span < 1:
+        raise utils.ParameterError(f"The span {span} must be positive.")
+    series = np.asarray(series, dtype=float)
+    alpha = 2 / (span + 1)
+    zi = (1 - alpha) * series[..., :1]  # so that the average starts from the first data point
 
-    Notes
-    -----
-    This function could be useful to analyze xvg files or PLUMED output obtained
-    from a long simulations extended for several times. Whenever we extend a simulation
-    previously terminated due to timeout or any other issues, the simulation does not
-    starts exactly from where it ends previously but the last checkpoint, which should be
-    generated within several to 15 minutes before the simulation stopped. For example,
-    the simulation could stop at 1582 ps and the last checkopint was at 1566 ps. If we
-    extend the simulation, the data between 1562 to 1582 ps will be overlapped and should
-    be discarded. The function `data_deduplicate` is meant for dealing with this situation.
-    For a relevant example, please refer to Example 5 in the tutorial of the command `plot_xy`.
+    return signal.lfilter([alpha], [1, alpha - 1], series, axis=-1, zi=zi)[0]
+
+
+def lowpass_filter(series, N):
     """
-    df_original = pd.DataFrame({"x": x, "y": y})
-    df = df_original[~df_original["x"].duplicated(keep="last")]
-    df = df.dropna()  # drop N/A in case that there is any
-    df = (
-        df.reset_index()
-    )  # reset the index of the data frame, after this an column "index" will be added
-    df = df.drop(columns=["index"])  # drop the index column
-    if len(df) == len(df_original):
-        return x, y  # do nothing
-    else:
-        x = np.array(df[df.columns[0]])
-        y = np.array(df[df.columns[1]])
-        return x, y
+    This function removes the fluctuations of time series with periods shorter than N
+    data points by zeroing the corresponding Fourier coefficients. The time series are
+    mirrored before the transform so that their ends do not ring from the jump of the
+    periodic extension.
 
+    Parameters
+    ----------
+    series : numpy.ndarray
+        The time series to be smoothed, or a 2D array of time series (one per row).
+    N : int
+        The shortest period (in data points) to be preserved.
 
-def scale_data(data, conversion=None, factor=None, T=298.15):
+    Returns
+    -------
+    smoothed : numpy.ndarray
+        The filtered time series, which has the same shape as :code:`series`.
     """
-    This function scales the input data according to the desired unit conversion
-    or scaling factor specified by the user.
+    if N < 1:
+        raise utils.ParameterError(f"The period {N} must be positive.")
+    series = np.asarray(series, dtype=float)
+    n = series.shape[-1]
+    coeffs = np.fft.rfft(np.concatenate([series, series[..., ::-1]], axis=-1), axis=-1)
+    coeffs[..., int(2 * n / N) + 1 :] = 0  # noqa: E203, the k-th frequency has a period of 2n/k
+
+    return np.fft.irfft(coeffs, 2 * n, axis=-1)[..., :n]
+
+
+def savgol_smooth(series, N, polyorder=2):
+    """
+    This function smooths time series with a Savitzky-Golay filter, which fits a
+    polynomial to each window by least squares and preserves the peaks better than a
+    running average of the same window size.
 
     Parameters
     ----------
-    data : numpy.ndarray
-        The input data to be scaled.
-    conversion : str
-        The string describing what units the conversion should be carried out between.
-        Available conversions include "ps to ns", "kT to kJ/mol", "kT to kcal/mol",
-        "kJ/mol to kcal/mol", "degree to radian", and their respective conversion in
-        the opposite direction. Note that the list of available conversions does not
-        mean to be comprehensive since the user could just specify the scaling factor.
-    factor : float
-        The scaling factor for data scaling.
-    T : float
-        The temperature to be considered to convert energy units to kT or vice versa.
+    series : numpy.ndarray
+        The time series to be smoothed, or a 2D array of time series (one per row).
+    N : int
+        The number of data points in a window, which must be odd.
+    polyorder : int
+        The order of the polynomial, which must be smaller than N.
 
     Returns
     -------
-    data : numpy.ndarray
-        The processed data.
+    smoothed : numpy.ndarray
+        The smoothed time series, which has the same shape as :code:`series`.
     """
-    c1 = 1.38064852 * 6.022 * T / 1000  # multiply to convert from kT to kJ/mol
-    c2 = np.pi / 180  # multiply to convert from degree to radian
-    c3 = 0.239005736  # multiply to convert from J to cal (or kJ/mol to kcal/mol)
+    if N % 2 == 0 or N <= polyorder:
+        raise utils.ParameterError(
+            f"The window size {N} must be odd and larger than the polynomial order {polyorder}."
+        )
+    series = np.asarray(series, dtype=float)
+    N = min(N, series.shape[-1] - (series.shape[-1] % 2 == 0))  # windows longer than the data
 
-    conversion_dict = {
-        "ns to ps": 1000,
-        "ps to ns": 1 / 1000,
-        "kT to kJ/mol": c1,
-        "kJ/mol to kT": 1 / c1,
-        "kT to kcal/mol": c1 * c3,
-        "kcal/mol to kT": 1 / (c1 * c3),
-        "kJ/mol to kcal/mol": c3,
-        "kcal/mol to kJ/mol": 1 / c3,
-        "degree to radian": c2,
-        "radian to degree": 1 / c2,
-    }
+    return signal.savgol_filter(series, N, min(polyorder, N - 1), axis=-1)
 
-    if conversion is not None:
-        if conversion in conversion_dict:
-            data *= conversion_dict[conversion]
-        else:
-            raise utils.ParameterError(
-                "The specified conversion is not available. \
-                                 Try using the scaling factor. "
-            )
 
-    if factor is None:
-        factor = 1
+def smooth(series_list, method, N, polyorder=2):
+    """
+    This function smooths multiple time series at once. The time series of the same
+    length (e.g. the columns of one file, or replicas of the same length) are stacked
+    and filtered in one array operation.
 
-    data *= factor
+    Parameters
+    ----------
+    series_list : list
+        A list of time series (1D numpy.ndarray) to be smoothed.
+    method : str
+        The smoothing method. Available options include "ema" (exponential moving average,
+        with a span of N), "lowpass" (FFT low-pass filter, preserving periods of at least N)
+        and "savgol" (Savitzky-Golay filter, with a window size of N).
+    N : int
+        The number of data points characterizing the smoothing (see :code:`method`).
+    polyorder : int
+        The order of the polynomial of the Savitzky-Golay filter.
 
-    return data
+    Returns
+    -------
+    smoothed : list
+        The smoothed time series, in the same order as :code:`series_list`.
+    """
+    methods = {
+        "ema": ema,
+        "lowpass": lowpass_filter,
+        "savgol": functools.partial(savgol_smooth, polyorder=polyorder),
+    }
+    if method not in methods:
+        raise utils.ParameterError(f"Unknown smoothing method: {method}.")
 
+    smoothed = [None] * len(series_list)
+    groups = {}
+    for i, series in enumerate(series_list):
+        groups.setdefault(len(series), []).append(i)
+    for n, indices in groups.items():
+        if n == 0:
+            for i in indices:
+                smoothed[i] = np.empty(0)
+            continue
+        batch = methods[method](np.stack([series_list[i] for i in indices]), N)
+        for i, row in zip(indices, batch):
+            smoothed[i] = row
 
-def slice_data(data, truncate=None, truncate_b=None):
+    return smoothed
+
+
+def window_positions(x, N, center=False):
     """
-    This function slices the data given the truncation fraction or the fraction of data
-    to be retained. The values should be with 0 to 100 (units: percent).
+    Returns the positions of the windows of the running average with window size N
+    (see :code:`running_avgs`), i.e. the end of each window (trailing alignment) or its
+    center (centered alignment).
 
     Parameters
     ----------
-    data : array-like
-        The input data to be sliced.
-    truncate : float
-        The percentage of data to be truncated from the beginning. 20 means 20%.
-    truncate_b : float
-        The percentage of data to be truncated from the end. 20 means 20%.
+    x : numpy.ndarray
+        The data of independent variable (usually time).
+    N : int
+        The number of data points in a window.
+    center : bool
+        Whether to place the averages at the centers of the windows instead of their ends.
 
     Returns
     -------
-    data : array-like
-        The processed data.
+    positions : numpy.ndarray
+        The positions of the windows.
     """
-    if truncate is not None and truncate_b is None:
-        data = data[int(0.01 * float(truncate) * len(data)) :]  # noqa E203
+    if center is False:
+        return x[N - 1 :]  # noqa: E203
 
-    if truncate_b is not None and truncate is None:
-        data = data[: int(0.01 * float(truncate_b) * len(data))]
+    return (x[: max(len(x) - N + 1, 0)] + x[N - 1 :]) / 2  # noqa: E203
 
-    if truncate is not None and truncate_b is not None:
-        data = data[
-            int(0.01 * float(truncate_b) * len(data)) : -int(  # noqa E203
-                0.01 * float(truncate) * len(data)
+
+def stream_2d_data(f_input, col_idx=1, chunk_size=None, block_size=BLOCK_SIZE):
+    """
+    This function is the streaming variant of :code:`read_2d_data`. It reads the input
+    file block by block and yields the data in chunks of a fixed number of data points,
+    so the memory usage does not depend on the length of the time series.
+
+    Parameters
+    ----------
+    f_input : str
+        The filename of the input file.
+    col_idx : int or str
+        The index (starting from 0) or the name of the column to be read as the
+        dependent variable.
+    chunk_size : int
+        The number of data points in each chunk. :code:`CHUNK_SIZE` is used if None.
+    block_size : int
+        The number of bytes to parse at a time.
+
+    Yields
+    ------
+    x_data : numpy.ndarray
+        A chunk of the data of independent variable. Only the last chunk can be shorter
+        than :code:`chunk_size`.
+    y_data : numpy.ndarray
+        The corresponding chunk of the data of dependent variable.
+    """
+    chunk_size = CHUNK_SIZE if chunk_size is None else chunk_size
+    names, n_cols = _read_header(f_input)
+    usecols = (0, _resolve_column(col_idx, names, n_cols))
+    buffer, n_buffer = [], 0
+    with _open_input(f_input) as f:
+        for block in _iter_blocks(f, block_size):
+            values = _parse_block(block, usecols)
+            if values.shape[0] == 0:
+                continue
+            buffer.append(values)
+            n_buffer += values.shape[0]
+            if n_buffer < chunk_size:
+                continue
+            values = np.concatenate(buffer)
+            n_full = len(values) // chunk_size * chunk_size
+            for start in range(0, n_full, chunk_size):
+                chunk = values[start : start + chunk_size]  # noqa: E203
+                yield np.ascontiguousarray(chunk[:, 0]), np.ascontiguousarray(chunk[:, 1])
+            buffer = [values[n_full:]]
+            n_buffer = len(values) - n_full
+
+    if n_buffer > 0:
+        values = np.concatenate(buffer)
+        yield np.ascontiguousarray(values[:, 0]), np.ascontiguousarray(values[:, 1])
+
+
+def stream_deduplicate_data(chunks, lookback=None):
+    """
+    This function is the streaming variant of :code:`deduplicate_data` for time series
+    concatenated from restarted simulations. Whenever the time goes backwards, the
+    frames of the previous part that overlap with the restarted part (i.e. the frames
+    not earlier than the restart time) are discarded, which keeps the last occurrence of
+    each time frame. To be able to discard them, the last :code:`lookback` frames are held
+    back before being yielded. A warning is issued if a restart overlaps with frames that
+    have already been yielded, in which case :code:`lookback` should be increased.
+
+    Parameters
+    ----------
+    chunks : iterable
+        The chunks of (x, y) data, e.g. yielded by :code:`stream_2d_data`.
+    lookback : int
+        The number of frames held back. It should be larger than the number of frames
+        between two checkpoints. :code:`CHUNK_SIZE` is used if None.
+
+    Yields
+    ------
+    x : numpy.ndarray
+        A chunk of the deduplicated data of independent variable.
+    y : numpy.ndarray
+        The corresponding chunk of the deduplicated data of dependent variable.
+    """
+    lookback = CHUNK_SIZE if lookback is None else lookback
+    x_held, y_held = np.empty(0), np.empty(0)
+    x_last = -np.inf  # the last time frame that has been yielded
+    warned = False
+    for x, y in chunks:
+        x = np.concatenate([x_held, x])
+        y = np.concatenate([y_held, y])
+        valid = ~(np.isnan(x) | np.isnan(y))  # drop N/A in case that there is any
+        x, y = x[valid], y[valid]
+        if len(x) == 0:
+            continue
+        later_min = np.append(np.minimum.accumulate(x[::-1])[::-1][1:], np.inf)
+        keep = x < later_min
+        if warned is False and min(x[0], later_min[0]) <= x_last:
+            warnings.warn(
+                f"A restart at {min(x[0], later_min[0])} overlaps with frames that have already been "
+                "yielded. Consider increasing lookback."
             )
-        ]
-    
-    return data
+            warned = True
+        x, y = x[keep], y[keep]
+        n_out = max(len(x) - lookback, 0)
+        if n_out > 0:
+            x_last = x[n_out - 1]
+            yield x[:n_out], y[:n_out]
+        x_held, y_held = x[n_out:], y[n_out:]
+
+    if len(x_held) > 0:
+        yield x_held, y_held
 
 
-def analyze_data(x, y, x_label, y_label, outfile):
+def stream_scale_data(chunks, x_conversion=None, x_factor=None, y_conversion=None, y_factor=None, T=298.15):
     """
-    This function performs simple data analysis and prints out the results.
+    This function is the streaming variant of :code:`scale_data`, which scales the
+    x and/or y data of each chunk. See :code:`scale_data` for the available conversions.
 
     Parameters
     ----------
+    chunks : iterable
+        The chunks of (x, y) data.
+    x_conversion : str
+        The unit conversion for the data of independent variable.
+    x_factor : float
+        The factor to be multiplied to the data of independent variable.
+    y_conversion : str
+        The unit conversion for the data of dependent variable.
+    y_factor : float
+        The factor to be multiplied to the data of dependent variable.
+    T : float
+        The temperature to be considered to convert energy units to kT or vice versa.
+
+    Yields
+    ------
     x : numpy.ndarray
-        The data of variable x.
+        A chunk of the scaled data of independent variable.
     y : numpy.ndarray
-        The data of variable y.
-    x_label : str
-        The label of the x-axis.
-    y_label : str
-        The lable of the y-axis.
+        The corresponding chunk of the scaled data of dependent variable.
     """
-    L = utils.Logging(outfile)
-    x_var, x_unit = plotting_utils.identify_var_units(x_label)
-    y_var, y_unit = plotting_utils.identify_var_units(y_label)
+    for x, y in chunks:
+        if x_conversion is not None or x_factor is not None:
+            x = scale_data(x, x_conversion, x_factor, T)
+        if y_conversion is not None or y_factor is not None:
+            y = scale_data(y, y_conversion, y_factor, T)
+        yield x, y
 
-    if x_unit == " ns" or x_unit == " ps":
-        y_avg = np.mean(y)
-        y2_avg = np.mean(np.power(y, 2))
-        RMSF = np.sqrt((y2_avg - y_avg ** 2)) / y_avg
 
-        y = list(y)
-        L.logger(
-            f"The average of {y_var}: {y_avg:.3f} (RMSF: {RMSF:.3f}, max: {max(y):.3f}, min: {min(y):.3f})"
-        )
-        L.logger(f"The maximum of {y_var} occurs at {x[y.index(max(y))]:.3f}{x_unit}.")
-        L.logger(f"The minimum of {y_var} occurs at {x[y.index(min(y))]:.3f}{x_unit}.")
-        y = np.array(y)
-        diff = np.abs(y - y_avg)
-        t_avg = x[np.argmin(diff)]
-        L.logger(
-            f"The {y_var} ({y[np.argmin(diff)]:.3f}{y_unit}) at {t_avg:.3f}{x_unit} is closet to the average."
-        )
-    else:  # input data is not a time series
-        y = list(y)
-        L.logger(
-            f"Maximum of {y_var}: {max(y):.3f}{y_unit}, which occurs at {x[y.index(max(y))]:.3f}{x_unit}."
-        )
-        L.logger(
-            f"Minimum of {y_var}: {min(y):.3f}{y_unit}, which occurs at {x[y.index(min(y))]:.3f}{x_unit}."
-        )
+def stream_slice_data(chunks, begin=None, end=None):
+    """
+    This function is the streaming variant of :code:`slice_data`. Since the total number
+    of data points is unknown when streaming, the data are sliced by the values of the
+    independent variable (usually time) instead of percentages.
 
-def running_avg(series, N):
+    Parameters
+    ----------
+    chunks : iterable
+        The chunks of (x, y) data.
+    begin : float
+        The data with x smaller than :code:`begin` are discarded.
+    end : float
+        The data with x larger than :code:`end` are discarded.
+
+    Yields
+    ------
+    x : numpy.ndarray
+        A chunk of the sliced data of independent variable.
+    y : numpy.ndarray
+        The corresponding chunk of the sliced data of dependent variable.
     """
-    Calculate the running average of a given time series with a specified window size.
+    for x, y in chunks:
+        mask = np.ones(len(x), dtype=bool)
+        if begin is not None:
+            mask &= x >= begin
+        if end is not None:
+            mask &= x <= end
+        if np.all(mask):
+            yield x, y
+        elif np.any(mask):
+            yield x[mask], y[mask]
+
+
+class RunningStatistics:
+    """
+    Statistics of a time series (the number of data points, the average, the RMSF and the
+    maximum/minimum with their positions) accumulated chunk by chunk, so that they can be
+    computed for time series that do not fit in memory. The sum of squared deviations from
+    the average is accumulated (Welford's algorithm, with the pairwise update of Chan et al.
+    for merging chunks) instead of the sum of squares, which would lose all the precision
+    of the RMSF for data with a large offset such as total energies of -1.2e6 kJ/mol.
+    Statistics of chunks computed independently (e.g. in parallel) can be merged in order.
+    """
+
+    def __init__(self):
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0  # the sum of squared deviations from the average
+        self.max, self.x_max, self.i_max = -np.inf, None, None
+        self.min, self.x_min, self.i_min = np.inf, None, None
+
+    @classmethod
+    def from_data(cls, x, y, jobs=1):
+        """
+        Computes the statistics of the whole data, chunk by chunk. The chunks are processed
+        by :code:`jobs` threads (NumPy releases the GIL in the reductions).
+
+        Parameters
+        ----------
+        x : numpy.ndarray
+            The data of independent variable.
+        y : numpy.ndarray
+            The data of dependent variable.
+        jobs : int
+            The number of threads.
+
+        Returns
+        -------
+        stats : RunningStatistics
+            The statistics of the data.
+        """
+        def chunk_stats(sl):
+            stats = cls()
+            stats.update(x[sl], y[sl])
+            return stats
+
+        stats = cls()
+        for chunk in _map_chunks(chunk_stats, len(y), jobs):
+            stats.merge(chunk)
+
+        return stats
+
+    def update(self, x, y):
+        """
+        Updates the statistics with a chunk of data.
+
+        Parameters
+        ----------
+        x : numpy.ndarray
+            A chunk of the data of independent variable.
+        y : numpy.ndarray
+            The corresponding chunk of the data of dependent variable.
+        """
+        if len(y) == 0:
+            return
+        chunk = RunningStatistics()
+        chunk.n = len(y)
+        chunk.mean = np.mean(y)
+        deviation = y - chunk.mean
+        chunk.m2 = np.dot(deviation, deviation)
+        chunk.i_max, chunk.i_min = int(np.argmax(y)), int(np.argmin(y))
+        chunk.max, chunk.x_max = y[chunk.i_max], x[chunk.i_max]
+        chunk.min, chunk.x_min = y[chunk.i_min], x[chunk.i_min]
+        self.merge(chunk)
+
+    def merge(self, other):
+        """
+        Merges the statistics of the data following the data of this instance.
+
+        Parameters
+        ----------
+        other : RunningStatistics
+            The statistics of the following data.
+
+        Returns
+        -------
+        self : RunningStatistics
+            The merged statistics.
+        """
+        if other.n == 0:
+            return self
+        n = self.n + other.n
+        delta = other.mean - self.mean
+        self.mean += delta * other.n / n
+        self.m2 += other.m2 + delta ** 2 * self.n * other.n / n
+        if other.max > self.max:  # the first occurrence is kept in case of ties
+            self.max, self.x_max, self.i_max = other.max, other.x_max, self.n + other.i_max
+        if other.min < self.min:
+            self.min, self.x_min, self.i_min = other.min, other.x_min, self.n + other.i_min
+        self.n = n
+
+        return self
+
+    @property
+    def var(self):
+        return self.m2 / self.n
+
+    @property
+    def rmsf(self):
+        return np.sqrt(self.var) / self.mean
+
+
+def stream_analyze_data(chunks):
+    """
+    This function is the streaming variant of the statistics reported by :code:`analyze_data`.
+
+    Parameters
+    ----------
+    chunks : iterable
+        The chunks of (x, y) data.
+
+    Returns
+    -------
+    stats : RunningStatistics
+        The statistics accumulated over all the chunks.
+    """
+    stats = RunningStatistics()
+    for x, y in chunks:
+        stats.update(x, y)
+
+    return stats
+
+
+def stream_histogram(chunks, bins=200, range=None, density=False):
+    """
+    This function computes the histogram of the dependent variable chunk by chunk.
+    Since the data can only be iterated once, the range of the histogram must be given.
+
+    Parameters
+    ----------
+    chunks : iterable
+        The chunks of (x, y) data.
+    bins : int
+        The number of bins.
+    range : tuple
+        The lower and upper bounds of the bins.
+    density : bool
+        Whether to normalize the histogram to a probability density.
+
+    Returns
+    -------
+    hist : numpy.ndarray
+        The counts (or the probability density) in each bin.
+    bin_edges : numpy.ndarray
+        The edges of the bins.
+    """
+    if range is None:
+        raise utils.ParameterError("The range of the histogram is required when streaming the data.")
+    bin_edges = np.histogram_bin_edges([], bins=bins, range=range)
+    hist = np.zeros(bins, dtype=np.int64)
+    for x, y in chunks:
+        hist += np.histogram(y, bins=bin_edges)[0]
+
+    if density is True:
+        return hist / np.sum(hist) / np.diff(bin_edges), bin_edges
+
+    return hist, bin_edges
+
+
+class FollowReader:
+    """
+    A reader of a file that is still being written, e.g. the output of a running
+    simulation. The byte offset consumed so far is remembered, so each call of
+    :code:`read` only parses the complete lines appended since the previous call.
+    A partially written final line is kept until its newline arrives. The columns are
+    resolved from the header once the first complete line of data arrives, so the file
+    may be empty or only have the header when the reader is created.
+
+    Parameters
+    ----------
+    f_input : str
+        The filename of the input file, which must not be compressed.
+    columns : list
+        The indices or names of the columns to be read. All columns are read if None.
+
+    Attributes
+    ----------
+    names : dict
+        The names of the columns, with the column indices as the keys. Empty until the
+        first line of data arrives.
+    columns : list
+        The indices of the columns to be read. None until the first line of data arrives
+        (or if all the columns are read).
+    offset : int
+        The number of bytes of the file consumed so far.
+    rewound : bool
+        Whether the file was found truncated (e.g. overwritten by a new simulation) in
+        the last call of :code:`read`, in which case the file was read from the beginning
+        and any accumulated statistics should be reset.
+    """
+
+    def __init__(self, f_input, columns=None):
+        with _open_input(f_input) as f:
+            if not isinstance(f, io.BufferedReader):
+                raise utils.InputFileError(f"Compressed files like {f_input} cannot be followed.")
+        self.f_input = f_input
+        self.keys = columns
+        self.names, self.n_cols = {}, 0
+        self.columns = None
+        self.offset = 0
+        self.rewound = False
+
+    def read(self):
+        """
+        Reads the complete lines appended to the file since the previous call.
+
+        Returns
+        -------
+        data : numpy.ndarray
+            The newly appended data with shape (n_columns, n_new_rows).
+        """
+        self.rewound = os.path.getsize(self.f_input) < self.offset
+        if self.rewound is True:
+            self.offset = 0
+
+        with open(self.f_input, "rb") as f:
+            f.seek(self.offset)
+            block = f.read()
+        block = block[: block.rfind(b"\n") + 1]  # excluding the partially written line
+        if self.n_cols == 0:  # nothing is consumed until the first line of data is complete
+            self.names, self.n_cols = _parse_header(block.splitlines())
+            if self.n_cols == 0:
+                return np.empty((0 if self.keys is None else len(self.keys), 0))
+            if self.keys is not None:
+                self.columns = [_resolve_column(key, self.names, self.n_cols) for key in self.keys]
+        self.offset += len(block)
+        data = _parse_block(block, self.columns)
+        if self.columns is None and data.shape[0] == 0:
+            data = data.reshape(0, self.n_cols)
+
+        return np.ascontiguousarray(data.T)
+
+
+class RunningAverage:
+    """
+    The running average of a time series computed incrementally as new data points arrive,
+    which agrees with :code:`running_avg` over all the data points received so far. Only
+    the last N - 1 data points are kept between updates.
 
     Parameters
     ----------
-    series : numpy.ndarray
-        The time series to be analyzed.
     N : int
         The number of data points in a window.
     """
-    cumsum = np.cumsum(np.insert(series, 0, 0)) 
-    running_avg = (cumsum[N:] - cumsum[:-N]) / float(N)
 
-    return running_avg
+    def __init__(self, N):
+        self.N = N
+        self.tail = np.empty(0)
+
+    def update(self, y):
+        """
+        Updates the running average with new data points.
+
+        Parameters
+        ----------
+        y : numpy.ndarray
+            The new data points.
+
+        Returns
+        -------
+        running_avg : numpy.ndarray
+            The running averages of the windows ending at each of the new data points
+            that complete a window.
+        """
+        series = np.concatenate([self.tail, y])
+        self.tail = series[len(series) - self.N + 1:] if self.N > 1 else series[:0]
+
+        return running_avg(series, self.N)
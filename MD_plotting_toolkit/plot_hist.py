@@ -11,6 +11,7 @@
 The `plot_hist` module plots a histogram given the data of a variable.
 """
 import argparse
+import functools
 import glob
 import itertools
 import os
@@ -23,7 +24,6 @@ import matplotlib.pyplot as plt  # noqa: E402
 import natsort  # noqa: E402
 import numpy as np  # noqa: E402
 import scipy.stats as stats  # noqa: E402
-import seaborn as sns  # noqa: E402
 
 import MD_plotting_toolkit.data_processing as data_processing  # noqa: E402
 import MD_plotting_toolkit.plotting_utils as plotting_utils  # noqa: E402
@@ -65,9 +65,12 @@ def initialize():
     parser.add_argument(
         "-c",
         "--column",
-        type=int,
-        default=1,
-        help="The column index of the variable to be analyzed.",
+        type=data_processing.column_key,
+        nargs="+",
+        default=[1],
+        help="The column index or the name (the legend in xvg files or the field in PLUMED \
+            outputs) of the variable to be analyzed. Multiple columns can be specified, in \
+            which case the input file is only read once and one histogram is plotted for each column.",
     )
     parser.add_argument("-t", "--title", type=str, help="Title of the plot")
     parser.add_argument(
@@ -135,7 +138,9 @@ def initialize():
         "-tr",
         "--truncate",
         help="-tr 1 means truncate the first 1%% of the data from the beginning. \
-                            This typically applies for, but not is restricted to time series data.",
+            This typically applies for, but not is restricted to time series data. \
+            -tr auto means truncate the data before the automatically detected equilibration time, \
+            which maximizes the effective sample size of the remaining data.",
     )
     parser.add_argument(
         "-trb",
@@ -162,7 +167,32 @@ def initialize():
         "--Nr_bound",
         type=float,
         nargs="+",
-        help="The lower and upper bounds of the x axis for N_ratio calculations.",
+        help="The lower and upper bounds of the x axis for N_ratio calculations, which only \
+            consider the bins of the histogram within the bounds.",
+    )
+    parser.add_argument(
+        "-fw",
+        "--flatness_windows",
+        type=float,
+        nargs="+",
+        help="The lower and upper bounds of one or more windows, e.g. -fw 0 10 10 20 for two windows, in which \
+            the flatness metrics (N_ratio, the ratio of the minimum count to the average count and the \
+            Kullback-Leibler divergence from the uniform distribution) are calculated from histograms of -nb \
+            bins spanning each window. All the windows are evaluated at once from the sorted data.",
+    )
+    parser.add_argument(
+        "-b",
+        "--begin",
+        type=float,
+        help="The first time frame (in the units of the first column of the input files) \
+            to be analyzed. This requires the time series to be sorted after deduplication.",
+    )
+    parser.add_argument(
+        "-e",
+        "--end",
+        type=float,
+        help="The last time frame (in the units of the first column of the input files) \
+            to be analyzed.",
     )
     parser.add_argument(
         "-lc",
@@ -171,6 +201,104 @@ def initialize():
         default=1,
         help="The number of columns of the legends.",
     )
+    parser.add_argument(
+        "--segments",
+        default=False,
+        action="store_true",
+        help="Whether the input files are the segments of one simulation run in parts (e.g. \
+            ener.part0001.xvg, ener.part0002.xvg, ... from GROMACS with -noappend), which are \
+            joined in natural order into one time series with the overlaps removed.",
+    )
+    parser.add_argument(
+        "--dedup_atol",
+        type=float,
+        default=0,
+        help="The absolute tolerance for two time frames to be considered duplicates when \
+            deduplicating time series from restarted simulations. Default: 0.",
+    )
+    parser.add_argument(
+        "--dedup_rtol",
+        type=float,
+        default=0,
+        help="The relative tolerance for two time frames to be considered duplicates when \
+            deduplicating time series from restarted simulations. Default: 0.",
+    )
+    parser.add_argument(
+        "--tmin",
+        type=float,
+        help="The lower bound of the time window (in the units of the first column of the \
+            input files) to be read. Only the part of each file within the window is parsed \
+            using the time index of the file, which is built on the first use.",
+    )
+    parser.add_argument(
+        "--tmax",
+        type=float,
+        help="The upper bound of the time window (in the units of the first column of the \
+            input files) to be read.",
+    )
+    parser.add_argument(
+        "--stride",
+        type=int,
+        default=1,
+        help="Only every N-th frame of each input file is read (and the other frames are \
+            never parsed). Default: 1.",
+    )
+    parser.add_argument(
+        "--max_points",
+        type=int,
+        help="The maximum number of frames to be read from each input file. If a file has \
+            more frames, the stride is increased accordingly.",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="The number of processes used to read and preprocess the input files in parallel, and to draw \
+            the bootstrap resamples. Default: 1.",
+    )
+    parser.add_argument(
+        "-bs",
+        "--bootstrap",
+        type=int,
+        help="The number of bootstrap resamples used to estimate the confidence intervals of the bin heights \
+            (shown as bands), the average and the free energy difference between the most and least populated \
+            bins. No bootstrapping is performed if not specified.",
+    )
+    parser.add_argument(
+        "--block_size",
+        type=int,
+        default=1,
+        help="The number of data points in a block for the block bootstrap of correlated time series, which \
+            should be much longer than the statistical inefficiency. Default: 1, i.e. individual resampling.",
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        help="The seed of the bootstrap resampling, for reproducible confidence intervals.",
+    )
+    parser.add_argument(
+        "--confidence",
+        type=float,
+        default=0.95,
+        help="The confidence level of the bootstrap confidence intervals. Default: 0.95.",
+    )
+    parser.add_argument(
+        "--cache",
+        default=False,
+        action="store_true",
+        help="Whether to use the on-disk cache of the parsed input files, which are then loaded \
+            in milliseconds by later runs as long as the files do not change. All the columns of \
+            each input file are parsed and saved under ~/.cache/MD_plotting_toolkit (or the directory \
+            given by the environment variable MD_PLOTTING_TOOLKIT_CACHE), taking up to 2 GB in total \
+            before the least recently used files are evicted.",
+    )
+    parser.add_argument(
+        "--clear_cache",
+        default=False,
+        action="store_true",
+        help="Whether to clear the on-disk cache of the parsed input files before reading them.",
+    )
     parser.add_argument(
         "-d",
         "--dir",
@@ -187,6 +315,133 @@ def initialize():
     return args_parse
 
 
+def hist_stat(counts, bin_edges, stat):
+    """
+    Converts the counts of a histogram to the statistic to be plotted.
+
+    Parameters
+    ----------
+    counts : numpy.ndarray
+        The counts of the bins.
+    bin_edges : numpy.ndarray
+        The edges of the bins.
+    stat : str
+        The statistic, i.e. "count", "frequency" (count / bin width), "probability" or
+        "density". The counts along the last axis are normalized for "probability" and
+        "density".
+
+    Returns
+    -------
+    hist_data : numpy.ndarray
+        The statistic of each bin.
+    """
+    if stat == "count":
+        return counts
+    hist_data = counts / np.diff(bin_edges) if stat in ["frequency", "density"] else counts.astype(float)
+    if stat in ["probability", "density"]:
+        hist_data /= np.sum(counts, axis=-1, keepdims=True)
+
+    return hist_data
+
+
+def bootstrap_ci(y, counts, args, L):
+    """
+    Estimates the bootstrap confidence intervals of the bin heights of a histogram (drawn
+    as a band), the average of the data and the free energy difference between the most
+    and least populated bins.
+
+    Parameters
+    ----------
+    y : numpy.ndarray
+        The data of the histogram.
+    counts : numpy.ndarray
+        The counts of the bins of the histogram.
+    args : argparse.Namespace
+        The command-line arguments.
+    L : utils.Logging
+        The logger.
+    """
+    x_var, x_unit = plotting_utils.identify_var_units(args.xlabel)
+    level = f"{args.confidence * 100:g}%"
+    kwargs = {"n_resamples": args.bootstrap, "block_size": args.block_size, "seed": args.seed, "jobs": args.jobs}
+    samples, bin_edges = data_processing.bootstrap_histogram(y, args.nbins, args.range, **kwargs)
+    lower, upper = data_processing.confidence_interval(hist_stat(samples, bin_edges, args.stats), args.confidence)
+    plt.fill_between(bin_edges, np.append(lower, lower[-1]), np.append(upper, upper[-1]), step="post", alpha=0.3)
+
+    lower, upper = data_processing.confidence_interval(data_processing.bootstrap_mean(y, **kwargs), args.confidence)
+    L.logger(
+        f"The average of {x_var}: {np.mean(y):.6f}{x_unit} ({level} confidence interval: {lower:.6f} to "
+        f"{upper:.6f}{x_unit})"
+    )
+
+    # The confidence interval of the ratio of the counts, which stays finite with empty bins
+    lower, upper = data_processing.confidence_interval(
+        np.min(samples, axis=1) / np.max(samples, axis=1), args.confidence
+    )
+    with np.errstate(divide="ignore"):  # infinite if a bin is empty
+        dF, lower, upper = -np.log(np.min(counts) / np.max(counts)), -np.log(upper), -np.log(lower)
+    L.logger(
+        f"The free energy difference between the most and least populated bins: {dF:.3f} kT ({level} confidence "
+        f"interval: {lower:.3f} to {upper:.3f} kT)"
+    )
+
+
+def process_file(f_input, args):
+    """
+    Reads and preprocesses an input file. This function runs in a worker process if
+    multiple jobs are requested, so only the reduced data are returned and the messages
+    are buffered to be logged in order by the main process.
+
+    Parameters
+    ----------
+    f_input : str or list
+        The filename of the input file, or the filenames of the segments of a run.
+    args : argparse.Namespace
+        The command-line arguments.
+
+    Returns
+    -------
+    result : dict
+        The data and the names of the columns of interest and the buffered log messages.
+    """
+    L = utils.BufferedLogging()
+    if isinstance(f_input, list):  # the segments of a run
+        table = data_processing.read_segments(
+            f_input,
+            args.column,
+            jobs=args.jobs,
+            atol=args.dedup_atol,
+            rtol=args.dedup_rtol,
+            stride=args.stride,
+            tmin=args.tmin,
+            tmax=args.tmax,
+            cache=args.cache,
+            max_points=args.max_points,
+        )
+    else:
+        table = data_processing.read_table(
+            f_input,
+            [0] + args.column,
+            cache=args.cache,
+            tmin=args.tmin,
+            tmax=args.tmax,
+            stride=args.stride,
+            max_points=args.max_points,
+        )
+    # Deduplication, unit conversion and slicing in one pass
+    pipeline = data_processing.Pipeline(table[0], [table[col] for col in args.column])
+    if "Time" in args.xlabel or "time" in args.xlabel:  # time series
+        pipeline.deduplicate(args.dedup_atol, args.dedup_rtol, L)
+    pipeline.scale("y", args.conversion, args.factor, args.temp)
+    pipeline.slice_time(args.begin, args.end)
+    pipeline.slice(args.truncate, args.truncate_b, L)
+    y_list = pipeline.run()[1]
+
+    result = {"y": y_list, "names": [table.name(col) for col in args.column], "log": L}
+
+    return result
+
+
 def main():
     args = initialize()
 
@@ -216,135 +471,141 @@ def main():
     elif args.stats == "probability":
         args.ylabel = "Probability"
 
+    if args.flatness_windows is not None and len(args.flatness_windows) % 2 != 0:
+        raise utils.ParameterError("The bounds of the windows for the flatness metrics must be given in pairs.")
+
     L = utils.Logging(args.dir + args.output)
 
+    if args.clear_cache is True:
+        data_processing.clear_cache()
+
     # Step 2. Read and preprocess (e.g. deduplicatoin, unit conversion) the input data
-    if len(args.input) > 1:
+    n_hist = len(args.input) * len(args.column)
+    if n_hist > 1:
         alpha = 0.7  # more transparent if multiple hisotgrams are plotted
     else:
         alpha = 1
-    x_all, y_all = [], []
+    process = functools.partial(process_file, args=args)
+    if args.segments is True:  # the segments are parsed in parallel instead
+        args.input = [natsort.natsorted(args.input)]
+    processed = utils.parallel_map(process, args.input, 1 if args.segments else args.jobs)
+    files = [f if isinstance(f, str) else f"{f[0]} - {f[-1]} ({len(f)} segments)" for f in args.input]
+
+    y_all, names_all = [], []
     for i in range(len(args.input)):
-        result_str = f"\nData analysis of the file: {args.input[i]}"
+        result_str = f"\nData analysis of the file: {files[i]}"
         L.logger(result_str)
         L.logger("=" * (len(result_str) - 1))  # len(result_str) includes \n
         L.logger(f"- Working directory: {os.getcwd()}")
         L.logger(f'- Command line: {" ".join(sys.argv)}')
-        x, y = data_processing.read_2d_data(args.input[i], args.column)
-
-        if "Time" in args.xlabel or "time" in args.xlabel:  # time series
-            x, y = data_processing.deduplicate_data(x, y)
-
-        if args.conversion is not None or args.factor is not None:
-            y = data_processing.scale_data(y, args.conversion, args.factor, args.temp)
-
-        # Data slicing if needed
-        x = data_processing.slice_data(x, args.truncate, args.truncate_b)
-        y = data_processing.slice_data(y, args.truncate, args.truncate_b)
-
-        x_all.append(x)
-        y_all.append(y)
-
-        # Out of bound warning
-        if args.range is not None:
-            args.range = tuple(args.range)
-            adjusted = False
-            if len(args.input) == 1:
-                while np.min(y) < args.range[0]:
-                    adjusted = True
-                    args.range[0] *= 0.95
-                while np.max(y) > args.range[1]:
-                    adjusted = True
-                    args.range[1] *= 1.05
-                if adjusted is True:
-                    L.logger(
-                        "Note: The bounds for the histogram are adjusted to include all the data."
+        processed[i]["log"].replay(L)
+        for j in range(len(args.column)):
+            y = processed[i]["y"][j]
+            if len(args.column) > 1:
+                L.logger(f"\n- Column: {processed[i]['names'][j]}")
+
+            y_all.append(y)
+            if len(args.column) > 1:
+                names_all.append(f"{files[i]} ({processed[i]['names'][j]})")
+            else:
+                names_all.append(files[i])
+
+            # Out of bound warning
+            if args.range is not None:
+                args.range = tuple(args.range)
+                adjusted = False
+                if n_hist == 1:
+                    while np.min(y) < args.range[0]:
+                        adjusted = True
+                        args.range[0] *= 0.95
+                    while np.max(y) > args.range[1]:
+                        adjusted = True
+                        args.range[1] *= 1.05
+                    if adjusted is True:
+                        L.logger(
+                            "Note: The bounds for the histogram are adjusted to include all the data."
+                        )
+                        L.logger(
+                            f"The new bounds are ({args.range[0]:.3f}, {args.range[1]:.3f})"
+                        )
+                else:
+                    if np.min(y) < args.range[0] or np.max(y) > args.range[1]:
+                        raise utils.ParameterError(
+                            f"The data (min: {np.min(y)}, max: {np.max(y)}) is out of the specified bounds {args.range} for this histogram. \
+                            Please consider not specifying the bounds or specifying wider bounds."
+                        )
+
+            # Bin the data once: the counts are used for N_ratio, the statistics and the plot
+            x_var, x_unit = plotting_utils.identify_var_units(args.xlabel)
+            counts, bin_edges = np.histogram(y, bins=args.nbins, range=args.range)
+            hist_data = hist_stat(counts, bin_edges, args.stats)
+
+            # Calculate the N_ratio
+            if args.Nr_bound is not None:  # N_ratio = x(max) / x(min) of the bins within the bounds
+                lower_b, upper_b = args.Nr_bound[0], args.Nr_bound[1]
+                within = (bin_edges[:-1] >= lower_b) & (bin_edges[1:] <= upper_b)
+                if not np.any(within):
+                    raise utils.ParameterError(
+                        f"No bin of the histogram is within the bounds ({lower_b}, {upper_b}) for N_ratio."
                     )
+                N_ratio = data_processing.flatness(counts[within])["N_ratio"]
+            else:
+                N_ratio = data_processing.flatness(counts)["N_ratio"]
+            L.logger(f"Assessment of the hsitogram flatness: N_ratio = {N_ratio:.3f}")
+
+            # Flatness metrics of multiple windows as needed
+            if args.flatness_windows is not None:
+                windows = np.reshape(args.flatness_windows, (-1, 2))
+                metrics = data_processing.flatness_windows(y, windows, args.nbins)[1]
+                for k, (lower_b, upper_b) in enumerate(windows):
                     L.logger(
-                        f"The new bounds are ({args.range[0]:.3f}, {args.range[1]:.3f})"
+                        f"Flatness of the histogram between {lower_b:g} and {upper_b:g}{x_unit}: "
+                        f"N_ratio = {metrics['N_ratio'][k]:.3f}, min/mean = {metrics['min_mean'][k]:.3f}, "
+                        f"KL divergence from uniform = {metrics['KL'][k]:.4f}"
                     )
+
+            # Plot the histogram
+            if args.legend != [None]:
+                label = args.legend[i * len(args.column) + j]
+            elif len(args.column) > 1:
+                label = processed[i]["names"][j]
             else:
-                if np.min(y) < args.range[0] or np.max(y) > args.range[1]:
-                    raise utils.ParameterError(
-                        f"The data (min: {np.min(y)}, max: {np.max(y)}) is out of the specified bounds {args.range} for this histogram. \
-                        Please consider not specifying the bounds or specifying wider bounds."
-                    )
+                label = None
+            plt.stairs(hist_data, bin_edges, fill=True, alpha=alpha, label=label)
+            plt.stairs(hist_data, bin_edges, color="black", linewidth=0.5)  # the outline
+            if args.kde is True:
+                # The KDE scaled to the statistic of the histogram, as in seaborn
+                kde_x = np.linspace(bin_edges[0], bin_edges[-1], 200)
+                kde_y = stats.gaussian_kde(y)(kde_x) * np.sum(hist_data * np.diff(bin_edges))
+                plt.plot(kde_x, kde_y, color="yellow")
 
-        # Calculate the N_ratio
-        if args.Nr_bound is not None:  # N_ratio = x(max) / x(min)
-            lower_b, upper_b = args.Nr_bound[0], args.Nr_bound[1]
-            truncated_y = np.array(
-                list(set(y[y < upper_b]).intersection(y[y > lower_b]))
-            )
-            results = np.histogram(
-                truncated_y, bins=args.nbins, density=(args.stats == "density"), range=args.range
-            )
-            N_ratio = np.max(results[0]) / np.min(results[0])
-        else:
-            results = np.histogram(
-                y, bins=args.nbins, density=(args.stats == "density"), range=args.range
-            )
-            print(len(y))
-            print(results[0])
-            print(args.nbins)
-            N_ratio = np.max(results[0]) / np.min(results[0])
-        L.logger(f"Assessment of the hsitogram flatness: N_ratio = {N_ratio:.3f}")
-
-        # Plot the histogram
-        ax = sns.histplot(
-            y,
-            bins=args.nbins,
-            binrange=args.range,
-            label=f"{args.legend[i]}",
-            stat=args.stats,
-            kde=args.kde,
-            line_kws=dict(color='yellow'),
-            alpha=alpha,
-        )
- 
-        if len(args.input) > 1:
-            plt.legend(ncol=args.legend_col)
-
-        # Get the data of count/frequency/probability/density 
-        hist_data, bin_edges = np.histogram(y, bins=args.nbins, density=(args.stats=="density"))
-        #hist_data /= 5
-        if args.stats == 'count':
-            pass
-        elif args.stats == 'density':
-            pass
-        elif args.stats == 'frequency':
-            bin_width = bin_edges[1] - bin_edges[0]
-            hist_data /= bin_width
-        elif args.stats == 'probability':
-            hist_data /= np.sum(hist_data)
-        
-        if max(abs(y)) >= 10000 or max(abs(y)) <= 0.001:
-            # variable y! (which is the x-axis in the plot)
-            plt.ticklabel_format(style="sci", axis="x", scilimits=(0, 0), useOffset=0.2)
-            
-            """
-            plt.ticklabel_format(style="sci", axis="x", scilimits=(0, 0))
-            t = ax.yaxis.get_offset_text()
+            if n_hist > 1:
+                plt.legend(ncol=args.legend_col)
+
+            if max(abs(y)) >= 10000 or max(abs(y)) <= 0.001:
+                # variable y! (which is the x-axis in the plot)
+                plt.ticklabel_format(style="sci", axis="x", scilimits=(0, 0), useOffset=0.2)
+
+            if max(abs(hist_data)) >= 10000 or max(abs(hist_data)) <= 0.001:
+                plt.ticklabel_format(style="sci", axis="y", scilimits=(0, 0))
+            t = plt.gca().yaxis.get_offset_text()
             t.set_x(-0.06)
-            """
-
-        if max(abs(hist_data)) >= 10000 or max(abs(hist_data)) <= 0.001:
-            plt.ticklabel_format(style="sci", axis="y", scilimits=(0, 0))
-        t = ax.yaxis.get_offset_text()
-        t.set_x(-0.06)
-
-        # Some simple statistics
-        x_var, x_unit = plotting_utils.identify_var_units(args.xlabel)
-        max_n = np.max(hist_data)
-        max_n_idx = list(hist_data).index(max_n)
-        b1 = bin_edges[max_n_idx]  # left bound
-        b2 = bin_edges[max_n_idx + 1]  # right bound
-        L.logger(f"The maximum of {x_var} is {np.max(y):.6f}{x_unit}.")
-        L.logger(f"The minimum of {x_var} is {np.min(y):.6f}{x_unit}.")
-        L.logger(f"The total number of counts is {len(y)}.")
-        L.logger(
-            f"{x_var[0].upper() + x_var[1:]} between {b1:.6f} and {b2:.6f}{x_unit} has the highest {args.stats}, which is {max_n}."
-        )
+
+            # Some simple statistics
+            max_n_idx = int(np.argmax(hist_data))
+            max_n = hist_data[max_n_idx]
+            b1 = bin_edges[max_n_idx]  # left bound
+            b2 = bin_edges[max_n_idx + 1]  # right bound
+            L.logger(f"The maximum of {x_var} is {np.max(y):.6f}{x_unit}.")
+            L.logger(f"The minimum of {x_var} is {np.min(y):.6f}{x_unit}.")
+            L.logger(f"The total number of counts is {len(y)}.")
+            L.logger(
+                f"{x_var[0].upper() + x_var[1:]} between {b1:.6f} and {b2:.6f}{x_unit} has the highest {args.stats}, which is {max_n}."
+            )
+
+            # Bootstrap confidence intervals as needed
+            if args.bootstrap is not None:
+                bootstrap_ci(y, counts, args, L)
 
     if args.title is not None:
         plt.title(f"{args.title}", weight="bold")
@@ -356,7 +617,7 @@ def main():
     plt.show()
 
     if args.ks_test is True:
-        n_distribution = len(args.input)
+        n_distribution = len(y_all)
         if n_distribution == 1:
             raise utils.ParameterError(
                 "At least two input files are required to perform a K-S test."
@@ -365,7 +626,7 @@ def main():
             pairs = list(itertools.combinations(range(n_distribution), 2))
             for i in pairs:
                 L.logger("\n=== Kolmogorov-Smirnov test ===")
-                L.logger(f"- Files of interest: {args.input[i[0]]}, {args.input[i[1]]}")
+                L.logger(f"- Files of interest: {names_all[i[0]]}, {names_all[i[1]]}")
                 L.logger(
                     f"- Null hypothesis: The distributions obtained from the two files are consistent with each other."
                 )
@@ -11,6 +11,7 @@
 The `plot_xy` module plots variable y against x given a set of 2d data.
 """
 import argparse
+import functools
 import glob
 import os
 import sys
@@ -18,11 +19,18 @@ import sys
 sys.path.append("../")
 import matplotlib.pyplot as plt  # noqa: E402
 import natsort  # noqa: E402
+import numpy as np  # noqa: E402
 
 import MD_plotting_toolkit.data_processing as data_processing  # noqa: E402
 import MD_plotting_toolkit.plotting_utils as plotting_utils  # noqa: E402
 import MD_plotting_toolkit.utils as utils  # noqa: E402
 
+SMOOTH_NAMES = {
+    "ema": "exponential moving average",
+    "lowpass": "low-pass filter",
+    "savgol": "Savitzky-Golay filter",
+}
+
 
 def initialize():
 
@@ -55,9 +63,12 @@ def initialize():
     parser.add_argument(
         "-c",
         "--column",
-        type=int,
-        default=1,
-        help="The column index (starting from 0) of the dependent variable. Default: 1.",
+        type=data_processing.column_key,
+        nargs="+",
+        default=[1],
+        help="The column index (starting from 0) or the name (the legend in xvg files or \
+            the field in PLUMED outputs) of the dependent variable. Multiple columns can be \
+            specified, in which case the input file is only read once. Default: 1.",
     )
     parser.add_argument(
         "-t", "--title", type=str, help="Title of the plot. Default: No title."
@@ -124,7 +135,9 @@ def initialize():
         "-tr",
         "--truncate",
         help="-tr 1 means truncate the first 1%% of the data from the beginning.\
-            This typically applies for, but not is restricted to time series data.",
+            This typically applies for, but not is restricted to time series data. \
+            -tr auto means truncate the data before the automatically detected equilibration time, \
+            which maximizes the effective sample size of the remaining data.",
     )
     parser.add_argument(
         "-trb",
@@ -132,6 +145,20 @@ def initialize():
         help="-r 1 means only analyze the first 1%% of the data from the end. \
             This typically applies for, but not is restricted to time series data.",
     )
+    parser.add_argument(
+        "-b",
+        "--begin",
+        type=float,
+        help="The first time frame (in the units of the x-axis after the unit conversion) \
+            to be analyzed. This requires the time series to be sorted after deduplication.",
+    )
+    parser.add_argument(
+        "-e",
+        "--end",
+        type=float,
+        help="The last time frame (in the units of the x-axis after the unit conversion) \
+            to be analyzed.",
+    )
     parser.add_argument(
         "-lc",
         "--legend_col",
@@ -139,6 +166,94 @@ def initialize():
         default=1,
         help="The number of columns of the legends.",
     )
+    parser.add_argument(
+        "--segments",
+        default=False,
+        action="store_true",
+        help="Whether the input files are the segments of one simulation run in parts (e.g. \
+            ener.part0001.xvg, ener.part0002.xvg, ... from GROMACS with -noappend), which are \
+            joined in natural order into one time series with the overlaps removed.",
+    )
+    parser.add_argument(
+        "--dedup_atol",
+        type=float,
+        default=0,
+        help="The absolute tolerance for two time frames to be considered duplicates when \
+            deduplicating time series from restarted simulations. Default: 0.",
+    )
+    parser.add_argument(
+        "--dedup_rtol",
+        type=float,
+        default=0,
+        help="The relative tolerance for two time frames to be considered duplicates when \
+            deduplicating time series from restarted simulations. Default: 0.",
+    )
+    parser.add_argument(
+        "--tmin",
+        type=float,
+        help="The lower bound of the time window (in the units of the first column of the \
+            input files) to be read. Only the part of each file within the window is parsed \
+            using the time index of the file, which is built on the first use.",
+    )
+    parser.add_argument(
+        "--tmax",
+        type=float,
+        help="The upper bound of the time window (in the units of the first column of the \
+            input files) to be read.",
+    )
+    parser.add_argument(
+        "--stride",
+        type=int,
+        default=1,
+        help="Only every N-th frame of each input file is read (and the other frames are \
+            never parsed). Default: 1.",
+    )
+    parser.add_argument(
+        "--max_points",
+        type=int,
+        help="The maximum number of frames to be read from each input file. If a file has \
+            more frames, the stride is increased accordingly.",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="The number of processes used to read and analyze the input files in parallel. Default: 1.",
+    )
+    parser.add_argument(
+        "--cache",
+        default=False,
+        action="store_true",
+        help="Whether to use the on-disk cache of the parsed input files, which are then loaded \
+            in milliseconds by later runs as long as the files do not change. All the columns of \
+            each input file are parsed and saved under ~/.cache/MD_plotting_toolkit (or the directory \
+            given by the environment variable MD_PLOTTING_TOOLKIT_CACHE), taking up to 2 GB in total \
+            before the least recently used files are evicted.",
+    )
+    parser.add_argument(
+        "--clear_cache",
+        default=False,
+        action="store_true",
+        help="Whether to clear the on-disk cache of the parsed input files before reading them.",
+    )
+    parser.add_argument(
+        "--follow",
+        default=False,
+        action="store_true",
+        help="Whether to follow the input files that are still being written (e.g. by a \
+            running simulation). Only the newly appended lines are parsed at each update and \
+            the statistics and the running average are updated incrementally (and recomputed \
+            after deduplication whenever a restart is found). Truncation, time slicing, decimation, \
+            smoothing, rolling statistics, autocorrelation and block averaging are not available \
+            in this mode. Press Ctrl+C to stop.",
+    )
+    parser.add_argument(
+        "--interval",
+        type=float,
+        default=60,
+        help="The interval (in seconds) between updates of the figure in the follow mode. Default: 60.",
+    )
     parser.add_argument(
         "-d",
         "--dir",
@@ -154,7 +269,64 @@ def initialize():
         "-w",
         "--window",
         type=int,
-        help="The number of data points in a window. Only when specified, the running average will be plotted.",
+        nargs="+",
+        help="The number of data points in a window. Only when specified, the running average will be plotted. \
+            Multiple window sizes can be specified, e.g. -w 10 100 1000, in which case all the running \
+            averages are computed from one cumulative sum.",
+    )
+    parser.add_argument(
+        "--center",
+        default=False,
+        action="store_true",
+        help="Whether to place the running averages at the centers of the windows instead of their ends.",
+    )
+    parser.add_argument(
+        "--rolling",
+        nargs="+",
+        choices=["std", "minmax", "median"],
+        help="The rolling statistics to be plotted along with the running average of each window size \
+            specified by -w. Available options include \"std\" (a band of one standard deviation around \
+            the running average), \"minmax\" (a band between the rolling minimum and maximum) and \"median\" \
+            (the rolling median).",
+    )
+    parser.add_argument(
+        "-s",
+        "--smooth",
+        choices=["ema", "lowpass", "savgol"],
+        help="The method to smooth the data, which is plotted along with the raw data. Available options \
+            include \"ema\" (exponential moving average), \"lowpass\" (FFT low-pass filter) and \"savgol\" \
+            (Savitzky-Golay filter). All the columns of all the input files are smoothed at once.",
+    )
+    parser.add_argument(
+        "-sw",
+        "--smooth_window",
+        type=int,
+        default=101,
+        help="The number of data points characterizing the smoothing, i.e. the span of the exponential moving \
+            average, the shortest period preserved by the low-pass filter, or the (odd) window size of the \
+            Savitzky-Golay filter. Default: 101.",
+    )
+    parser.add_argument(
+        "-po",
+        "--polyorder",
+        type=int,
+        default=2,
+        help="The order of the polynomial of the Savitzky-Golay filter. Default: 2.",
+    )
+    parser.add_argument(
+        "--acf",
+        default=False,
+        action="store_true",
+        help="Whether to plot the autocorrelation functions of the time series in a separate figure, \
+            whose file name ends with \"_acf.png\".",
+    )
+    parser.add_argument(
+        "--blocking",
+        default=False,
+        action="store_true",
+        help="Whether to estimate the standard error of the average of each time series by block averaging \
+            and plot the estimates against the block size in a separate figure, whose file name ends with \
+            \"_blocking.png\".",
     )
     parser.add_argument(
         "-m",
@@ -167,6 +339,214 @@ def initialize():
     return parser
 
 
+def process_file(f_input, args):
+    """
+    Reads, preprocesses and analyzes an input file. This function runs in a worker
+    process if multiple jobs are requested, so only the reduced data are returned and
+    the messages are buffered to be logged in order by the main process.
+
+    Parameters
+    ----------
+    f_input : str or list
+        The filename of the input file, or the filenames of the segments of a run.
+    args : argparse.Namespace
+        The command-line arguments.
+
+    Returns
+    -------
+    result : dict
+        The x data, the y data and the names of the columns, the running averages and
+        the buffered log messages.
+    """
+    L = utils.BufferedLogging()
+    if isinstance(f_input, list):  # the segments of a run
+        table = data_processing.read_segments(
+            f_input,
+            args.column,
+            jobs=args.jobs,
+            atol=args.dedup_atol,
+            rtol=args.dedup_rtol,
+            stride=args.stride,
+            tmin=args.tmin,
+            tmax=args.tmax,
+            cache=args.cache,
+            max_points=args.max_points,
+        )
+    else:
+        table = data_processing.read_table(
+            f_input,
+            [0] + args.column,
+            cache=args.cache,
+            tmin=args.tmin,
+            tmax=args.tmax,
+            stride=args.stride,
+            max_points=args.max_points,
+        )
+    # Deduplication, unit conversion and slicing in one pass
+    pipeline = data_processing.Pipeline(table[0], [table[col] for col in args.column])
+    if "Time" in args.xlabel or "time" in args.xlabel:  # time series
+        pipeline.deduplicate(args.dedup_atol, args.dedup_rtol, L)
+    pipeline.scale("x", args.x_conversion, args.factor_x, args.temp)
+    pipeline.scale("y", args.y_conversion, args.factor_y, args.temp)
+    pipeline.slice_time(args.begin, args.end)
+    pipeline.slice(args.truncate, args.truncate_b, L)
+    x, y_list = pipeline.run()
+
+    result = {"x": x, "y": [], "names": [], "analysis": [], "running_avg": [], "rolling": [], "log": L}
+    for j in range(len(y_list)):
+        y = y_list[j]
+
+        # simple data analysis of y
+        if len(args.column) > 1:
+            L.logger(f"- Column: {table.name(args.column[j])}")
+        jobs = args.jobs if len(args.input) == 1 else 1  # otherwise the files are processed in parallel
+        result["analysis"].append(
+            data_processing.analyze_data(x, y, args.xlabel, args.ylabel, L, jobs, args.blocking)
+        )
+        result["y"].append(y)
+        result["names"].append(table.name(args.column[j]))
+
+        # Calculate the running average as needed
+        if args.window is not None:
+            L.logger("Calculating and plotting the running average ...")
+            L.logger(f"Window size: {', '.join(str(N) for N in args.window)} data points")
+            result["running_avg"].append(data_processing.running_avgs(y, args.window))
+
+            # Calculate the rolling statistics as needed
+            rolling = [{} for N in args.window]
+            for stat in args.rolling or []:
+                L.logger(f"Calculating and plotting the rolling {stat} ...")
+                for k, N in enumerate(args.window):
+                    if stat == "std":
+                        rolling[k]["std"] = data_processing.rolling_std(y, N)
+                    elif stat == "minmax":
+                        rolling[k]["min"] = data_processing.rolling_min(y, N)
+                        rolling[k]["max"] = data_processing.rolling_max(y, N)
+                    elif stat == "median":
+                        rolling[k]["median"] = data_processing.rolling_median(y, N)
+            result["rolling"].append(rolling)
+
+    return result
+
+
+def series_label(args, processed, i, j):
+    """
+    Returns the legend label of the j-th column of the i-th input, or None if no legend
+    is needed.
+    """
+    if args.legend is not None:
+        return args.legend[i * len(args.column) + j]
+    if len(args.column) > 1:
+        return processed[i]["names"][j]
+
+    return None
+
+
+def follow(args, L):
+    """
+    Follows the input files that are still being written, re-rendering the figure and
+    logging the statistics of the data at a fixed interval until interrupted.
+
+    Parameters
+    ----------
+    args : argparse.Namespace
+        The command-line arguments.
+    L : utils.Logging
+        The logger used to print and save the statistics.
+    """
+    readers = [data_processing.FollowReader(f, [0] + args.column) for f in args.input]
+    n_col = len(args.column)
+    y_var = plotting_utils.identify_var_units(args.ylabel)[0]
+    x_unit = plotting_utils.identify_var_units(args.xlabel)[1]
+    time_series = "Time" in args.xlabel or "time" in args.xlabel
+    state = [None] * len(readers)
+    windows = [] if args.window is None else args.window
+
+    def new_state():
+        return {
+            "t": [],  # the time frames before the unit conversion, used for deduplication
+            "x": [],
+            "y": [[] for j in range(n_col)],
+            "stats": [data_processing.RunningStatistics() for j in range(n_col)],
+            "running_avg": [[[] for N in windows] for j in range(n_col)],
+            "averager": [[data_processing.RunningAverage(N) for N in windows] for j in range(n_col)],
+        }
+
+    try:
+        while True:
+            for i, reader in enumerate(readers):
+                data = reader.read()
+                if state[i] is None or reader.rewound is True:
+                    state[i] = new_state()
+                if args.tmin is not None:
+                    data = data[:, data[0] >= args.tmin]
+                if args.tmax is not None:
+                    data = data[:, data[0] <= args.tmax]
+                if data.shape[1] == 0:
+                    continue
+
+                t, x, ys = data[0], data[0], list(data[1:])
+                if args.x_conversion is not None or args.factor_x is not None:
+                    x = data_processing.scale_data(x, args.x_conversion, args.factor_x, args.temp)
+                if args.y_conversion is not None or args.factor_y is not None:
+                    ys = [data_processing.scale_data(y, args.y_conversion, args.factor_y, args.temp) for y in ys]
+
+                # A restart (within the new frames or at their start) is deduplicated over all
+                # the frames so far, from which the statistics are then recomputed
+                t_join = np.concatenate([state[i]["t"][-1][-1:], t]) if state[i]["t"] else t
+                if time_series and np.any(
+                    np.diff(t_join) <= args.dedup_atol + args.dedup_rtol * np.abs(t_join[1:])
+                ):
+                    pipeline = data_processing.Pipeline(
+                        np.concatenate(state[i]["t"] + [t]),
+                        [np.concatenate(state[i]["x"] + [x])]
+                        + [np.concatenate(state[i]["y"][j] + [ys[j]]) for j in range(n_col)],
+                    )
+                    t, (x, *ys) = pipeline.deduplicate(args.dedup_atol, args.dedup_rtol, L).run()
+                    state[i] = new_state()
+
+                state[i]["t"].append(t)
+                state[i]["x"].append(x)
+                for j in range(n_col):
+                    y = ys[j]
+                    state[i]["y"][j].append(y)
+                    stats = state[i]["stats"][j]
+                    stats.update(x, y)
+                    for k in range(len(windows)):
+                        state[i]["running_avg"][j][k].append(state[i]["averager"][j][k].update(y))
+
+                    column = f" ({reader.names.get(reader.columns[j + 1], args.column[j])})" if n_col > 1 else ""
+                    L.logger(
+                        f"{args.input[i]}{column}: {stats.n} frames, the average of {y_var}: {stats.mean:.3f} "
+                        f"(RMSF: {stats.rmsf:.3f}, max: {stats.max:.3f} at {stats.x_max:.3f}{x_unit}, "
+                        f"min: {stats.min:.3f} at {stats.x_min:.3f}{x_unit})"
+                    )
+
+            plt.clf()
+            for i in range(len(readers)):
+                if state[i] is None or len(state[i]["x"]) == 0:
+                    continue
+                x = np.concatenate(state[i]["x"])
+                for j in range(n_col):
+                    label = args.legend[i * n_col + j] if args.legend is not None else None
+                    plt.plot(x, np.concatenate(state[i]["y"][j]), label=label, marker=args.marker)
+                    for k, N in enumerate(windows):
+                        running_avg = np.concatenate(state[i]["running_avg"][j][k])
+                        x_avg = data_processing.window_positions(x, N, args.center)
+                        plt.plot(x_avg, running_avg, label=f"Running avg. ({N})", marker=args.marker)
+            if args.legend is not None or args.window is not None:
+                plt.legend(ncol=args.legend_col)
+            if args.title is not None:
+                plt.title(f"{args.title}", weight="bold")
+            plt.xlabel(f"{args.xlabel}")
+            plt.ylabel(f"{args.ylabel}")
+            plt.grid(True)
+            plt.savefig(f"{args.dir}{args.pngname}.png")
+            plt.pause(args.interval)
+    except KeyboardInterrupt:
+        L.logger("Stopped following the input files.")
+
+
 def main():
     args = initialize().parse_args(sys.argv[1:])  # sys.args[0]: program name
 
@@ -191,6 +571,27 @@ def main():
     if args.output is None:
         args.output = "results_" + args.pngname.split(".png")[0] + ".txt"
 
+    if args.follow is True:
+        unsupported = {
+            "-tr": args.truncate is not None,
+            "-trb": args.truncate_b is not None,
+            "-b": args.begin is not None,
+            "-e": args.end is not None,
+            "--segments": args.segments,
+            "--stride": args.stride != 1,
+            "--max_points": args.max_points is not None,
+            "-s": args.smooth is not None,
+            "--rolling": args.rolling is not None,
+            "--acf": args.acf,
+            "--blocking": args.blocking,
+        }
+        flags = [flag for flag, used in unsupported.items() if used]
+        if flags:
+            raise utils.ParameterError(f"The flags {', '.join(flags)} cannot be used with --follow.")
+
+    if args.rolling is not None and args.window is None:
+        raise utils.ParameterError("The window sizes (-w) must be specified to plot the rolling statistics.")
+
     if args.marker is False:
         args.marker = None
     else:
@@ -198,58 +599,85 @@ def main():
 
     L = utils.Logging(args.dir + args.output)
 
-    # Step 2. Read and preprocess (e.g. deduplication, unit conversion) the input data
+    if args.clear_cache is True:
+        data_processing.clear_cache()
+
+    if args.follow is True:
+        follow(args, L)
+        return
+
+    # Step 2. Read, preprocess (e.g. deduplication, unit conversion) and analyze the input data
+    process = functools.partial(process_file, args=args)
+    if args.segments is True:  # the segments are parsed in parallel instead
+        args.input = [natsort.natsorted(args.input)]
+    processed = utils.parallel_map(process, args.input, 1 if args.segments else args.jobs)
+    files = [f if isinstance(f, str) else f"{f[0]} - {f[-1]} ({len(f)} segments)" for f in args.input]
+
+    # Smooth all the columns of all the files at once as needed
+    if args.smooth is not None:
+        ys = [y for result in processed for y in result["y"]]
+        smoothed = iter(data_processing.smooth(ys, args.smooth, args.smooth_window, args.polyorder))
+        for result in processed:
+            result["smoothed"] = [next(smoothed) for y in result["y"]]
+
+    # Step 3. Plot the data
     for i in range(len(args.input)):
-        result_str = "\nData analysis of the file: %s" % args.input[i]
+        result_str = "\nData analysis of the file: %s" % files[i]
         L.logger(result_str)
         L.logger("=" * (len(result_str) - 1))  # len(result_str) includes \n
         L.logger(f"- Working directory: {os.getcwd()}")
         L.logger(f'- Command line: {" ".join(sys.argv)}')
         L.logger("Analyzing the file ... ")
         L.logger("Plotting and saving figure ...")
-        x, y = data_processing.read_2d_data(args.input[i], args.column)
-
-        if "Time" in args.xlabel or "time" in args.xlabel:  # time series
-            x, y = data_processing.deduplicate_data(x, y)
-
-        if args.x_conversion is not None or args.factor_x is not None:
-            x = data_processing.scale_data(
-                x, args.x_conversion, args.factor_x, args.temp
-            )
-
-        if args.y_conversion is not None or args.factor_y is not None:
-            y = data_processing.scale_data(
-                y, args.y_conversion, args.factor_y, args.temp
-            )
-
-        # Data slicing if needed
-        x = data_processing.slice_data(x, args.truncate, args.truncate_b)
-        y = data_processing.slice_data(y, args.truncate, args.truncate_b)
-
-        # simple data analysis of y
-        data_processing.analyze_data(x, y, args.xlabel, args.ylabel, args.output)
+        processed[i]["log"].replay(L)
+        if args.smooth is not None:
+            L.logger(f"Smoothing the data with the {SMOOTH_NAMES[args.smooth]} ({args.smooth_window} data points) ...")
 
-        # Plot the figure
-        if args.legend is None:
-            plt.plot(x, y, marker=args.marker)
-        else:
-            plt.plot(x, y, label=f"{args.legend[i]}", marker=args.marker)
-            if len(args.input) > 1:
+        x = processed[i]["x"]
+        for j in range(len(args.column)):
+            y = processed[i]["y"][j]
+            label = series_label(args, processed, i, j)
+            plt.plot(x, y, label=label, marker=args.marker)
+            if label is not None and (len(args.input) > 1 or len(args.column) > 1):
                 plt.legend(ncol=args.legend_col)
-        if max(abs(x)) >= 10000 or max(abs(x)) <= 0.001:
-            plt.ticklabel_format(style="sci", axis="x", scilimits=(0, 0))
-        if max(abs(y)) >= 10000 or max(abs(y)) <= 0.001:
-            plt.ticklabel_format(style="sci", axis="y", scilimits=(0, 0))
+            if max(abs(x)) >= 10000 or max(abs(x)) <= 0.001:
+                plt.ticklabel_format(style="sci", axis="x", scilimits=(0, 0))
+            if max(abs(y)) >= 10000 or max(abs(y)) <= 0.001:
+                plt.ticklabel_format(style="sci", axis="y", scilimits=(0, 0))
 
-        # Plot the running average as needed
-        if args.window is not None:
-            L.logger("Calculating and plotting the running average ...")
-            L.logger(f"Window size: {args.window} data points")
-            running_avg = data_processing.running_avg(y, args.window)
-            
-            plt.plot(x[(args.window - 1):], running_avg, label='Running avg.', marker=args.marker)
-            plt.legend()
+            # Plot the smoothed data as needed
+            if args.smooth is not None:
+                smooth_label = SMOOTH_NAMES[args.smooth][0].upper() + SMOOTH_NAMES[args.smooth][1:]
+                if label is not None:
+                    smooth_label += f" ({label})"
+                plt.plot(x, processed[i]["smoothed"][j], label=smooth_label)
+                plt.legend(ncol=args.legend_col)
 
+            # Plot the running averages as needed
+            if args.window is not None:
+                for k, N in enumerate(args.window):
+                    running_avg = processed[i]["running_avg"][j][k]
+                    rolling = processed[i]["rolling"][j][k]
+                    x_avg = data_processing.window_positions(x, N, args.center)
+                    label = "Running avg." if len(args.window) == 1 else f"Running avg. ({N})"
+                    line = plt.plot(x_avg, running_avg, label=label, marker=args.marker)[0]
+                    if "std" in rolling:
+                        plt.fill_between(
+                            x_avg,
+                            running_avg - rolling["std"],
+                            running_avg + rolling["std"],
+                            color=line.get_color(),
+                            alpha=0.3,
+                            linewidth=0,
+                        )
+                    if "min" in rolling:
+                        plt.fill_between(
+                            x_avg, rolling["min"], rolling["max"], color=line.get_color(), alpha=0.15, linewidth=0
+                        )
+                    if "median" in rolling:
+                        label = label.replace("Running avg.", "Running median")
+                        plt.plot(x_avg, rolling["median"], color=line.get_color(), linestyle="--", label=label)
+                plt.legend()
 
     if args.title is not None:
         plt.title(f"{args.title}", weight="bold")
@@ -258,4 +686,41 @@ def main():
     plt.grid(True)
 
     plt.savefig(f"{args.dir}{args.pngname}.png")
+
+    # Plot the autocorrelation functions as needed
+    time_series = processed[0]["analysis"][0] is not None
+    if args.acf is True and time_series:
+        x_var, x_unit = plotting_utils.identify_var_units(args.xlabel)
+        plt.figure()
+        for i in range(len(args.input)):
+            x = processed[i]["x"]
+            dt = x[1] - x[0] if len(x) > 1 else 0
+            for j in range(len(args.column)):
+                acf = processed[i]["analysis"][j]["acf"][: len(x) // 2 + 1]  # longer lags are averaged over few pairs
+                plt.plot(np.arange(len(acf)) * dt, acf, label=series_label(args, processed, i, j))
+        if args.legend is not None or len(args.column) > 1:
+            plt.legend(ncol=args.legend_col)
+        plt.axhline(0, color="black", linewidth=0.5)
+        plt.xlabel(f"Lag time ({x_unit.strip()})" if x_unit else "Lag time")
+        plt.ylabel("Autocorrelation function")
+        plt.grid(True)
+        plt.savefig(f"{args.dir}{args.pngname}_acf.png")
+
+    # Plot the standard errors estimated by block averaging as needed
+    if args.blocking is True and time_series:
+        y_var, y_unit = plotting_utils.identify_var_units(args.ylabel)
+        plt.figure()
+        for i in range(len(args.input)):
+            for j in range(len(args.column)):
+                block_sizes, errors, uncertainties = processed[i]["analysis"][j]["blocking"]
+                label = series_label(args, processed, i, j)
+                plt.errorbar(block_sizes, errors, yerr=uncertainties, marker="o", capsize=2, label=label)
+        if args.legend is not None or len(args.column) > 1:
+            plt.legend(ncol=args.legend_col)
+        plt.xscale("log", base=2)
+        plt.xlabel("Block size (data points)")
+        plt.ylabel(f"Standard error ({y_unit.strip()})" if y_unit else "Standard error")
+        plt.grid(True)
+        plt.savefig(f"{args.dir}{args.pngname}_blocking.png")
+
     plt.show()
@@ -10,11 +10,18 @@
 """
 Unit tests for the module `MD_plotting_toolkit.data_processing`.
 """
+import bz2
+import gzip
+import lzma
 import os
+import warnings
 
 import numpy as np
+import pytest
+from numpy.lib.stride_tricks import sliding_window_view
 
 import MD_plotting_toolkit.data_processing as data_processing
+import MD_plotting_toolkit.utils as utils
 
 current_path = os.path.dirname(os.path.abspath(__file__))
 input_path = os.path.join(current_path, "sample_inputs")
@@ -61,6 +68,284 @@ def test_read_2d_data():
     np.testing.assert_array_almost_equal(y3, yy3)
 
 
+def test_parse_file():
+    # Case 1: The whole file in one block versus many small blocks
+    data_1 = data_processing._parse_file(hills_corrupted)
+    data_2 = data_processing._parse_file(hills_corrupted, block_size=100)
+    data_3 = data_processing._parse_file(potential_file, usecols=(0, 1))
+
+    assert data_1.shape == (7, 4042)
+    assert data_1[0].flags["C_CONTIGUOUS"] is True
+    np.testing.assert_array_equal(data_1, data_2)
+    np.testing.assert_array_equal(
+        data_3, np.loadtxt(potential_file, comments=("#", "@"), unpack=True)
+    )
+
+    # Case 2: No trailing newline at the end of the file
+    test_file = output_path + "/test_no_newline.xvg"
+    with open(test_file, "w") as f:
+        f.write("@ s0 legend \"a\"\n0 1.5\n2 2.5")
+    data_4 = data_processing._parse_file(test_file, block_size=4)
+    os.remove(test_file)
+    np.testing.assert_array_equal(data_4, np.array([[0, 2], [1.5, 2.5]]))
+
+
+def test_read_compressed(tmp_path):
+    x, y = data_processing.read_2d_data(potential_file)
+    with open(potential_file, "rb") as f:
+        content = f.read()
+    for module, ext in [(gzip, ".gz"), (bz2, ".bz2"), (lzma, ".xz")]:
+        test_file = str(tmp_path / ("potential.xvg" + ext))
+        with module.open(test_file, "wb") as f:
+            f.write(content)
+        x_c, y_c = data_processing.read_2d_data(test_file)
+        np.testing.assert_array_equal(x_c, x)
+        np.testing.assert_array_equal(y_c, y)
+        assert data_processing.read_table(test_file).name(1) == "Potential"
+
+    chunks = list(data_processing.stream_2d_data(test_file, chunk_size=3000))
+    np.testing.assert_array_equal(np.concatenate([c[1] for c in chunks]), y)
+
+
+def test_read_table():
+    # Case 1: All columns of a GROMACS xvg file, named by the legends
+    table_1 = data_processing.read_table(dhdl_corrupted)
+    assert table_1.data.shape == (14, 1501)
+    assert len(table_1) == 1501
+    assert table_1.name(0) == "Time (ps)"
+    assert table_1.name(2) == "Total Energy (kJ/mol)"
+    np.testing.assert_array_equal(table_1["Total Energy (kJ/mol)"], table_1[2])
+    np.testing.assert_array_equal(table_1[-1], table_1[13])
+
+    # Case 2: Selected columns of a PLUMED output, named by the FIELDS line
+    table_2 = data_processing.read_table(fes_file, ["file.free", 0])
+    assert table_2.columns == [2, 0]
+    assert table_2.name("THETA") == "theta"
+    x, y = data_processing.read_2d_data(fes_file, col_idx=2)
+    np.testing.assert_array_equal(table_2["theta"], x)
+    np.testing.assert_array_equal(table_2["file.free"], y)
+
+    # Case 3: Invalid columns
+    with pytest.raises(utils.ParameterError):
+        data_processing.read_table(fes_file, ["free energy"])
+    with pytest.raises(utils.ParameterError):
+        data_processing.read_table(fes_file, [5])
+    with pytest.raises(utils.ParameterError):
+        table_2[1]
+
+    assert data_processing.column_key("3") == 3
+    assert data_processing.column_key("Potential") == "Potential"
+
+
+def test_read_stride(tmp_path, monkeypatch):
+    monkeypatch.setattr(data_processing, "CACHE_DIR", str(tmp_path / "cache"))
+    x, y = data_processing.read_2d_data(hills_corrupted)
+
+    # Case 1: The stride is applied across blocks while parsing
+    data = data_processing._parse_file(hills_corrupted, usecols=(0, 1), block_size=100, stride=7)
+    np.testing.assert_array_equal(data, [x[::7], y[::7]])
+
+    # Case 2: Blank lines are not counted with or without headers in the block
+    block = b"0 1\n\n1 2\n2 3\n\n3 4\n"
+    assert data_processing._stride_block(block, 2) == (b"0 1\n2 3\n", 4)
+    assert data_processing._stride_block(b"# header\n" + block, 2) == (b"0 1\n2 3\n", 4)
+
+    # Case 3: The maximum number of points
+    x_1, y_1 = data_processing.read_2d_data(hills_corrupted, max_points=1000)
+    assert 500 < len(x_1) <= 1000
+    np.testing.assert_array_equal(y_1, y[:: data_processing._max_points_stride(len(y), 1, 1000)])
+
+    # Case 4: Files at or just below the budget are not decimated, and cached data give the same frames
+    test_file = str(tmp_path / "test.xvg")
+    with open(test_file, "w") as f:
+        f.write('# header\n@ s0 legend "a"\n')
+        np.savetxt(f, np.transpose([np.arange(9600), np.arange(9600) * 2]), fmt="%d")
+    for max_points, n in [(9600, 9600), (10000, 9600), (9599, 4800), (4800, 4800), (1000, 600)]:
+        cold = data_processing.read_2d_data(test_file, max_points=max_points)
+        small_blocks = data_processing._parse_file(test_file, block_size=1000, stride=3, max_points=max_points)
+        data_processing.read_table(test_file, cache=True)  # cache all the frames
+        warm = data_processing.read_2d_data(test_file, cache=True, max_points=max_points)
+        assert len(cold[0]) == n
+        np.testing.assert_array_equal(cold, warm)
+        strided = data_processing.read_2d_data(test_file, cache=True, stride=3, max_points=max_points)
+        np.testing.assert_array_equal(small_blocks, strided)
+    with pytest.raises(utils.ParameterError):
+        data_processing.read_2d_data(hills_corrupted, stride=0)
+
+
+def test_read_table_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(data_processing, "CACHE_DIR", str(tmp_path))
+    test_file = str(tmp_path / "test.xvg")
+    with open(test_file, "w") as f:
+        f.write('@ s0 legend "a"\n@ s1 legend "b"\n0 1 2\n2 3 4\n')
+
+    # Case 1: Cold run writes the cache, warm run reads it
+    table_1 = data_processing.read_table(test_file, [0, "b"], cache=True)
+    assert sorted(os.listdir(tmp_path))[0].endswith(".json")
+    data, meta = data_processing._load_cache(test_file)
+    np.testing.assert_array_equal(data, [[0, 2], [1, 3], [2, 4]])
+    table_2 = data_processing.read_table(test_file, [0, "b"], cache=True)
+    np.testing.assert_array_equal(table_1.data, table_2.data)
+    assert table_2.name(2) == "b"
+
+    # Case 2: The cache is invalidated once the file changes
+    with open(test_file, "a") as f:
+        f.write("4 5 6\n")
+    assert data_processing._load_cache(test_file) == (None, None)
+    x, y = data_processing.read_2d_data(test_file, 2, cache=True)
+    np.testing.assert_array_equal(y, [2, 4, 6])
+
+    # Case 3: LRU eviction and clearing
+    data_processing._evict_cache(str(tmp_path), size_cap=0)
+    assert not any(f.endswith(".npy") for f in os.listdir(tmp_path))
+    data_processing.read_table(test_file, cache=True)
+    data_processing.clear_cache()
+    assert os.listdir(tmp_path) == ["test.xvg"]
+
+
+def test_time_index(tmp_path, monkeypatch):
+    monkeypatch.setattr(data_processing, "CACHE_DIR", str(tmp_path / "cache"))
+    test_file = str(tmp_path / "test.xvg")
+    t = np.concatenate([np.arange(0, 600), np.arange(400, 1000)])  # with a restart
+    with open(test_file, "w") as f:
+        f.write('@ s0 legend "a"\n')
+        np.savetxt(f, np.transpose([t, t * 2]), fmt="%d")
+
+    # Case 1: Building the index and reading a time window
+    index = data_processing.build_time_index(test_file, block_size=1024)
+    assert os.path.isfile(test_file + ".tidx.npz")
+    assert index["end"] == os.path.getsize(test_file)
+    assert len(index["offset"]) > 5
+    x, y = data_processing.read_2d_data(test_file, "a", tmin=500, tmax=550)
+    np.testing.assert_array_equal(x, np.concatenate([np.arange(500, 551)] * 2))
+    np.testing.assert_array_equal(y, x * 2)
+
+    # Case 2: The index is extended when the file grows, including a partial line
+    with open(test_file, "a") as f:
+        f.write("1000 2000\n1001 20")
+    index_2 = data_processing.build_time_index(test_file, block_size=1024)
+    np.testing.assert_array_equal(index_2["offset"][:-1], index["offset"])
+    assert index_2["end"] == os.path.getsize(test_file) - len("1001 20")
+    x, y = data_processing.read_2d_data(test_file, tmin=999)
+    np.testing.assert_array_equal(x, [999, 1000, 1001])
+
+    # Case 3: A windowed read is a subset of the full read for a file without a final newline
+    with open(test_file, "a") as f:
+        f.write("03\n1002 2004")
+    x, y = data_processing.read_2d_data(test_file, tmin=1000)
+    np.testing.assert_array_equal(x, [1000, 1001, 1002])
+    np.testing.assert_array_equal(y, [2000, 2003, 2004])
+    np.testing.assert_array_equal(data_processing.read_2d_data(test_file)[1][-3:], y)
+
+    # Case 4: Cached data are masked in the same way
+    data_processing.read_table(test_file, cache=True)
+    x, y = data_processing.read_2d_data(test_file, cache=True, tmax=1)
+    np.testing.assert_array_equal(y, [0, 2])
+
+
+def test_follow_reader(tmp_path):
+    test_file = str(tmp_path / "test.xvg")
+    with open(test_file, "w") as f:
+        f.write('@ s0 legend "a"\n')  # only the header is written when the reader is created
+    reader = data_processing.FollowReader(test_file, [0, "a"])
+    assert reader.read().shape == (2, 0)
+    with open(test_file, "a") as f:
+        f.write("0 1")  # the columns are not resolved from a partially written line
+    assert reader.read().shape == (2, 0)
+    with open(test_file, "a") as f:
+        f.write("\n2 3\n4 5")  # a partially written line
+    stats = data_processing.RunningStatistics()
+    averager = data_processing.RunningAverage(2)
+
+    # Case 1: Only the complete lines are consumed
+    data = reader.read()
+    np.testing.assert_array_equal(data, [[0, 2], [1, 3]])
+    stats.update(data[0], data[1])
+    avg = [averager.update(data[1])]
+
+    # Case 2: Appended lines (including the rest of the partial line) are parsed
+    with open(test_file, "a") as f:
+        f.write("\n6 7\n")
+    data = reader.read()
+    np.testing.assert_array_equal(data, [[4, 6], [5, 7]])
+    assert reader.read().shape == (2, 0)
+    stats.update(data[0], data[1])
+    avg.append(averager.update(data[1]))
+    assert stats.mean == 4
+    assert stats.x_max == 6
+    np.testing.assert_array_equal(np.concatenate(avg), data_processing.running_avg(np.array([1, 3, 5, 7]), 2))
+
+    # Case 3: The file is read from the beginning once it is overwritten
+    with open(test_file, "w") as f:
+        f.write("0 1\n")
+    np.testing.assert_array_equal(reader.read(), [[0], [1]])
+    assert reader.rewound is True
+
+
+def test_read_segments(tmp_path, monkeypatch):
+    monkeypatch.setattr(data_processing, "CACHE_DIR", str(tmp_path / "cache"))
+    x, y = data_processing.read_2d_data(potential_file)
+    bounds = [0, 300, 700, len(x)]
+    for i in range(3):  # each part restarts 20 frames before the end of the previous part
+        start = max(bounds[i] - 20, 0)
+        with open(tmp_path / f"ener.part{i * 5 + 1}.xvg", "w") as f:
+            f.write('@ s0 legend "Potential"\n')
+            np.savetxt(f, np.transpose([x[start : bounds[i + 1]], y[start : bounds[i + 1]]]))  # noqa: E203
+    f_inputs = [str(f) for f in tmp_path.iterdir()]  # part11 is listed before part6
+
+    for i in range(2):  # the segments are cached on the first call
+        table = data_processing.read_segments(f_inputs, ["Potential"], cache=True)
+        np.testing.assert_array_equal(table["Potential"], y)
+
+    table = data_processing.read_segments(f_inputs, ["Potential"], jobs=2)
+    np.testing.assert_array_equal(table[0], x)
+    np.testing.assert_array_equal(table["Potential"], y)
+
+    # The last segment, which has no later segment to be trimmed against, is kept with a relative tolerance
+    table = data_processing.read_segments(f_inputs, ["Potential"], rtol=1e-9)
+    np.testing.assert_array_equal(table[0], x)
+    np.testing.assert_array_equal(table["Potential"], y)
+
+    table = data_processing.read_segments(f_inputs, [1], max_points=100)
+    assert table.data.shape[1] <= 100
+    np.testing.assert_array_equal(table[1], y[:: data_processing._max_points_stride(len(x), 1, 100)])
+
+    names = [f for f, data in data_processing.stream_segments(f_inputs)]
+    assert [os.path.basename(f) for f in names] == ["ener.part1.xvg", "ener.part6.xvg", "ener.part11.xvg"]
+
+
+def test_ingest(tmp_path, monkeypatch):
+    monkeypatch.setattr(data_processing, "CHUNK_SIZE", 1000)
+    f_store = str(tmp_path / "HILLS.npy")
+    table = data_processing.ingest(hills_corrupted, f_store, block_size=4096)
+    x, y = data_processing.read_2d_data(hills_corrupted)
+
+    assert isinstance(table.data, np.memmap)
+    assert table.name(1) == "theta"
+    np.testing.assert_array_equal(table[0], x)
+    np.testing.assert_array_equal(table[1], y)
+
+    # The store is reused as long as the input file does not change
+    mtime = os.path.getmtime(f_store)
+    data_processing.ingest(hills_corrupted, f_store)
+    assert os.path.getmtime(f_store) == mtime
+
+    # Processing memory-mapped data gives the same results as processing in-memory data
+    x_mm, y_mm = data_processing.deduplicate_data(table[0], table[1])
+    x_dedup, y_dedup = data_processing.deduplicate_data(x, y)
+    np.testing.assert_array_equal(x_mm, x_dedup)
+    np.testing.assert_array_equal(y_mm, y_dedup)
+
+    y_scaled = data_processing.scale_data(y_mm, "degree to radian", 2)
+    assert isinstance(y_scaled, np.memmap)
+    np.testing.assert_array_almost_equal(y_scaled, y_dedup * np.pi / 90)
+    np.testing.assert_array_equal(table[1], y)  # the store is not modified
+
+    np.testing.assert_array_almost_equal(
+        data_processing.running_avg(y_mm, 50), data_processing.running_avg(np.array(y_dedup), 50)
+    )
+
+
 def test_deduplicate_data():
     x1 = [2, 4, 6, 2, 7, 8, 4, 3]  # not the x-data for a typical time seris
     y1 = [1, 2, 3, 4, 5, 6, 7, 8]
@@ -83,6 +368,56 @@ def test_deduplicate_data():
     assert int(np.sum(np.diff(x2))) == (len(x2) - 1) * 1
     assert int(np.sum(np.diff(x3))) == (len(x3) - 1) * 2
 
+    # A restart from a checkpoint, where the overlapped frames are discarded
+    x4 = np.append(np.arange(1000.0), np.arange(990.0, 1500.0))
+    y4 = np.arange(1510.0)
+    x4_dedup, y4_dedup = data_processing.deduplicate_data(x4, y4)
+    np.testing.assert_array_equal(x4_dedup, np.arange(1500.0))
+    np.testing.assert_array_equal(y4_dedup, np.append(np.arange(990.0), np.arange(1000.0, 1510.0)))
+
+    # Views are returned if the kept frames are contiguous
+    x4_dedup, y4_dedup = data_processing.deduplicate_data(x4[990:], y4[990:])
+    assert np.shares_memory(x4_dedup, x4)
+    np.testing.assert_array_equal(y4_dedup, np.arange(1000.0, 1510.0))
+
+    # A restart that does not repeat the time frames exactly is not a duplicate
+    x5 = np.append(np.arange(0.0, 1000.0, 2), np.arange(991.0, 1500.0, 2))
+    x5_dedup, _ = data_processing.deduplicate_data(x5, x5)
+    assert len(x5_dedup) == len(x5)
+
+    # Time frames that only differ by rounding errors with the tolerance
+    x6 = np.append(np.arange(1000.0), np.arange(990.0, 1500.0) + 1e-7)
+    L = utils.BufferedLogging()
+    x6_dedup, y6_dedup = data_processing.deduplicate_data(x6, y4, atol=1e-6, outfile=L)
+    np.testing.assert_array_almost_equal(x6_dedup, np.arange(1500.0))
+    np.testing.assert_array_equal(y6_dedup, np.append(np.arange(990.0), np.arange(1000.0, 1510.0)))
+    assert L.messages == [(("10 frames (990.000 to 999.000) were dropped at the restart at 990.000.",), {})]
+    assert len(data_processing.deduplicate_data(x6, y4)[0]) == len(x6)
+
+    # The general case agrees with the fast path
+    x7 = np.array([2, 4, 6, 2, 7, 8, 4, 3]) + np.arange(8) * 1e-9
+    x7, y7 = data_processing.deduplicate_data(x7, np.arange(1, 9), atol=1e-6)
+    np.testing.assert_array_equal(y7, [3, 4, 5, 6, 7, 8])
+
+    # The frames dropped at each restart are reported by the general case as well
+    x9 = np.concatenate([np.arange(10.0), np.arange(8.0, 15.0), np.arange(14.0, 20.0), np.arange(5.0, 30.0)])
+    L = utils.BufferedLogging()
+    x9, _ = data_processing.deduplicate_data(x9, x9, outfile=L)  # too many restarts for the fast path
+    np.testing.assert_array_equal(x9, np.arange(30.0))
+    assert [args[0] for args, kwargs in L.messages] == [
+        "5 frames (5.000 to 9.000) were dropped at the restart at 8.000.",
+        "7 frames (8.000 to 14.000) were dropped at the restart at 14.000.",
+        "6 frames (14.000 to 19.000) were dropped at the restart at 5.000.",
+    ]
+
+    # N/A does not bring back an earlier duplicate of the frame
+    x8 = np.array([0, 1, 2, 3, 4, 5, 4, 5, 6, 7], dtype=float)
+    y8 = np.arange(10.0)
+    y8[7] = np.nan
+    x8, y8 = data_processing.deduplicate_data(x8, y8)
+    np.testing.assert_array_equal(x8, [0, 1, 2, 3, 4, 6, 7])
+    np.testing.assert_array_equal(y8, [0, 1, 2, 3, 6, 8, 9])
+
 
 def test_scale_data():
     f = 2
@@ -113,6 +448,33 @@ def test_scale_data():
         )
 
 
+def test_pipeline():
+    x, y = data_processing.read_2d_data(hills_corrupted)
+    x_copy, y_copy = x.copy(), y.copy()
+    pipeline = data_processing.Pipeline(x, [y, 2 * y]).deduplicate()
+    pipeline.scale("x", "ps to ns", 2).scale("y", "degree to radian").slice(truncate=20).stride(3)
+    x_1, (y_1, y_2) = pipeline.run()
+
+    x_dedup, y_dedup = data_processing.deduplicate_data(x_copy, y_copy)
+    n = int(0.2 * len(x_dedup))
+    np.testing.assert_array_almost_equal(x_1, x_dedup[n::3] * 2 / 1000)
+    np.testing.assert_array_almost_equal(y_1, y_dedup[n::3] * np.pi / 180)
+    np.testing.assert_array_almost_equal(y_2, 2 * y_1)
+    np.testing.assert_array_equal(x, x_copy)  # the input data are not modified
+
+    # The same frames are kept for all the variables with N/A in different frames
+    x_3 = np.append(np.arange(10.0), np.arange(8.0, 12.0))
+    y_3, y_4 = np.arange(14.0), np.arange(14.0)
+    y_3[2], y_4[12] = np.nan, np.nan
+    x_3, (y_3, y_4) = data_processing.Pipeline(x_3, [y_3, y_4]).deduplicate().run()
+    np.testing.assert_array_equal(x_3, [0, 1, 3, 4, 5, 6, 7, 8, 9, 11])
+    np.testing.assert_array_equal(y_3, [0, 1, 3, 4, 5, 6, 7, 10, 11, 13])
+    np.testing.assert_array_equal(y_4, y_3)
+
+    with pytest.raises(utils.ParameterError):
+        pipeline.scale("z", factor=2)
+
+
 def test_slice_data():
     data = np.arange(100)
     data_unchaged = data_processing.slice_data(data)
@@ -125,6 +487,20 @@ def test_slice_data():
     assert data_2[-1] == 19
     assert data_3[0] == 20
     assert data_3[-1] == 79
+    assert len(data_processing.slice_data(data, truncate=0.5, truncate_b=10)) == 90
+
+
+def test_slice_time():
+    x, y = np.arange(0, 200, 2.0), np.arange(100.0)
+    x_1, y_1 = data_processing.slice_time(x, y, begin=50, end=101)
+    assert np.shares_memory(x_1, x) and np.shares_memory(y_1, y)
+    np.testing.assert_array_equal(x_1, np.arange(50, 101, 2.0))
+    np.testing.assert_array_equal(y_1, np.arange(25, 51))
+    assert len(data_processing.slice_time(x, y, end=-1)[0]) == 0
+
+    # The bounds are in the units after the conversion in a pipeline
+    x_2, (y_2,) = data_processing.Pipeline(x, [y]).scale("x", "ps to ns").slice_time(begin=0.05).run()
+    np.testing.assert_array_equal(y_2, np.arange(25, 100))
 
 
 def test_analyze_data():
@@ -159,7 +535,12 @@ def test_analyze_data():
     line_2 = "The maximum of distance occurs at 99.000 ns.\n"
     line_3 = "The minimum of distance occurs at 0.000 ns.\n"
     line_4 = "The distance (149.000 nm) at 49.000 ns is closet to the average.\n"
-    texts = [line_1, line_2, line_3, line_4]
+    line_5 = (
+        "The integrated autocorrelation time of distance: 16.906 ns (statistical inefficiency: 34.812, "
+        "effective sample size: 2.9)\n"
+    )
+    line_6 = "The uncertainty of the average of distance: 17.031 nm\n"
+    texts = [line_1, line_2, line_3, line_4, line_5, line_6]
 
     infile = open(outfile, "r")
     lines = infile.readlines()
@@ -168,3 +549,307 @@ def test_analyze_data():
     assert os.path.isfile(outfile) is True
     assert texts == lines
     os.remove(outfile)
+
+    # Test 3: With block averaging
+    results = data_processing.analyze_data(x, y, x_label, y_label, outfile, blocking=True)
+    line_7 = (
+        "The standard error of the average of distance by block averaging: 12.220 nm "
+        "(reaching a plateau at blocks of 16 data points)\n"
+    )
+
+    infile = open(outfile, "r")
+    lines = infile.readlines()
+    infile.close()
+
+    assert texts + [line_7] == lines
+    assert len(results["blocking"][0]) == 6
+    os.remove(outfile)
+
+    # Test 4: Block averaging of a single data point gives empty results
+    results = data_processing.analyze_data(x[:1], y[:1], x_label, y_label, outfile, blocking=True)
+    assert all(len(a) == 0 for a in results["blocking"])
+    os.remove(outfile)
+
+
+def test_running_statistics(monkeypatch):
+    monkeypatch.setattr(data_processing, "CHUNK_SIZE", 1000)
+    rng = np.random.default_rng(0)
+    y = -1.2e6 + rng.normal(0, 0.01, 10000)  # a large offset
+    x = np.arange(len(y)) * 2.0
+    deviation = y - np.mean(y)
+    rmsf = np.sqrt(np.mean(deviation ** 2)) / np.mean(y)
+
+    stats = data_processing.RunningStatistics.from_data(x, y, jobs=4)
+    assert stats.n == len(y)
+    assert stats.i_max == np.argmax(y)
+    assert stats.x_min == x[np.argmin(y)]
+    np.testing.assert_allclose(stats.mean, np.mean(y), rtol=1e-15)
+    np.testing.assert_allclose(stats.rmsf, rmsf, rtol=1e-9)
+
+    # Merging the statistics of separate parts
+    stats_1 = data_processing.RunningStatistics.from_data(x[:3333], y[:3333])
+    stats_2 = data_processing.RunningStatistics.from_data(x[3333:], y[3333:])
+    stats_1.merge(stats_2)
+    assert stats_1.i_min == stats.i_min
+    np.testing.assert_allclose(stats_1.rmsf, rmsf, rtol=1e-9)
+
+
+def test_running_avgs(monkeypatch):
+    monkeypatch.setattr(data_processing, "CHUNK_SIZE", 100000)
+    rng = np.random.default_rng(0)
+    y = 1e6 + rng.normal(0, 1, 1000000)  # a large offset
+    windows = [10, 100, 1000]
+    avgs = data_processing.running_avgs(y, windows)
+
+    for N, avg in zip(windows, avgs):
+        assert len(avg) == len(y) - N + 1
+        for i in [0, 123456, len(avg) - 1]:  # exact averages at a few positions
+            np.testing.assert_allclose(avg[i], np.mean(y[i : i + N]), rtol=0, atol=1e-9)  # noqa: E203
+    np.testing.assert_array_equal(data_processing.running_avg(y, 10), avgs[0])
+
+    x = np.arange(10.0)
+    np.testing.assert_array_equal(data_processing.window_positions(x, 4), np.arange(3.0, 10))
+    np.testing.assert_array_equal(data_processing.window_positions(x, 4, center=True), np.arange(1.5, 8))
+    with pytest.raises(utils.ParameterError):
+        data_processing.running_avgs(y, [0])
+
+
+def test_autocorrelation(monkeypatch):
+    rng = np.random.default_rng(0)
+    y = rng.normal(size=3000)
+    for i in range(1, len(y)):  # an AR(1) process, whose ACF is 0.8^k
+        y[i] += 0.8 * y[i - 1]
+    d = y - np.mean(y)
+    direct = np.array([np.dot(d[: len(d) - k], d[k:]) / (len(d) - k) for k in range(100)])  # noqa: E203
+
+    acf = data_processing.autocorrelation(y)
+    assert len(acf) == len(y)
+    np.testing.assert_allclose(acf[:100], direct / direct[0], atol=1e-12)
+
+    # The same result from the chunks of memory-mapped data
+    monkeypatch.setattr(data_processing, "CHUNK_SIZE", 128)
+    np.testing.assert_allclose(data_processing.autocorrelation(y, max_lag=99, jobs=2), direct / direct[0], atol=1e-12)
+
+    # tau = 0.8 / (1 - 0.8) = 4 data points
+    tau, g, n_eff = data_processing.autocorrelation_time(acf, len(y))
+    assert 3 < tau < 5
+    assert g == 2 * tau + 1
+    assert n_eff == len(y) / g
+
+    # Uncorrelated and constant time series
+    acf = data_processing.autocorrelation(rng.normal(size=10000))
+    assert data_processing.autocorrelation_time(acf, 10000)[1] < 1.1
+    np.testing.assert_array_equal(data_processing.autocorrelation(np.ones(5)), [1, 0, 0, 0, 0])
+    with pytest.warns(UserWarning):
+        data_processing.autocorrelation_time(np.ones(10), 100)
+
+
+def test_block_average(monkeypatch):
+    rng = np.random.default_rng(0)
+    y = 1e6 + rng.normal(size=10007)
+    for i in range(1, len(y)):  # an AR(1) process, with g = (1 + 0.8) / (1 - 0.8) = 9
+        y[i] += 0.8 * (y[i - 1] - 1e6)
+
+    block_sizes, errors, uncertainties = data_processing.block_average(y)
+    np.testing.assert_array_equal(block_sizes, 2 ** np.arange(13))
+    for b, error in zip(block_sizes, errors):  # the same as reshaping for each block size
+        means = y[: len(y) // b * b].reshape(-1, b).mean(axis=1)
+        np.testing.assert_allclose(error, np.std(means) / np.sqrt(len(means) - 1), rtol=1e-8)
+    np.testing.assert_allclose(uncertainties, errors / np.sqrt(2 * (len(y) // block_sizes - 1)))
+
+    # Chunks of memory-mapped data, including block sizes larger than a chunk
+    monkeypatch.setattr(data_processing, "CHUNK_SIZE", 1000)
+    np.testing.assert_allclose(data_processing.block_average(y)[1], errors, rtol=1e-10)
+
+    # The plateau at the standard error expected from the statistical inefficiency
+    i = data_processing.block_plateau(errors, uncertainties)
+    assert 8 <= block_sizes[i] <= 256
+    np.testing.assert_allclose(errors[i], np.std(y) * np.sqrt(9 / len(y)), rtol=0.2)
+    assert data_processing.block_plateau(np.arange(1.0, 6), np.full(5, 0.1)) is None
+    with pytest.raises(utils.ParameterError):
+        data_processing.block_average([1.0])
+
+
+def test_bootstrap():
+    rng = np.random.default_rng(0)
+    y = rng.normal(size=10050)
+
+    # The same averages as materializing the resampled blocks drawn from the same seed
+    samples = data_processing.bootstrap_mean(y, n_resamples=5, block_size=100, seed=7)
+    blocks = y[:10000].reshape(100, 100)
+    indices = np.random.default_rng(np.random.SeedSequence(7).spawn(1)[0]).integers(0, 100, (5, 100))
+    np.testing.assert_allclose(samples, [np.mean(blocks[idx]) for idx in indices])
+
+    samples, bin_edges = data_processing.bootstrap_histogram(y, 10, (-2, 2), n_resamples=5, block_size=100, seed=7)
+    np.testing.assert_array_equal(bin_edges, np.linspace(-2, 2, 11))
+    np.testing.assert_array_equal(samples, [np.histogram(blocks[idx], 10, (-2, 2))[0] for idx in indices])
+
+    # Reproducible regardless of the number of processes
+    samples = data_processing.bootstrap_mean(y, n_resamples=200, seed=1)
+    np.testing.assert_array_equal(samples, data_processing.bootstrap_mean(y, n_resamples=200, seed=1, jobs=2))
+    np.testing.assert_allclose(np.std(samples), 1 / np.sqrt(len(y)), rtol=0.2)
+    lower, upper = data_processing.confidence_interval(samples)
+    assert lower < np.mean(y) < upper
+
+    # Individual resampling of a histogram (multinomial counts)
+    samples, bin_edges = data_processing.bootstrap_histogram(y, 10, n_resamples=2000, seed=1)
+    counts = np.histogram(y, 10)[0]
+    np.testing.assert_array_equal(bin_edges, np.histogram_bin_edges(y, 10))
+    assert np.all(np.sum(samples, axis=1) == len(y))
+    np.testing.assert_allclose(np.mean(samples, axis=0), counts, rtol=0.05)
+    lower, upper = data_processing.confidence_interval(samples, 0.9)
+    assert np.all(lower <= counts) and np.all(counts <= upper)
+    with pytest.raises(utils.ParameterError):
+        data_processing.bootstrap_mean(y, block_size=20000)
+
+
+def test_flatness():
+    metrics = data_processing.flatness([[10, 10, 10, 10], [5, 10, 15, 10], [0, 10, 10, 20]])
+    np.testing.assert_allclose(metrics["N_ratio"], [1, 3, np.inf])
+    np.testing.assert_allclose(metrics["min_mean"], [1, 0.5, 0])
+    np.testing.assert_allclose(metrics["KL"][:2], [0, np.sum([0.125, 0.25, 0.375, 0.25] * np.log([0.5, 1, 1.5, 1]))])
+    assert metrics["KL"][2] > 0
+
+    # Multiple windows at once, with repeated values counted as in np.histogram
+    rng = np.random.default_rng(0)
+    y = np.round(rng.normal(size=100000), 2)
+    windows = [(-1, 1), (-2, 0.5), (0, 0.1)]
+    counts, metrics = data_processing.flatness_windows(y, windows, bins=7)
+    for k, window in enumerate(windows):
+        np.testing.assert_array_equal(counts[k], np.histogram(y, 7, window)[0])
+    np.testing.assert_allclose(metrics["N_ratio"], np.max(counts, axis=1) / np.min(counts, axis=1))
+    with pytest.raises(utils.ParameterError):
+        data_processing.flatness_windows(y, [(1, 0)])
+
+
+def test_detect_equilibration(monkeypatch):
+    rng = np.random.default_rng(0)
+    n = 5000
+    y = rng.normal(size=n)
+    for i in range(1, n):  # an AR(1) process relaxing from a high initial value
+        y[i] += 0.8 * y[i - 1]
+    y += 20 * np.exp(-np.arange(n) / 200)
+
+    # The same result as computing the ACF of each suffix from scratch
+    monkeypatch.setattr(data_processing, "CHUNK_SIZE", 1024)
+    t0, g, n_eff = data_processing.detect_equilibration(y, n_origins=30, max_lag=200)
+    origins = np.unique(np.geomspace(1, n - 1, 30).astype(int) - 1)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        results = [
+            data_processing.autocorrelation_time(data_processing.autocorrelation(y[t:], max_lag=200), n - t)
+            for t in origins
+        ]
+    i = int(np.argmax([r[2] for r in results]))
+    assert t0 == origins[i]
+    np.testing.assert_allclose([g, n_eff], results[i][1:])
+    assert 500 < t0 < 2000
+
+    # Truncation, with the default grid of origins
+    t0, g, n_eff = data_processing.detect_equilibration(y)
+    assert 500 < t0 < 2000
+    np.testing.assert_array_equal(data_processing.slice_data(y, "auto"), y[t0:])
+    t0_b = data_processing.detect_equilibration(y[:4500])[0]  # detected after truncating the end
+    np.testing.assert_array_equal(data_processing.slice_data(y, "auto", 10), y[t0_b:4500])
+    x = np.arange(n) * 2.0
+    L = utils.BufferedLogging()
+    x_1, (y_1, y_2) = data_processing.Pipeline(x, [y, -y]).scale("x", "ps to ns").slice("auto", None, L).run()
+    np.testing.assert_array_equal(y_1, y[t0:])
+    np.testing.assert_allclose(x_1, x[t0:] / 1000)
+    message = (
+        f"{t0} data points before the equilibration at {x[t0] / 1000:.3f} were truncated "
+        f"(statistical inefficiency: {g:.3f}, effective sample size: {n_eff:.1f})."
+    )
+    assert L.messages == [((message,), {})]
+    assert data_processing.detect_equilibration(y[:2]) == (0, 1.0, 2.0)
+
+
+def test_rolling_statistics(monkeypatch):
+    monkeypatch.setattr(data_processing, "CHUNK_SIZE", 1000)  # windows across the chunks
+    rng = np.random.default_rng(0)
+    y = 1e6 + rng.normal(0, 1, 10007)
+    windows = sliding_window_view(y, 37)
+
+    np.testing.assert_allclose(data_processing.rolling_std(y, 37), np.std(windows, axis=1), rtol=1e-6)
+    np.testing.assert_array_equal(data_processing.rolling_max(y, 37), np.max(windows, axis=1))
+    np.testing.assert_array_equal(data_processing.rolling_min(y, 37), np.min(windows, axis=1))
+    np.testing.assert_array_equal(data_processing.rolling_median(y, 37), np.median(windows, axis=1))
+
+    # Windows of a single data point and windows longer than the series
+    np.testing.assert_array_equal(data_processing.rolling_max(y, 1), y)
+    np.testing.assert_allclose(data_processing.rolling_std(y, 1), 0, atol=1e-6)  # rounding errors under the root
+    assert len(data_processing.rolling_min(y[:10], 20)) == 0
+    with pytest.raises(utils.ParameterError):
+        data_processing.rolling_median(y, 0)
+
+
+def test_smooth():
+    rng = np.random.default_rng(0)
+    t = np.arange(5000)
+    signal = np.sin(2 * np.pi * t / 1000)
+    y = signal + rng.normal(0, 0.3, len(t))
+
+    # Exponential moving average (the same as pandas.Series.ewm(span=3, adjust=False))
+    np.testing.assert_allclose(data_processing.ema([1.0, 2.0, 4.0], 3), [1, 1.5, 2.75])
+    assert np.std(data_processing.ema(y, 20) - signal) < 0.15
+
+    # Low-pass filter
+    cosine = np.cos(2 * np.pi * (t + 0.5) / 1000)  # symmetric at both ends, hence exact
+    np.testing.assert_allclose(data_processing.lowpass_filter(cosine, 100), cosine, atol=1e-12)
+    assert np.std(data_processing.lowpass_filter(y, 200) - signal) < 0.05
+
+    # Savitzky-Golay filter (exact for polynomials)
+    p = 0.1 * t**2 - 3 * t
+    np.testing.assert_allclose(data_processing.savgol_smooth(p, 51), p, atol=1e-5)
+    assert np.std(data_processing.savgol_smooth(y, 201) - signal) < 0.05
+    with pytest.raises(utils.ParameterError):
+        data_processing.savgol_smooth(y, 50)
+
+    # Batches of time series of different lengths
+    series = [y, y[:1000] * 2, y[::-1], y[:7]]
+    for method, func in [
+        ("ema", data_processing.ema),
+        ("lowpass", data_processing.lowpass_filter),
+        ("savgol", data_processing.savgol_smooth),
+    ]:
+        smoothed = data_processing.smooth(series, method, 11)
+        for s, out in zip(series, smoothed):
+            np.testing.assert_allclose(out, func(s, 11))
+    with pytest.raises(utils.ParameterError):
+        data_processing.smooth(series, "gaussian", 11)
+
+
+def test_stream_data():
+    x, y = data_processing.read_2d_data(hills_corrupted)
+    x_dedup, y_dedup = data_processing.deduplicate_data(x, y)
+
+    # Reading and deduplication
+    chunks = list(data_processing.stream_2d_data(hills_corrupted, chunk_size=1000, block_size=4096))
+    assert [len(c[0]) for c in chunks] == [1000] * 4 + [42]
+    np.testing.assert_array_equal(np.concatenate([c[1] for c in chunks]), y)
+
+    chunks = data_processing.stream_2d_data(hills_corrupted, chunk_size=500)
+    chunks = list(data_processing.stream_deduplicate_data(chunks, lookback=1000))
+    np.testing.assert_array_equal(np.concatenate([c[0] for c in chunks]), x_dedup)
+    np.testing.assert_array_equal(np.concatenate([c[1] for c in chunks]), y_dedup)
+
+    # Scaling, slicing and statistics
+    chunks = data_processing.stream_scale_data(chunks, x_factor=0.5, y_conversion="radian to degree")
+    chunks = list(data_processing.stream_slice_data(chunks, begin=100, end=1000))
+    x_s = np.concatenate([c[0] for c in chunks])
+    y_s = np.concatenate([c[1] for c in chunks])
+    mask = (x_dedup * 0.5 >= 100) & (x_dedup * 0.5 <= 1000)
+    np.testing.assert_array_almost_equal(x_s, x_dedup[mask] * 0.5)
+    np.testing.assert_array_almost_equal(y_s, y_dedup[mask] * 180 / np.pi)
+
+    stats = data_processing.stream_analyze_data(chunks)
+    assert stats.n == len(y_s)
+    assert stats.max == np.max(y_s)
+    assert stats.x_min == x_s[np.argmin(y_s)]
+    np.testing.assert_almost_equal(stats.mean, np.mean(y_s))
+    np.testing.assert_almost_equal(stats.rmsf, np.std(y_s) / np.mean(y_s))
+
+    hist, edges = data_processing.stream_histogram(chunks, bins=20, range=(-180, 180))
+    np.testing.assert_array_equal(hist, np.histogram(y_s, bins=20, range=(-180, 180))[0])
+    with pytest.raises(utils.ParameterError):
+        data_processing.stream_histogram(chunks)
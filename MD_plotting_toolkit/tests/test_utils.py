@@ -36,3 +36,27 @@ class Test_Logging:
         assert "Test\n" == lines[0]
 
         os.remove(outfile)
+
+
+class Test_BufferedLogging:
+    def test_replay(self):
+        B = utils.BufferedLogging()
+        B.logger("Test 1")
+        B.logger("Test 2")
+        assert not os.path.isfile(outfile)
+
+        B.replay(utils.Logging(outfile))
+        infile = open(outfile, "r")
+        lines = infile.readlines()
+        infile.close()
+
+        assert lines == ["Test 1\n", "Test 2\n"]
+        os.remove(outfile)
+
+
+def test_parallel_map():
+    items = [3, 1, 2, 5, 4]
+    assert utils.parallel_map(abs, items) == items
+    assert utils.parallel_map(abs, items, jobs=2) == items
+    assert list(utils.parallel_imap(abs, items)) == items
+    assert list(utils.parallel_imap(abs, items, jobs=2)) == items
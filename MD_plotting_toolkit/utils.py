@@ -10,6 +10,7 @@
 """
 The `utils` module provides various general utilities.
 """
+import concurrent.futures
 
 
 class Logging:
@@ -30,6 +31,98 @@ class Logging:
             print(file=f, *args, **kwargs)
 
 
+class BufferedLogging(Logging):
+    """
+    A logger that stores the messages instead of printing them, so that the messages
+    generated in worker processes can be logged later in a deterministic order.
+    """
+
+    def __init__(self):
+        self.f = None
+        self.messages = []
+
+    def logger(self, *args, **kwargs):
+        """
+        Stores the message to be logged later by :code:`replay`.
+        """
+        self.messages.append((args, kwargs))
+
+    def replay(self, L):
+        """
+        Logs the stored messages with another logger.
+
+        Parameters
+        ----------
+        L : Logging
+            The logger used to print and save the messages.
+        """
+        for args, kwargs in self.messages:
+            L.logger(*args, **kwargs)
+
+
+def parallel_map(func, iterable, jobs=1):
+    """
+    Applies a function to each item of an iterable, either serially or in a pool of
+    processes. In both cases, the results are returned in the order of the items.
+
+    Parameters
+    ----------
+    func : callable
+        The function to be applied. It must be picklable (e.g. defined at the top
+        level of a module) if :code:`jobs` is larger than 1.
+    iterable : iterable
+        The items to be processed.
+    jobs : int
+        The number of processes. The items are processed serially if :code:`jobs` is 1.
+
+    Returns
+    -------
+    results : list
+        The results of the function applied to each item.
+    """
+    if jobs is None or jobs <= 1:
+        return [func(item) for item in iterable]
+
+    with concurrent.futures.ProcessPoolExecutor(max_workers=jobs) as executor:
+        return list(executor.map(func, iterable))
+
+
+def parallel_imap(func, iterable, jobs=1):
+    """
+    The lazy variant of :code:`parallel_map`, which yields the results in the order of
+    the items as soon as they are available. At most :code:`jobs` items are processed
+    ahead of the item being consumed, so that only a few results are held in memory.
+
+    Parameters
+    ----------
+    func : callable
+        The function to be applied. It must be picklable (e.g. defined at the top
+        level of a module) if :code:`jobs` is larger than 1.
+    iterable : iterable
+        The items to be processed.
+    jobs : int
+        The number of processes. The items are processed serially if :code:`jobs` is 1.
+
+    Yields
+    ------
+    result : object
+        The result of the function applied to each item.
+    """
+    if jobs is None or jobs <= 1:
+        for item in iterable:
+            yield func(item)
+        return
+
+    with concurrent.futures.ProcessPoolExecutor(max_workers=jobs) as executor:
+        pending = []
+        for item in iterable:
+            pending.append(executor.submit(func, item))
+            if len(pending) > jobs:
+                yield pending.pop(0).result()
+        for future in pending:
+            yield future.result()
+
+
 class ParameterError(Exception):
     """
     An error due to improperly specified parameters has been deteced.
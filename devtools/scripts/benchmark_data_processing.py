@@ -0,0 +1,456 @@
+"""
+Benchmarks for the functions in `MD_plotting_toolkit.data_processing`.
+
+Each benchmark generates synthetic data in a temporary directory, times the
+current implementation against the previous one (or a reference implementation)
+and reports the throughput. Example usage:
+
+    python devtools/scripts/benchmark_data_processing.py -b read -n 2000000
+"""
+import argparse
+import bz2
+import gzip
+import lzma
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+from scipy import signal
+
+import MD_plotting_toolkit.data_processing as data_processing
+
+# The minimum speedup of data_processing.read_2d_data over the legacy reader
+# (np.loadtxt followed by a line-by-line fallback) on GROMACS xvg files.
+READ_TARGET_SPEEDUP = 1.5
+
+
+def write_xvg(f_output, n_frames, n_cols=2, seed=0):
+    """
+    Writes a synthetic GROMACS xvg file with a header.
+    """
+    rng = np.random.default_rng(seed)
+    data = np.empty((n_frames, n_cols))
+    data[:, 0] = np.arange(n_frames) * 2.0
+    data[:, 1:] = rng.normal(-20000, 100, size=(n_frames, n_cols - 1))
+    with open(f_output, "w") as f:
+        f.write("# This file was created by gmx energy\n")
+        f.write('@    title "GROMACS Energies"\n')
+        f.write('@    xaxis  label "Time (ps)"\n')
+        for i in range(n_cols - 1):
+            f.write(f'@ s{i} legend "Term {i}"\n')
+        np.savetxt(f, data, fmt="%14.6f")
+
+
+def legacy_read_2d_data(f_input, col_idx=1):
+    """
+    The implementation of read_2d_data before the single-pass parser.
+    """
+    try:
+        data = np.transpose(np.loadtxt(f_input))
+        x_data, y_data = data[0], data[col_idx]
+    except ValueError:
+        x_data, y_data = [], []
+        infile = open(f_input, "r")
+        lines = infile.readlines()
+        infile.close()
+
+        for line in lines:
+            if "#" not in line and "@" not in line:
+                x_data.append(float(line.split()[0]))
+                y_data.append(float(line.split()[col_idx]))
+
+        x_data, y_data = np.array(x_data), np.array(y_data)
+
+    return x_data, y_data
+
+
+def legacy_deduplicate_data(x, y):
+    """
+    The implementation of deduplicate_data based on pandas.
+    """
+    df_original = pd.DataFrame({"x": x, "y": y})
+    df = df_original[~df_original["x"].duplicated(keep="last")]
+    df = df.dropna()
+    df = df.reset_index()
+    df = df.drop(columns=["index"])
+    if len(df) == len(df_original):
+        return x, y
+    else:
+        return np.array(df[df.columns[0]]), np.array(df[df.columns[1]])
+
+
+def restarted_series(n_frames, n_restarts=10, overlap=1000, seed=0):
+    """
+    Returns a synthetic time series concatenated from a simulation restarted several times,
+    each time from a checkpoint :code:`overlap` frames before the end of the previous part.
+    """
+    rng = np.random.default_rng(seed)
+    bounds = np.linspace(0, n_frames, n_restarts + 2).astype(int)
+    x = np.concatenate(
+        [np.arange(max(start - overlap, 0), stop) for start, stop in zip(bounds[:-1], bounds[1:])]
+    ) * 2.0
+
+    return x, rng.normal(size=len(x))
+
+
+def timeit(func, *args, repeat=3, **kwargs):
+    """
+    Returns the best wall time of several calls and the output of the last call.
+    """
+    best = np.inf
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = func(*args, **kwargs)
+        best = min(best, time.perf_counter() - t0)
+
+    return best, out
+
+
+def bench_read(args, tmpdir):
+    f_input = os.path.join(tmpdir, "energy.xvg")
+    write_xvg(f_input, args.n_frames, args.n_cols)
+    size = os.path.getsize(f_input) / 1e6
+
+    t_old, (x_old, y_old) = timeit(legacy_read_2d_data, f_input, repeat=args.repeat)
+    t_new, (x_new, y_new) = timeit(data_processing.read_2d_data, f_input, repeat=args.repeat)
+    np.testing.assert_array_equal(x_old, x_new)
+    np.testing.assert_array_equal(y_old, y_new)
+
+    speedup = t_old / t_new
+    print(f"read_2d_data ({size:.1f} MB, {args.n_frames} frames, {args.n_cols} columns)")
+    print(f"  legacy: {t_old:.3f} s ({size / t_old:.1f} MB/s)")
+    print(f"  single-pass: {t_new:.3f} s ({size / t_new:.1f} MB/s)")
+    print(f"  speedup: {speedup:.2f}x (target: {READ_TARGET_SPEEDUP:.2f}x, "
+          f"i.e. {READ_TARGET_SPEEDUP * size / t_old:.1f} MB/s on this machine)")
+
+    return speedup >= READ_TARGET_SPEEDUP
+
+
+def bench_cache(args, tmpdir):
+    f_input = os.path.join(tmpdir, "energy.xvg")
+    write_xvg(f_input, args.n_frames, args.n_cols)
+    data_processing.CACHE_DIR = os.path.join(tmpdir, "cache")
+
+    t_cold, _ = timeit(data_processing.read_2d_data, f_input, cache=True, repeat=1)
+    t_warm, _ = timeit(data_processing.read_2d_data, f_input, cache=True, repeat=args.repeat)
+    print(f"read_2d_data with the on-disk cache ({args.n_frames} frames)")
+    print(f"  cold: {t_cold:.3f} s")
+    print(f"  warm: {t_warm * 1000:.1f} ms")
+
+    return t_warm < t_cold
+
+
+def bench_compressed(args, tmpdir):
+    f_input = os.path.join(tmpdir, "energy.xvg")
+    write_xvg(f_input, args.n_frames, args.n_cols)
+    with open(f_input, "rb") as f:
+        content = f.read()
+    size = len(content) / 1e6
+
+    t_plain, _ = timeit(data_processing.read_2d_data, f_input, repeat=args.repeat)
+    print(f"read_2d_data on compressed input ({size:.1f} MB uncompressed)")
+    print(f"  plain text: {t_plain:.3f} s ({size / t_plain:.1f} MB/s)")
+    for module, ext in [(gzip, ".gz"), (bz2, ".bz2"), (lzma, ".xz")]:
+        with module.open(f_input + ext, "wb") as f:
+            f.write(content)
+        ratio = size * 1e6 / os.path.getsize(f_input + ext)
+        t, _ = timeit(data_processing.read_2d_data, f_input + ext, repeat=args.repeat)
+        print(f"  {ext[1:]} (ratio {ratio:.1f}): {t:.3f} s ({size / t:.1f} MB/s of uncompressed text)")
+
+    return True
+
+
+def bench_stride(args, tmpdir):
+    f_input = os.path.join(tmpdir, "energy.xvg")
+    write_xvg(f_input, args.n_frames, args.n_cols)
+
+    t_full, _ = timeit(data_processing.read_2d_data, f_input, repeat=args.repeat)
+    print(f"read_2d_data with decimation at parse time ({args.n_frames} frames)")
+    print(f"  stride 1: {t_full:.3f} s")
+    for stride in [10, 100]:
+        t, (x, y) = timeit(data_processing.read_2d_data, f_input, stride=stride, repeat=args.repeat)
+        print(f"  stride {stride}: {t:.3f} s ({t_full / t:.1f}x faster, {len(y)} frames)")
+    t, (x, y) = timeit(data_processing.read_2d_data, f_input, max_points=2000, repeat=args.repeat)
+    print(f"  max_points 2000: {t:.3f} s ({t_full / t:.1f}x faster, {len(y)} frames)")
+
+    return True
+
+
+def bench_dedup(args, tmpdir):
+    x, y = restarted_series(args.n_frames)
+
+    t_old, (x_old, y_old) = timeit(legacy_deduplicate_data, x, y, repeat=args.repeat)
+    t_new, (x_new, y_new) = timeit(data_processing.deduplicate_data, x, y, repeat=args.repeat)
+    np.testing.assert_array_equal(x_old, x_new)
+    np.testing.assert_array_equal(y_old, y_new)
+    print(f"deduplicate_data ({len(x)} frames, 10 restarts)")
+    print(f"  pandas: {t_old:.3f} s")
+    print(f"  restart points: {t_new:.3f} s ({t_old / t_new:.1f}x faster)")
+
+    # Time frames of the restarted parts that differ by rounding errors
+    x_noisy = x + np.cumsum(np.diff(x, prepend=x[0]) < 0) % 2 * 1e-7
+    t_tol, (x_tol, y_tol) = timeit(data_processing.deduplicate_data, x_noisy, y, atol=1e-6, repeat=args.repeat)
+    np.testing.assert_array_equal(y_tol, y_new)
+    print(f"  restart points with atol=1e-6: {t_tol:.3f} s")
+
+    return t_new < t_old
+
+
+def bench_pipeline(args, tmpdir):
+    x, y = restarted_series(args.n_frames)
+
+    def sequential(x, y):
+        x, y = data_processing.deduplicate_data(x.copy(), y.copy())
+        x = data_processing.scale_data(x, "ps to ns", 2)
+        y = data_processing.scale_data(y, "kJ/mol to kcal/mol", 0.5)
+        return data_processing.slice_data(x, 50), data_processing.slice_data(y, 50)
+
+    def pipeline(x, y):
+        pipeline = data_processing.Pipeline(x, [y]).deduplicate()
+        pipeline.scale("x", "ps to ns", 2).scale("y", "kJ/mol to kcal/mol", 0.5).slice(50)
+        return pipeline.run()
+
+    t_old, _ = timeit(sequential, x, y, repeat=args.repeat)
+    t_new, _ = timeit(pipeline, x, y, repeat=args.repeat)
+    print(f"deduplication, unit conversion, scaling and slicing ({len(x)} frames)")
+    print(f"  sequential calls: {t_old:.3f} s")
+    print(f"  Pipeline: {t_new:.3f} s ({t_old / t_new:.1f}x faster)")
+
+    return True
+
+
+def bench_rolling(args, tmpdir):
+    rng = np.random.default_rng(0)
+    y = rng.normal(-20000, 100, args.n_frames)
+    print(f"rolling statistics ({args.n_frames} frames)")
+    for N in [10, 1000]:
+        rolling = pd.Series(y).rolling(N)
+        refs = {"std": lambda: rolling.std(ddof=0), "max": rolling.max, "min": rolling.min, "median": rolling.median}
+        for name, ref in refs.items():
+            func = getattr(data_processing, f"rolling_{name}")
+            t_old, out_old = timeit(ref, repeat=args.repeat)
+            t_new, out_new = timeit(func, y, N, repeat=args.repeat)
+            np.testing.assert_allclose(out_new, out_old.to_numpy()[N - 1:], rtol=1e-6)
+            print(f"  {name} (window {N}): pandas {t_old:.3f} s, rolling_{name} {t_new:.3f} s "
+                  f"({t_old / t_new:.1f}x faster)")
+
+    return True
+
+
+def bench_smooth(args, tmpdir):
+    rng = np.random.default_rng(0)
+    ys = list(rng.normal(-20000, 100, (20, args.n_frames // 20)))
+    print(f"smoothing of {len(ys)} time series ({len(ys[0])} frames each)")
+    for method, func in [
+        ("ema", data_processing.ema),
+        ("lowpass", data_processing.lowpass_filter),
+        ("savgol", data_processing.savgol_smooth),
+    ]:
+        t_old, out_old = timeit(lambda: [func(y, 101) for y in ys], repeat=args.repeat)
+        t_new, out_new = timeit(data_processing.smooth, ys, method, 101, repeat=args.repeat)
+        np.testing.assert_allclose(out_new, out_old)
+        print(f"  {method}: one call per series {t_old:.3f} s, batched {t_new:.3f} s ({t_old / t_new:.1f}x faster)")
+    t_pd, _ = timeit(lambda: [pd.Series(y).ewm(span=101, adjust=False).mean() for y in ys], repeat=args.repeat)
+    print(f"  ema with pandas: {t_pd:.3f} s")
+
+    return True
+
+
+def bench_acf(args, tmpdir):
+    rng = np.random.default_rng(0)
+    y = rng.normal(size=args.n_frames)
+    print(f"autocorrelation function ({args.n_frames} frames)")
+
+    n_direct = min(args.n_frames, 50000)
+    d = y[:n_direct] - np.mean(y[:n_direct])
+    t_old, out_old = timeit(np.correlate, d, d, "full", repeat=1)
+    t_new, out_new = timeit(data_processing.autocorrelation, y[:n_direct], repeat=args.repeat)
+    acov = out_old[n_direct - 1:] / (n_direct - np.arange(n_direct))
+    np.testing.assert_allclose(out_new, acov / acov[0], atol=1e-9)
+    print(f"  direct sum ({n_direct} frames): {t_old:.3f} s, FFT: {t_new:.3f} s ({t_old / t_new:.1f}x faster)")
+
+    t, _ = timeit(data_processing.autocorrelation, y, repeat=args.repeat)
+    print(f"  chunked FFT up to {min(len(y) - 1, data_processing.ACF_MAX_LAG)} lags: {t:.3f} s")
+
+    return True
+
+
+def bench_equilibration(args, tmpdir):
+    rng = np.random.default_rng(0)
+    n = args.n_frames
+    y = signal.lfilter([1], [1, -0.99], rng.normal(size=n))  # an AR(1) process with tau of about 100 frames
+    y += 50 * np.exp(-np.arange(n) / (n / 20))  # the relaxation from the initial configuration
+    print(f"equilibration detection ({n} frames)")
+
+    def naive(y, n_origins=100):
+        origins = np.unique(np.geomspace(1, len(y) - 1, n_origins).astype(int) - 1)
+        n_effs = []
+        for t0 in origins:
+            acf = data_processing.autocorrelation(y[t0:])
+            n_effs.append(data_processing.autocorrelation_time(acf, len(y) - t0)[2])
+        return origins[int(np.argmax(n_effs))]
+
+    t_old, t0_old = timeit(naive, y, repeat=1)
+    t_new, (t0_new, g, n_eff) = timeit(data_processing.detect_equilibration, y, repeat=args.repeat)
+    print(f"  full ACF of each suffix: {t_old:.3f} s (t0 = {t0_old})")
+    print(f"  accumulated suffixes: {t_new:.3f} s (t0 = {t0_new}, {t_old / t_new:.1f}x faster)")
+
+    return True
+
+
+def bench_blocking(args, tmpdir):
+    rng = np.random.default_rng(0)
+    y = signal.lfilter([1], [1, -0.99], rng.normal(size=args.n_frames))
+
+    def reshaped(y):  # re-averaging the data for each block size
+        errors = []
+        for b in 2 ** np.arange(int(np.log2(len(y)))):
+            means = y[: len(y) // b * b].reshape(-1, b).mean(axis=1)
+            errors.append(np.std(means) / np.sqrt(len(means) - 1))
+        return np.array(errors)
+
+    t_old, out_old = timeit(reshaped, y, repeat=args.repeat)
+    t_new, (block_sizes, out_new, _) = timeit(data_processing.block_average, y, repeat=args.repeat)
+    np.testing.assert_allclose(out_new, out_old, rtol=1e-8)
+    print(f"block averaging ({args.n_frames} frames, {len(block_sizes)} block sizes)")
+    print(f"  reshaping for each block size: {t_old:.3f} s")
+    print(f"  pairwise reduction: {t_new:.3f} s ({t_old / t_new:.1f}x faster)")
+
+    f_npy = os.path.join(tmpdir, "y.npy")
+    np.save(f_npy, y)
+    t_mmap, _ = timeit(data_processing.block_average, np.load(f_npy, mmap_mode="r"), repeat=args.repeat)
+    print(f"  pairwise reduction of memory-mapped data: {t_mmap:.3f} s")
+
+    return True
+
+
+def bench_bootstrap(args, tmpdir):
+    rng = np.random.default_rng(0)
+    y = rng.normal(size=args.n_frames)
+    n_resamples = 200
+    print(f"bootstrap ({args.n_frames} frames, {n_resamples} resamples)")
+
+    def loop(y):  # materializing each resample
+        rng = np.random.default_rng(0)
+        means, hists = [], []
+        for _ in range(n_resamples):
+            resample = y[rng.integers(0, len(y), len(y))]
+            means.append(np.mean(resample))
+            hists.append(np.histogram(resample, 50)[0])
+        return np.array(means), np.array(hists)
+
+    def engine(y, block_size=1, jobs=1):
+        kwargs = {"n_resamples": n_resamples, "block_size": block_size, "seed": 0, "jobs": jobs}
+        return data_processing.bootstrap_mean(y, **kwargs), data_processing.bootstrap_histogram(y, 50, **kwargs)
+
+    t_old, _ = timeit(loop, y, repeat=1)
+    print(f"  Python loop over resamples: {t_old:.3f} s")
+    for block_size, jobs in [(1, 1), (1, 4), (100, 1)]:
+        t_new, _ = timeit(engine, y, block_size, jobs, repeat=args.repeat)
+        print(f"  block size {block_size}, {jobs} process(es): {t_new:.3f} s ({t_old / t_new:.1f}x faster)")
+
+    return True
+
+
+def bench_flatness(args, tmpdir):
+    rng = np.random.default_rng(0)
+    y = rng.integers(0, 40, args.n_frames) + rng.normal(0, 0.1, args.n_frames)  # visited states
+    print(f"histogram flatness ({args.n_frames} frames)")
+
+    def set_based(y, lower_b=5, upper_b=35):
+        truncated_y = np.array(list(set(y[y < upper_b]).intersection(y[y > lower_b])))
+        counts = np.histogram(truncated_y, bins=30)[0]
+        return np.max(counts) / np.min(counts)
+
+    def from_counts(y, lower_b=5, upper_b=35):  # the histogram of the plot is binned anyway
+        counts, bin_edges = np.histogram(y, bins=40, range=(0, 40))
+        within = (bin_edges[:-1] >= lower_b) & (bin_edges[1:] <= upper_b)
+        return data_processing.flatness(counts[within])["N_ratio"]
+
+    t_old, _ = timeit(set_based, y, repeat=1)
+    t_new, _ = timeit(from_counts, y, repeat=args.repeat)
+    print(
+        f"  N_ratio with a set intersection: {t_old:.3f} s, "
+        f"from the counts of the histogram: {t_new:.3f} s ({t_old / t_new:.1f}x faster)"
+    )
+
+    windows = [(lower, lower + 10) for lower in np.arange(0, 30, 0.25)]
+    t_old, out_old = timeit(lambda: np.array([np.histogram(y, 10, w)[0] for w in windows]), repeat=args.repeat)
+    t_new, (out_new, _) = timeit(data_processing.flatness_windows, y, windows, 10, repeat=args.repeat)
+    np.testing.assert_array_equal(out_old, out_new)
+    print(f"  {len(windows)} windows, one np.histogram per window: {t_old:.3f} s")
+    print(f"  {len(windows)} windows from the sorted data: {t_new:.3f} s ({t_old / t_new:.1f}x faster)")
+
+    return True
+
+
+BENCHMARKS = {
+    "read": bench_read,
+    "cache": bench_cache,
+    "compressed": bench_compressed,
+    "stride": bench_stride,
+    "dedup": bench_dedup,
+    "pipeline": bench_pipeline,
+    "rolling": bench_rolling,
+    "smooth": bench_smooth,
+    "acf": bench_acf,
+    "equilibration": bench_equilibration,
+    "blocking": bench_blocking,
+    "bootstrap": bench_bootstrap,
+    "flatness": bench_flatness,
+}
+
+
+def initialize():
+    parser = argparse.ArgumentParser(
+        description="This code benchmarks the functions in MD_plotting_toolkit.data_processing."
+    )
+    parser.add_argument(
+        "-b",
+        "--bench",
+        nargs="+",
+        choices=list(BENCHMARKS.keys()),
+        default=list(BENCHMARKS.keys()),
+        help="The benchmarks to run. Default: all.",
+    )
+    parser.add_argument(
+        "-n",
+        "--n_frames",
+        type=int,
+        default=1000000,
+        help="The number of frames of the synthetic data. Default: 1000000.",
+    )
+    parser.add_argument(
+        "-c",
+        "--n_cols",
+        type=int,
+        default=2,
+        help="The number of columns of the synthetic data. Default: 2.",
+    )
+    parser.add_argument(
+        "-r",
+        "--repeat",
+        type=int,
+        default=3,
+        help="The number of repetitions of each timing. Default: 3.",
+    )
+
+    return parser.parse_args()
+
+
+def main():
+    args = initialize()
+    passed = True
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for name in args.bench:
+            passed = BENCHMARKS[name](args, tmpdir) and passed
+            print()
+
+    if passed is False:
+        raise SystemExit("At least one benchmark did not meet its target.")
+
+
+if __name__ == "__main__":
+    main()